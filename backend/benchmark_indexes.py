@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the hot queries on posts and scheduled_posts with and without
+their secondary indexes.
+
+Fills a database with a synthetic dataset (mostly published history and a
+small share of pending scheduled posts), then runs each query first with
+only primary keys and unique constraints and then with the indexes created
+by the database migrations, printing query plans and latencies:
+
+    python benchmark_indexes.py --users 1000 --posts 200000 --scheduled 200000
+    python benchmark_indexes.py --database-url postgresql://localhost/bench
+
+Runs against a throwaway SQLite database unless --database-url is given.
+Do not point it at a database with real data: it drops and recreates the
+indexes of both tables.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hot query benchmark with and without secondary indexes')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=100000, help='Generated posts')
+    parser.add_argument('--scheduled', type=int, default=100000, help='Scheduled posts, mostly published history')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per query and phase')
+    parser.add_argument('--database-url', help='Database to use instead of a temporary SQLite file')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        database_dir = tempfile.mkdtemp(prefix='index-benchmark-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(database_dir, 'benchmark.db')}"
+    os.environ['FLASK_ENV'] = 'development'
+    os.environ['TOKEN_REFRESH_ENABLED'] = 'false'
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sqlalchemy import and_, or_, func, insert, text
+    from src.main import create_app
+    from src.database_migration import upgrade_database
+    from src.models import db, User, Post, ScheduledPost
+
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        app = create_app('development')
+
+    print(f"🧪 Index benchmark: {args.users} users, {args.posts} posts, {args.scheduled} scheduled posts")
+    print(f"   Database: {os.environ['DATABASE_URL']}")
+
+    with app.app_context():
+        with quiet:
+            upgrade_database()
+        dialect = db.engine.dialect.name
+        now = datetime.utcnow()
+
+        # Synthetic dataset
+        started = time.perf_counter()
+        run_id = now.strftime('%Y%m%d%H%M%S')
+        db.session.execute(insert(User), [{
+            'username': f'bench_{run_id}_{index}', 'email': f'bench_{run_id}_{index}@example.com',
+            'password_hash': 'x', 'created_at': now
+        } for index in range(args.users)])
+        user_ids = [row[0] for row in db.session.query(User.id).filter(User.username.like(f'bench_{run_id}_%'))]
+
+        platforms = ['linkedin', 'facebook', 'twitter', 'instagram']
+        group_ids = []
+        rows = []
+        for index in range(args.posts):
+            group_id = None
+            if random.random() < 0.3:
+                # Multi-platform posts come in groups of up to four
+                if not group_ids or random.random() < 0.3:
+                    group_ids.append(str(uuid.uuid4()))
+                group_id = group_ids[-1]
+            created_at = now - timedelta(minutes=random.randint(0, 2 * 365 * 24 * 60))
+            rows.append({
+                'user_id': random.choice(user_ids), 'content': f'Benchmark post {index}',
+                'platform': random.choice(platforms), 'status': 'ungeplant', 'is_posted': False,
+                'post_group_id': group_id, 'created_at': created_at, 'updated_at': created_at
+            })
+            if len(rows) == 5000:
+                db.session.execute(insert(Post), rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(Post), rows)
+
+        # Mostly finished history; a few percent still pending, some of them due
+        statuses = [('published', 0.85), ('failed', 0.04), ('cancelled', 0.03), ('scheduled', 0.07), ('retrying', 0.01)]
+        rows = []
+        for index in range(args.scheduled):
+            status = random.choices([status for status, _ in statuses], [weight for _, weight in statuses])[0]
+            if status == 'scheduled':
+                scheduled_time = now + timedelta(minutes=random.randint(-5, 30 * 24 * 60))
+            elif status == 'retrying':
+                scheduled_time = now - timedelta(minutes=random.randint(1, 60))
+            else:
+                scheduled_time = now - timedelta(minutes=random.randint(1, 2 * 365 * 24 * 60))
+            rows.append({
+                'user_id': random.choice(user_ids), 'content': f'Benchmark scheduled post {index}',
+                'platform': random.choice(platforms), 'scheduled_time': scheduled_time, 'timezone': 'UTC',
+                'status': status, 'attempts': 1 if status != 'scheduled' else 0,
+                'next_attempt_at': now + timedelta(minutes=random.randint(-10, 30)) if status == 'retrying' else None,
+                'created_at': scheduled_time, 'updated_at': scheduled_time
+            })
+            if len(rows) == 5000:
+                db.session.execute(insert(ScheduledPost), rows)
+                rows = []
+        if rows:
+            db.session.execute(insert(ScheduledPost), rows)
+        db.session.commit()
+        print(f"   Generated in {time.perf_counter() - started:.1f}s")
+
+        sample_users = random.sample(user_ids, min(len(user_ids), args.repeat))
+        sample_groups = random.sample(group_ids, min(len(group_ids), args.repeat)) or [None]
+
+        # The queries as the application runs them
+        queries = {
+            'scheduler claim scan': lambda i: db.session.query(ScheduledPost.id).filter(or_(
+                # As in SchedulerService._claimable
+                and_(ScheduledPost.status == 'scheduled', ScheduledPost.scheduled_time <= now),
+                and_(ScheduledPost.status == 'retrying', ScheduledPost.next_attempt_at <= now),
+                and_(ScheduledPost.status == 'publishing', ScheduledPost.lease_expires_at < now)
+            )).order_by(ScheduledPost.scheduled_time).limit(100),
+            'scheduled posts of a user (status)': lambda i: ScheduledPost.query.filter_by(
+                user_id=sample_users[i % len(sample_users)], status='scheduled'
+            ).order_by(ScheduledPost.scheduled_time.desc()),
+            'scheduled posts of a user (all)': lambda i: ScheduledPost.query.filter_by(
+                user_id=sample_users[i % len(sample_users)]
+            ).order_by(ScheduledPost.scheduled_time.desc()),
+            'post list page': lambda i: Post.query.filter_by(
+                user_id=sample_users[i % len(sample_users)]
+            ).order_by(Post.created_at.desc()).limit(20),
+            'post list count': lambda i: db.session.query(func.count(Post.id)).filter(
+                Post.user_id == sample_users[i % len(sample_users)]
+            ),
+            'post group lookup': lambda i: Post.query.filter(Post.post_group_id == sample_groups[i % len(sample_groups)])
+        }
+
+        def explain(query):
+            sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            if dialect == 'sqlite':
+                return [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+            return [row[0] for row in db.session.execute(text(f'EXPLAIN {sql}'))]
+
+        def measure(phase):
+            db.session.execute(text('ANALYZE'))
+            db.session.commit()
+            results = {}
+            print(f"\n📊 {phase}")
+            for name, build in queries.items():
+                plan = explain(build(0))
+                latencies = []
+                for index in range(args.repeat):
+                    started = time.perf_counter()
+                    build(index).all()
+                    latencies.append(time.perf_counter() - started)
+                results[name] = (percentile(latencies, 0.5) * 1000, percentile(latencies, 0.95) * 1000)
+                print(f"   {name}: p50 {results[name][0]:.2f}ms, p95 {results[name][1]:.2f}ms")
+                for line in plan:
+                    print(f"      {line}")
+            return results
+
+        def secondary_indexes():
+            """Name and definition of the non-unique indexes of both tables, as created by the migrations."""
+            if dialect == 'sqlite':
+                rows = db.session.execute(text(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                    "AND tbl_name IN ('posts', 'scheduled_posts') AND sql IS NOT NULL"
+                ))
+            else:
+                rows = db.session.execute(text(
+                    "SELECT indexname, indexdef FROM pg_indexes WHERE tablename IN ('posts', 'scheduled_posts')"
+                ))
+            return [(name, definition) for name, definition in rows if 'UNIQUE' not in definition.upper()]
+
+        # Phase 1: primary keys and unique constraints only
+        indexes = secondary_indexes()
+        for name, _ in indexes:
+            db.session.execute(text(f'DROP INDEX {name}'))
+        db.session.commit()
+        before = measure('Without secondary indexes')
+
+        # Phase 2: the same indexes again
+        for _, definition in indexes:
+            db.session.execute(text(definition))
+        db.session.commit()
+        print(f"\n   Created: {', '.join(sorted(name for name, _ in indexes))}")
+        after = measure('With indexes')
+
+    print("\n📈 p50 latency")
+    for name in queries:
+        speedup = before[name][0] / after[name][0] if after[name][0] else float('inf')
+        print(f"   {name:<36} {before[name][0]:>9.2f}ms -> {after[name][0]:>8.2f}ms  ({speedup:.1f}x)")
+
+if __name__ == '__main__':
+    main()
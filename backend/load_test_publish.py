@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Load test of the publish pipeline against the local platform stand-ins.
+
+Measures
+  1. publish throughput: concurrent POST /api/social-accounts/publish requests
+  2. scheduler drain rate: how fast a backlog of due scheduled posts is published
+     by SchedulerService.process_scheduled_posts
+
+Runs against a throwaway SQLite database unless --database-url is given and
+starts the stand-ins in-process unless --standin-url points at running ones:
+
+    python load_test_publish.py --users 20 --publishes 200 --scheduled 500 --latency-ms 150
+    python load_test_publish.py --throttle-rate 0.05 --error-rate 0.02 --rate-limits
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Publish pipeline load test against the platform stand-ins')
+    parser.add_argument('--users', type=int, default=10, help='Users, each with one account per platform')
+    parser.add_argument('--platforms', default='linkedin,facebook,twitter,instagram')
+    parser.add_argument('--publishes', type=int, default=100, help='Publish API requests')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallel publish API requests')
+    parser.add_argument('--scheduled', type=int, default=200, help='Due scheduled posts to drain')
+    parser.add_argument('--drain-timeout', type=float, default=300, help='Seconds before giving up on the drain')
+    parser.add_argument('--image-bytes', type=int, default=64 * 1024,
+                        help='Size of the image attached to every post, 0 for text posts (Instagram needs an image)')
+    parser.add_argument('--database-url', help='Database to use instead of a temporary SQLite file')
+    parser.add_argument('--standin-url', help='Use already running stand-ins instead of starting them')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--quota', type=int, default=0, help='Requests per token and minute before 429s')
+    parser.add_argument('--rate-limits', action='store_true',
+                        help='Keep the configured RATE_LIMITS instead of lifting them')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    return parser.parse_args()
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def main():
+    args = parse_args()
+    platforms = [platform.strip() for platform in args.platforms.split(',') if platform.strip()]
+
+    standin_server = None
+    standin_url = args.standin_url
+    if not standin_url:
+        from platform_standins import start_standin_server
+        standin_server, standin_url = start_standin_server(behaviour={
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'throttle_rate': args.throttle_rate,
+            'error_rate': args.error_rate,
+            'quota': args.quota
+        })
+
+    database_dir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        database_dir = tempfile.mkdtemp(prefix='publish-load-test-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(database_dir, 'load_test.db')}"
+    os.environ['FLASK_ENV'] = 'development'
+    os.environ['PLATFORM_STANDIN_URL'] = standin_url
+    os.environ['TOKEN_REFRESH_ENABLED'] = 'false'
+    os.environ['SCHEDULER_ENABLED'] = 'false'  # The drain phase runs the scheduler itself
+    os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from src.main import create_app
+    from src.database_migration import upgrade_database
+    from src.models import db, User, Post, SocialAccount, ScheduledPost, PublishIntent
+    from src.services.scheduler_service import SchedulerService
+    from flask_jwt_extended import create_access_token
+
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        app = create_app('development')
+        app.config['OUTBOX_RETRY_BASE_SECONDS'] = 1
+        app.config['OUTBOX_RETRY_MAX_SECONDS'] = 10
+        if not args.rate_limits:
+            # Measure the pipeline, not the configured platform budgets
+            app.config['RATE_LIMITS'] = {
+                platform: {'platform_rate': 1e6, 'platform_burst': 1e6, 'account_rate': 1e6, 'account_burst': 1e6}
+                for platform in ('linkedin', 'facebook', 'instagram', 'twitter')
+            }
+
+    print(f"🧪 Publish load test: {args.users} users x {platforms}, stand-ins at {standin_url}")
+    print(f"   Database: {os.environ['DATABASE_URL']}")
+
+    image_url = f'{standin_url}/_standin/image.png?size={args.image_bytes}' if args.image_bytes else None
+
+    # Setup
+    with app.app_context(), quiet:
+        upgrade_database()
+        run_id = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+        users = []
+        for index in range(args.users):
+            user = User(username=f'loadtest_{run_id}_{index}', email=f'loadtest_{run_id}_{index}@example.com')
+            user.set_password('load-test')
+            db.session.add(user)
+            users.append(user)
+        db.session.flush()
+
+        for user in users:
+            for platform in platforms:
+                db.session.add(SocialAccount(
+                    user_id=user.id,
+                    platform=platform,
+                    account_id=f'standin{user.id}',
+                    account_name=f'Load test {user.id}',
+                    access_token=f'token-{platform}-{user.id}',
+                    refresh_token=f'refresh-{platform}-{user.id}',
+                    expires_at=datetime.utcnow() + timedelta(days=30)
+                ))
+
+        publish_jobs = []
+        for index in range(args.publishes):
+            user = users[index % len(users)]
+            post = Post(user_id=user.id, title=f'Load test {index}', content=f'Load test post {index} ({run_id})',
+                        generated_image_url=image_url)
+            db.session.add(post)
+            publish_jobs.append((user, post))
+        db.session.flush()
+        publish_jobs = [(create_access_token(identity=str(user.id)), post.id) for user, post in publish_jobs]
+
+        now = datetime.utcnow()
+        for index in range(args.scheduled):
+            user = users[index % len(users)]
+            db.session.add(ScheduledPost(
+                user_id=user.id,
+                content=f'Scheduled load test post {index} ({run_id})',
+                generated_image_url=image_url,
+                platform=platforms[index % len(platforms)],
+                scheduled_time=now - timedelta(seconds=1)
+            ))
+        db.session.commit()
+        user_ids = [user.id for user in users]
+
+    # Phase 1: publish throughput
+    latencies = []
+    statuses = {}
+
+    def publish(job):
+        token, post_id = job
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post('/api/social-accounts/publish', json={'post_id': post_id, 'platforms': platforms},
+                               headers={'Authorization': f'Bearer {token}'})
+        return time.perf_counter() - started, response.status_code
+
+    if publish_jobs:
+        print(f"\n📤 Publishing {len(publish_jobs)} posts to {len(platforms)} platforms "
+              f"({args.concurrency} concurrent requests)...")
+        started = time.perf_counter()
+        with quiet, ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            for latency, status_code in executor.map(publish, publish_jobs):
+                latencies.append(latency)
+                statuses[status_code] = statuses.get(status_code, 0) + 1
+        elapsed = time.perf_counter() - started
+
+        with app.app_context():
+            counts = dict(db.session.query(PublishIntent.status, db.func.count(PublishIntent.id)).filter(
+                PublishIntent.user_id.in_(user_ids), PublishIntent.scheduled_post_id.is_(None)
+            ).group_by(PublishIntent.status).all())
+        print(f"   {elapsed:.2f}s, {len(publish_jobs) / elapsed:.1f} requests/s, "
+              f"{counts.get('sent', 0) / elapsed:.1f} platform posts/s")
+        print(f"   Latency p50 {percentile(latencies, 0.5) * 1000:.0f}ms, p95 {percentile(latencies, 0.95) * 1000:.0f}ms, "
+              f"max {max(latencies) * 1000:.0f}ms, mean {statistics.mean(latencies) * 1000:.0f}ms")
+        print(f"   HTTP statuses: {statuses}, intents: {counts}")
+
+    # Phase 2: scheduler drain
+    if args.scheduled:
+        print(f"\n⏱️  Draining {args.scheduled} due scheduled posts...")
+        started = time.perf_counter()
+        rounds = 0
+        with app.app_context():
+            def backlog():
+                return ScheduledPost.query.filter(
+                    ScheduledPost.user_id.in_(user_ids),
+                    ScheduledPost.status.in_(['scheduled', 'queued'])
+                ).count()
+
+            remaining = backlog()
+            while remaining and time.perf_counter() - started < args.drain_timeout:
+                with quiet:
+                    results = SchedulerService().process_scheduled_posts()
+                rounds += 1
+                remaining = backlog()
+                if not results.get('total_processed') and remaining:
+                    # Only retries and deferred publishes are left; wait until the next is due
+                    next_attempt = db.session.query(db.func.min(PublishIntent.next_attempt_at)).filter(
+                        PublishIntent.user_id.in_(user_ids), PublishIntent.status == 'pending'
+                    ).scalar()
+                    wait = (next_attempt - datetime.utcnow()).total_seconds() if next_attempt else 1
+                    time.sleep(min(max(wait, 0.05), 5))
+            elapsed = time.perf_counter() - started
+
+            counts = dict(db.session.query(ScheduledPost.status, db.func.count(ScheduledPost.id)).filter(
+                ScheduledPost.user_id.in_(user_ids)
+            ).group_by(ScheduledPost.status).all())
+        published = counts.get('published', 0)
+        print(f"   {elapsed:.2f}s in {rounds} scheduler runs, {published / elapsed:.1f} posts/s drained")
+        print(f"   Scheduled posts: {counts}" + ("" if not remaining else f" ⚠️  {remaining} left after timeout"))
+
+    # Stand-in view
+    import requests
+    stats = requests.get(f'{standin_url}/_standin/stats', timeout=10).json()
+    throttled = sum(count for key, count in stats['requests'].items() if key.endswith(' 429'))
+    failed = sum(count for key, count in stats['requests'].items() if key.split(' ')[-1].startswith('5'))
+    print(f"\n🌐 Stand-ins: {sum(stats['requests'].values())} requests, {throttled} throttled, {failed} failed, "
+          f"posts {stats['posts']}, {stats['uploaded_bytes']} bytes uploaded")
+
+    if standin_server:
+        standin_server.shutdown()
+    if database_dir:
+        print(f"   Database left at {database_dir} for inspection")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 08:42:55.917926
+
+The schema as of the switch to versioned migrations. Databases created
+before that (by db.create_all() and the column checks that ran on the first
+request) are brought to the same state: missing tables, columns and indexes
+are added and existing ones are left alone, so the revision can run against
+an empty database as well as against any earlier deployment.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Columns that were added to existing tables on startup before this revision
+LEGACY_COLUMNS = {
+    'users': [
+        sa.Column('subscription', sa.String(length=20), nullable=False, server_default='free')
+    ],
+    'posts': [
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='ungeplant'),
+        sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+        sa.Column('post_group_id', sa.String(length=50), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True)
+    ],
+    'scheduled_posts': [
+        sa.Column('media_asset', sa.String(length=255), nullable=True),
+        sa.Column('prepared_account_id', sa.Integer(), nullable=True),
+        sa.Column('prepared_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_by', sa.String(length=64), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+        sa.Column('error_class', sa.String(length=30), nullable=True),
+        sa.Column('publish_lag_seconds', sa.Float(), nullable=True),
+        sa.Column('recurring_schedule_id', sa.Integer(),
+                  # Named as PostgreSQL names it on a fresh install; batch mode needs a name
+                  sa.ForeignKey('recurring_schedules.id', name='scheduled_posts_recurring_schedule_id_fkey'),
+                  nullable=True)
+    ],
+    'publish_outbox': [
+        sa.Column('media_asset', sa.String(length=255), nullable=True)
+    ]
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+    existing_tables = set(sa.inspect(bind).get_table_names())
+
+    def create_table(name, *elements):
+        if name not in existing_tables:
+            op.create_table(name, *elements)
+
+    def create_index(name, table, columns, dialect=None, **kwargs):
+        if dialect and bind.dialect.name != dialect:
+            return
+        if name in {index['name'] for index in sa.inspect(bind).get_indexes(table)}:
+            return
+        if is_postgres and table in existing_tables:
+            # Tables of earlier deployments may be large; build without blocking writes
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, table, columns, **kwargs)
+
+    create_table('rate_limit_buckets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('bucket_key', sa.String(length=64), nullable=False),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('capacity', sa.Float(), nullable=False),
+    sa.Column('refill_rate', sa.Float(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('blocked_until', sa.DateTime(), nullable=True),
+    sa.Column('reported_limit', sa.Integer(), nullable=True),
+    sa.Column('reported_remaining', sa.Integer(), nullable=True),
+    sa.Column('reported_reset_at', sa.DateTime(), nullable=True),
+    sa.Column('throttled_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('bucket_key')
+    )
+    create_table('scheduler_leases',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('holder', sa.String(length=100), nullable=False),
+    sa.Column('acquired_at', sa.DateTime(), nullable=False),
+    sa.Column('renewed_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.Column('subscription', sa.String(length=20), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    create_table('planner_ideas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('idea_key', sa.String(length=32), nullable=False),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('hook', sa.Text(), nullable=True),
+    sa.Column('persona', sa.String(length=200), nullable=True),
+    sa.Column('funnel', sa.String(length=50), nullable=True),
+    sa.Column('channels', sa.Text(), nullable=True),
+    sa.Column('source_mode', sa.String(length=10), nullable=True),
+    sa.Column('source', sa.Text(), nullable=True),
+    sa.Column('search_text', sa.Text(), nullable=False),
+    sa.Column('signature', sa.Text(), nullable=False),
+    sa.Column('times_suggested', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_suggested_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idea_key')
+    )
+    create_table('post_usage',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('posts_generated', sa.Integer(), nullable=False),
+    sa.Column('posts_posted', sa.Integer(), nullable=False),
+    sa.Column('last_reset_date', sa.Date(), nullable=False),
+    sa.Column('monthly_limit', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('profile_url', sa.Text(), nullable=True),
+    sa.Column('post_theme', sa.Text(), nullable=True),
+    sa.Column('additional_details', sa.Text(), nullable=True),
+    sa.Column('generated_image_url', sa.Text(), nullable=True),
+    sa.Column('platform', sa.String(length=20), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=True),
+    sa.Column('is_posted', sa.Boolean(), nullable=False),
+    sa.Column('posted_at', sa.DateTime(), nullable=True),
+    sa.Column('post_group_id', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('social_accounts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('account_id', sa.String(length=100), nullable=True),
+    sa.Column('account_name', sa.String(length=100), nullable=True),
+    sa.Column('access_token', sa.Text(), nullable=True),
+    sa.Column('refresh_token', sa.Text(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'platform', name='unique_user_platform')
+    )
+    create_table('media_assets',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('social_account_id', sa.Integer(), nullable=False),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('asset_urn', sa.String(length=255), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['social_account_id'], ['social_accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('social_account_id', 'content_hash', name='unique_account_media_hash')
+    )
+    create_table('planner_idea_bands',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('idea_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('band_hash', sa.String(length=24), nullable=False),
+    sa.ForeignKeyConstraint(['idea_id'], ['planner_ideas.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('recurring_schedules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('generated_image_url', sa.Text(), nullable=True),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('rrule', sa.String(length=255), nullable=False),
+    sa.Column('dtstart', sa.DateTime(), nullable=False),
+    sa.Column('timezone', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('materialized_until', sa.DateTime(), nullable=True),
+    sa.Column('occurrences_created', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('scheduled_posts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('recurring_schedule_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('generated_image_url', sa.Text(), nullable=True),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('scheduled_time', sa.DateTime(), nullable=False),
+    sa.Column('timezone', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.Column('publish_lag_seconds', sa.Float(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.Column('error_class', sa.String(length=30), nullable=True),
+    sa.Column('locked_by', sa.String(length=64), nullable=True),
+    sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+    sa.Column('media_asset', sa.String(length=255), nullable=True),
+    sa.Column('prepared_account_id', sa.Integer(), nullable=True),
+    sa.Column('prepared_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['recurring_schedule_id'], ['recurring_schedules.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    create_table('publish_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('scheduled_post_id', sa.Integer(), nullable=True),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=120), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('image_url', sa.Text(), nullable=True),
+    sa.Column('media_asset', sa.String(length=255), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=64), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('dispatched_at', sa.DateTime(), nullable=True),
+    sa.Column('external_id', sa.String(length=255), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+    sa.ForeignKeyConstraint(['scheduled_post_id'], ['scheduled_posts.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('idempotency_key')
+    )
+    create_table('publications',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=True),
+    sa.Column('scheduled_post_id', sa.Integer(), nullable=True),
+    sa.Column('intent_id', sa.Integer(), nullable=True),
+    sa.Column('platform', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('external_id', sa.String(length=255), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('published_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['intent_id'], ['publish_outbox.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['scheduled_post_id'], ['scheduled_posts.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('intent_id')
+    )
+
+    for table, columns in LEGACY_COLUMNS.items():
+        if table not in existing_tables:
+            continue
+        present = {column['name'] for column in sa.inspect(bind).get_columns(table)}
+        missing = [column for column in columns if column.name not in present]
+        if missing:
+            # Batch mode: SQLite cannot add a column with a foreign key in place
+            with op.batch_alter_table(table) as batch_op:
+                for column in missing:
+                    batch_op.add_column(column.copy())
+    if 'posts' in existing_tables:
+        op.execute("UPDATE posts SET updated_at = created_at WHERE updated_at IS NULL")
+        if is_postgres:
+            # title and post_theme were VARCHAR(200) in the first deployments
+            for column in sa.inspect(bind).get_columns('posts'):
+                if column['name'] in ('title', 'post_theme') and not isinstance(column['type'], sa.Text):
+                    op.alter_column('posts', column['name'], type_=sa.Text(), existing_nullable=True)
+
+    if is_postgres:
+        # An interrupted concurrent build leaves an invalid index behind that would be taken as existing
+        invalid = bind.execute(sa.text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid"
+        )).scalars().all()
+        for name in invalid:
+            if name.startswith(('ix_', 'ux_')):
+                with op.get_context().autocommit_block():
+                    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    create_index('ix_planner_ideas_user_created', 'planner_ideas', ['user_id', 'created_at'])
+    create_index('ix_posts_post_group', 'posts', ['post_group_id'], postgresql_where=sa.text('post_group_id IS NOT NULL'), sqlite_where=sa.text('post_group_id IS NOT NULL'))
+    create_index('ix_posts_user_created', 'posts', ['user_id', 'created_at'])
+    create_index('ix_planner_idea_bands_idea', 'planner_idea_bands', ['idea_id'])
+    create_index('ix_planner_idea_bands_user_band', 'planner_idea_bands', ['user_id', 'band_hash'])
+    create_index('ix_recurring_schedules_status_materialized', 'recurring_schedules', ['status', 'materialized_until'])
+    create_index('ix_scheduled_posts_due', 'scheduled_posts', ['scheduled_time'], postgresql_where=sa.text("status = 'scheduled'"), dialect='postgresql')
+    create_index('ix_scheduled_posts_lease_expiry', 'scheduled_posts', ['lease_expires_at'], postgresql_where=sa.text("status = 'publishing'"), dialect='postgresql')
+    create_index('ix_scheduled_posts_retry_due', 'scheduled_posts', ['next_attempt_at'], postgresql_where=sa.text("status = 'retrying'"), dialect='postgresql')
+    create_index('ix_scheduled_posts_status_next_attempt', 'scheduled_posts', ['status', 'next_attempt_at'])
+    create_index('ix_scheduled_posts_status_time', 'scheduled_posts', ['status', 'scheduled_time'])
+    create_index('ix_scheduled_posts_status_updated', 'scheduled_posts', ['status', 'updated_at'])
+    create_index('ix_scheduled_posts_user_time_status', 'scheduled_posts', ['user_id', 'scheduled_time', 'status'])
+    create_index('ux_scheduled_posts_series_time', 'scheduled_posts', ['recurring_schedule_id', 'scheduled_time'], unique=True)
+    create_index('ix_publish_outbox_post', 'publish_outbox', ['post_id'])
+    create_index('ix_publish_outbox_scheduled_post', 'publish_outbox', ['scheduled_post_id'])
+    create_index('ix_publish_outbox_status_next_attempt', 'publish_outbox', ['status', 'next_attempt_at'])
+    create_index('ix_publications_post_platform', 'publications', ['post_id', 'platform'])
+    create_index('ix_publications_status_updated', 'publications', ['status', 'updated_at'])
+    create_index('ix_publications_user_platform_status', 'publications', ['user_id', 'platform', 'status'])
+    create_index('ix_publications_user_status_published', 'publications', ['user_id', 'status', 'published_at'])
+
+    # Publication records of earlier deployments, from the outbox and from posts published before it
+    if 'publications' not in existing_tables and 'publish_outbox' in existing_tables:
+        op.execute("""
+            INSERT INTO publications
+                (user_id, post_id, scheduled_post_id, intent_id, platform, status, external_id,
+                 attempts, error, published_at, created_at, updated_at)
+            SELECT user_id, post_id, scheduled_post_id, id, platform,
+                   CASE status WHEN 'sent' THEN 'published' WHEN 'dead' THEN 'failed' ELSE 'pending' END,
+                   external_id, attempts, last_error, sent_at, created_at, updated_at
+            FROM publish_outbox
+        """)
+    if 'publications' not in existing_tables and 'posts' in existing_tables:
+        op.execute("""
+            INSERT INTO publications
+                (user_id, post_id, platform, status, attempts, published_at, created_at, updated_at)
+            SELECT p.user_id, p.id, p.platform, 'published', 1, p.posted_at,
+                   COALESCE(p.posted_at, p.created_at), COALESCE(p.posted_at, p.created_at)
+            FROM posts p
+            WHERE p.is_posted = TRUE AND p.platform IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM publications pub WHERE pub.post_id = p.id)
+        """)
+
+
+def downgrade():
+    # Indexes are dropped with their tables
+    op.drop_table('publications')
+    op.drop_table('publish_outbox')
+    op.drop_table('scheduled_posts')
+    op.drop_table('recurring_schedules')
+    op.drop_table('planner_idea_bands')
+    op.drop_table('media_assets')
+    op.drop_table('social_accounts')
+    op.drop_table('posts')
+    op.drop_table('post_usage')
+    op.drop_table('planner_ideas')
+    op.drop_table('users')
+    op.drop_table('scheduler_leases')
+    op.drop_table('rate_limit_buckets')
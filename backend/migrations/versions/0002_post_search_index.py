@@ -0,0 +1,105 @@
+"""post full-text search index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:05:12.481330
+
+Full-text index over title, post_theme and content of posts, kept in sync by
+the database itself so every write path (ORM, bulk inserts, raw SQL) updates
+it:
+
+- PostgreSQL: generated tsvector column search_vector with the german text
+  search configuration (stemming, stop words), weighted title A, theme B,
+  content C, and a GIN index. Only the first SEARCH_CONTENT_CHARS characters
+  of content are indexed, a tsvector is limited to 1 MB.
+- SQLite: FTS5 table posts_fts over the posts table (external content),
+  maintained by triggers. FTS5 has no German stemmer; the search service
+  uses prefix queries instead.
+
+Both are read by src/services/post_search_service.py and are not part of the
+SQLAlchemy models.
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+SEARCH_CONTENT_CHARS = 100000
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        # Adding a stored generated column rewrites the table; migrations run before the release goes live
+        op.execute(f"""
+            ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('german'::regconfig, coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('german'::regconfig, coalesce(post_theme, '')), 'B') ||
+                setweight(to_tsvector('german'::regconfig, left(coalesce(content, ''), {SEARCH_CONTENT_CHARS})), 'C')
+            ) STORED
+        """)
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_posts_search")
+            op.execute("CREATE INDEX CONCURRENTLY ix_posts_search ON posts USING gin (search_vector)")
+
+    elif bind.dialect.name == 'sqlite':
+        try:
+            op.execute("""
+                CREATE VIRTUAL TABLE posts_fts USING fts5(
+                    title, post_theme, content,
+                    content='posts', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sa.exc.OperationalError as e:
+            # SQLite builds without FTS5; the search service falls back to LIKE
+            logger.warning(f"FTS5 not available, post search index not created: {e}")
+            return
+
+        op.execute("""
+            CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN
+                INSERT INTO posts_fts (rowid, title, post_theme, content)
+                VALUES (new.id, new.title, new.post_theme, new.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, title, post_theme, content)
+                VALUES ('delete', old.id, old.title, old.post_theme, old.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, post_theme, content ON posts BEGIN
+                INSERT INTO posts_fts (posts_fts, rowid, title, post_theme, content)
+                VALUES ('delete', old.id, old.title, old.post_theme, old.content);
+                INSERT INTO posts_fts (rowid, title, post_theme, content)
+                VALUES (new.id, new.title, new.post_theme, new.content);
+            END
+        """)
+        # Index the posts that already exist
+        op.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_posts_search")
+        op.execute("ALTER TABLE posts DROP COLUMN IF EXISTS search_vector")
+
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_update")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
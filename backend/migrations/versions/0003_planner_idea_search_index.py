@@ -0,0 +1,94 @@
+"""planner idea search index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:21:37.905114
+
+Token index over planner_ideas.search_text (normalized title and hook), so
+searching the idea library reads the matching ideas only instead of
+evaluating LIKE '%term%' on every idea:
+
+- PostgreSQL: GIN index on to_tsvector('simple', search_text). The simple
+  configuration only splits and lowercases, like normalize_text, without
+  stemming or stop words; search terms are matched as prefixes.
+- SQLite: FTS5 table planner_ideas_fts over planner_ideas (external
+  content), maintained by triggers.
+
+Both are read by IdeaLibraryService.search_ideas and are not part of the
+SQLAlchemy models.
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        # Must match the expression IdeaLibraryService filters on, or the index is not used
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_planner_ideas_search")
+            op.execute(
+                "CREATE INDEX CONCURRENTLY ix_planner_ideas_search ON planner_ideas "
+                "USING gin (to_tsvector('simple'::regconfig, search_text))"
+            )
+
+    elif bind.dialect.name == 'sqlite':
+        try:
+            op.execute("""
+                CREATE VIRTUAL TABLE planner_ideas_fts USING fts5(
+                    search_text,
+                    content='planner_ideas', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sa.exc.OperationalError as e:
+            # SQLite builds without FTS5; the idea search falls back to LIKE
+            logger.warning(f"FTS5 not available, planner idea search index not created: {e}")
+            return
+
+        op.execute("""
+            CREATE TRIGGER planner_ideas_fts_insert AFTER INSERT ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (rowid, search_text) VALUES (new.id, new.search_text);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER planner_ideas_fts_delete AFTER DELETE ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (planner_ideas_fts, rowid, search_text)
+                VALUES ('delete', old.id, old.search_text);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER planner_ideas_fts_update AFTER UPDATE OF search_text ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (planner_ideas_fts, rowid, search_text)
+                VALUES ('delete', old.id, old.search_text);
+                INSERT INTO planner_ideas_fts (rowid, search_text) VALUES (new.id, new.search_text);
+            END
+        """)
+        # Index the ideas that already exist
+        op.execute("INSERT INTO planner_ideas_fts (planner_ideas_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_planner_ideas_search")
+
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS planner_ideas_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS planner_ideas_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS planner_ideas_fts_update")
+        op.execute("DROP TABLE IF EXISTS planner_ideas_fts")
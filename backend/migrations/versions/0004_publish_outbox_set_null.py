@@ -0,0 +1,66 @@
+"""publish outbox foreign keys on delete set null
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 16:42:08.317520
+
+publish_outbox.post_id and scheduled_post_id referenced posts and
+scheduled_posts without an ON DELETE action, so deleting a post that was
+published through the outbox failed with a foreign key violation. The intents
+are the delivery record and are kept; like publications, they lose the link.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+FOREIGN_KEYS = {
+    'post_id': 'posts',
+    'scheduled_post_id': 'scheduled_posts',
+}
+
+# SQLite reflects the constraints of 0001 without names
+SQLITE_NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _recreate_foreign_keys(ondelete):
+    bind = op.get_bind()
+
+    if bind.dialect.name == 'postgresql':
+        existing = {
+            fk['constrained_columns'][0]: fk['name']
+            for fk in sa.inspect(bind).get_foreign_keys('publish_outbox')
+            if len(fk['constrained_columns']) == 1
+        }
+        for column, table in FOREIGN_KEYS.items():
+            if column in existing:
+                op.drop_constraint(existing[column], 'publish_outbox', type_='foreignkey')
+            # NOT VALID skips the scan under the ACCESS EXCLUSIVE lock; VALIDATE only takes SHARE UPDATE EXCLUSIVE
+            name = f'publish_outbox_{column}_fkey'
+            action = f' ON DELETE {ondelete}' if ondelete else ''
+            op.execute(f"ALTER TABLE publish_outbox ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+                       f"REFERENCES {table} (id){action} NOT VALID")
+            op.execute(f"ALTER TABLE publish_outbox VALIDATE CONSTRAINT {name}")
+
+    elif bind.dialect.name == 'sqlite':
+        # SQLite cannot alter constraints; batch mode copies the table
+        with op.batch_alter_table('publish_outbox', recreate='always',
+                                  naming_convention=SQLITE_NAMING_CONVENTION) as batch_op:
+            for column, table in FOREIGN_KEYS.items():
+                name = f'fk_publish_outbox_{column}_{table}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, table, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('SET NULL')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
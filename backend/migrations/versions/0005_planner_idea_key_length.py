@@ -0,0 +1,63 @@
+"""planner idea key length
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 17:31:54.602118
+
+Idea keys used the first 8 hex digits of a uuid (32 bits), which collide
+once the library is large enough; planner_ideas.idea_key is unique across
+all users. New keys carry the full uuid hex ('idea_' + 32 characters).
+
+- PostgreSQL: widening a varchar does not rewrite the table.
+- SQLite: the table is copied (batch mode), which drops the triggers of the
+  search index of migration 0003; they are created again.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def _alter_idea_key(length, existing_length):
+    bind = op.get_bind()
+    has_fts = bind.dialect.name == 'sqlite' and 'planner_ideas_fts' in sa.inspect(bind).get_table_names()
+
+    with op.batch_alter_table('planner_ideas') as batch_op:
+        batch_op.alter_column('idea_key', type_=sa.String(length=length),
+                              existing_type=sa.String(length=existing_length), existing_nullable=False)
+
+    if has_fts:
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS planner_ideas_fts_insert AFTER INSERT ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (rowid, search_text) VALUES (new.id, new.search_text);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS planner_ideas_fts_delete AFTER DELETE ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (planner_ideas_fts, rowid, search_text)
+                VALUES ('delete', old.id, old.search_text);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS planner_ideas_fts_update AFTER UPDATE OF search_text ON planner_ideas BEGIN
+                INSERT INTO planner_ideas_fts (planner_ideas_fts, rowid, search_text)
+                VALUES ('delete', old.id, old.search_text);
+                INSERT INTO planner_ideas_fts (rowid, search_text) VALUES (new.id, new.search_text);
+            END
+        """)
+        op.execute("INSERT INTO planner_ideas_fts (planner_ideas_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    _alter_idea_key(40, 32)
+
+
+def downgrade():
+    # Fails on PostgreSQL while keys longer than 32 characters are stored
+    _alter_idea_key(32, 40)
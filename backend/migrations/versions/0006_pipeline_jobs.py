@@ -0,0 +1,46 @@
+"""pipeline jobs
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 18:12:40.571903
+
+Status of plan-to-schedule pipeline jobs, previously kept in the memory of
+the process running them, so polls reaching another worker got a 404.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pipeline_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('progress', sa.Text(), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('generated', sa.Integer(), nullable=False),
+    sa.Column('scheduled', sa.Integer(), nullable=False),
+    sa.Column('failed', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Text(), nullable=True),
+    sa.Column('scheduled_post_ids', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pipeline_jobs_user_created', 'pipeline_jobs', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_pipeline_jobs_user_created', table_name='pipeline_jobs')
+    op.drop_table('pipeline_jobs')
@@ -0,0 +1,29 @@
+"""social account refresh backoff
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 19:04:26.318455
+
+social_accounts.next_refresh_at: the background token refresher leaves an
+account alone until then after a failed refresh or one whose response had
+no expiry, instead of retrying it on every run of the refresh window.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('social_accounts', sa.Column('next_refresh_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('social_accounts') as batch_op:
+        batch_op.drop_column('next_refresh_at')
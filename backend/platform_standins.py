@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the social platform APIs.
+
+Serves the LinkedIn, Facebook, Instagram and Twitter endpoints that
+SocialMediaService calls, with configurable latency, 429s and failures, so
+the publish pipeline can be exercised under load without touching real
+accounts. Point the backend at it with PLATFORM_STANDIN_URL:
+
+    python platform_standins.py --port 5055 --latency-ms 150 --throttle-rate 0.02
+    PLATFORM_STANDIN_URL=http://localhost:5055 python src/main.py
+
+Behaviour can be changed while running:
+
+    curl -X POST localhost:5055/_standin/config -H 'Content-Type: application/json' \\
+         -d '{"error_rate": 0.1, "platforms": {"linkedin": {"latency_ms": 800}}}'
+    curl localhost:5055/_standin/stats
+"""
+
+import argparse
+import itertools
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from flask import Flask, jsonify, request
+
+DEFAULT_BEHAVIOUR = {
+    'latency_ms': 100,  # Mean response time
+    'jitter_ms': 50,  # Uniform +/- around the mean
+    'throttle_rate': 0.0,  # Share of requests answered with 429
+    'error_rate': 0.0,  # Share of requests answered with a 5xx
+    'quota': 0,  # Requests per token and window before 429s, 0 = unlimited
+    'window_seconds': 60,
+    'retry_after': 5  # Retry-After of random 429s
+}
+
+PLATFORMS = ('linkedin', 'facebook', 'instagram', 'twitter')
+
+def create_standin_app(behaviour=None, platform_behaviour=None):
+    """
+    Create the stand-in Flask app.
+
+    Args:
+        behaviour: Overrides of DEFAULT_BEHAVIOUR for all platforms
+        platform_behaviour: Per-platform overrides, e.g. {'linkedin': {'quota': 100}}
+    """
+    app = Flask(__name__)
+
+    lock = threading.Lock()
+    state = {
+        'behaviour': dict(DEFAULT_BEHAVIOUR, **(behaviour or {})),
+        'platforms': {platform: dict(overrides) for platform, overrides in (platform_behaviour or {}).items()},
+        'windows': {},  # (platform, token) -> [window start, requests]
+        'requests': defaultdict(int),  # 'platform endpoint status' -> count
+        'posts': defaultdict(int),
+        'uploaded_bytes': 0,
+        'started_at': time.time()
+    }
+    ids = itertools.count(1)
+
+    def behaviour_for(platform):
+        with lock:
+            return dict(state['behaviour'], **state['platforms'].get(platform, {}))
+
+    def access_token():
+        auth = request.headers.get('Authorization', '')
+        if auth.startswith('Bearer '):
+            return auth[7:]
+        return request.values.get('access_token') or request.values.get('fb_exchange_token')
+
+    def rate_limit_headers(platform, limit, remaining, reset_at):
+        if platform == 'facebook':
+            usage = int(100 * (limit - remaining) / limit) if limit else 0
+            return {'x-app-usage': f'{{"call_count": {usage}, "total_cputime": 0, "total_time": 0}}'}
+        if platform == 'twitter':
+            return {
+                'x-rate-limit-limit': str(limit),
+                'x-rate-limit-remaining': str(remaining),
+                'x-rate-limit-reset': str(int(reset_at))
+            }
+        return {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(max(0, int(reset_at - time.time())))
+        }
+
+    @app.before_request
+    def simulate():
+        """Apply latency, quota, throttling and failures before any platform endpoint."""
+        platform = request.path.strip('/').split('/', 1)[0]
+        if platform not in PLATFORMS:
+            return None
+        request.environ['standin.platform'] = platform
+        config = behaviour_for(platform)
+
+        delay = config['latency_ms'] + random.uniform(-config['jitter_ms'], config['jitter_ms'])
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        token = access_token()
+        if not token and 'oauth' not in request.path.lower():
+            # Only the OAuth token endpoints work without a token
+            return jsonify({'error': 'missing access token'}), 401
+
+        headers = {}
+        if config['quota'] and token:
+            now = time.time()
+            with lock:
+                window = state['windows'].get((platform, token))
+                if not window or now - window[0] >= config['window_seconds']:
+                    window = state['windows'][(platform, token)] = [now, 0]
+                window[1] += 1
+                used = window[1]
+            reset_at = window[0] + config['window_seconds']
+            remaining = max(0, config['quota'] - used)
+            headers = rate_limit_headers(platform, config['quota'], remaining, reset_at)
+            if used > config['quota']:
+                headers['Retry-After'] = str(max(1, int(reset_at - now)))
+                return jsonify({'error': 'quota exceeded'}), 429, headers
+        request.environ['standin.headers'] = headers
+
+        roll = random.random()
+        if roll < config['throttle_rate']:
+            return jsonify({'error': 'rate limited'}), 429, {'Retry-After': str(config['retry_after'])}
+        if roll < config['throttle_rate'] + config['error_rate']:
+            return jsonify({'error': 'simulated failure'}), random.choice([500, 502, 503])
+        return None
+
+    @app.after_request
+    def record(response):
+        platform = request.environ.get('standin.platform')
+        if platform:
+            for name, value in request.environ.get('standin.headers', {}).items():
+                response.headers.setdefault(name, value)
+            endpoint = request.url_rule.rule if request.url_rule else request.path
+            with lock:
+                state['requests'][f'{request.method} {endpoint} {response.status_code}'] += 1
+                if response.status_code in (200, 201) and request.environ.get('standin.published'):
+                    state['posts'][platform] += 1
+        return response
+
+    def published(body, status=200):
+        request.environ['standin.published'] = True
+        return jsonify(body), status
+
+    def token_response(refresh_token=True):
+        body = {'access_token': f'standin-{uuid.uuid4().hex}', 'token_type': 'bearer', 'expires_in': 5184000}
+        if refresh_token:
+            body['refresh_token'] = f'standin-refresh-{uuid.uuid4().hex}'
+        return jsonify(body)
+
+    # LinkedIn
+    @app.route('/linkedin/oauth/v2/accessToken', methods=['POST'])
+    def linkedin_token():
+        return token_response()
+
+    @app.route('/linkedin/v2/userinfo')
+    def linkedin_userinfo():
+        return jsonify({'sub': f'standin{next(ids)}', 'given_name': 'Stand', 'family_name': 'In',
+                        'name': 'Stand In', 'email': 'standin@example.com'})
+
+    @app.route('/linkedin/v2/assets', methods=['POST'])
+    def linkedin_register_upload():
+        asset_id = next(ids)
+        return jsonify({'value': {
+            'asset': f'urn:li:digitalmediaAsset:{asset_id}',
+            'uploadMechanism': {
+                'com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest': {
+                    'uploadUrl': f'{request.host_url}linkedin/upload/{asset_id}'
+                }
+            }
+        }})
+
+    @app.route('/linkedin/upload/<int:asset_id>', methods=['PUT'])
+    def linkedin_upload(asset_id):
+        size = 0
+        while True:
+            chunk = request.stream.read(64 * 1024)
+            if not chunk:
+                break
+            size += len(chunk)
+        with lock:
+            state['uploaded_bytes'] += size
+        return '', 201
+
+    @app.route('/linkedin/v2/ugcPosts', methods=['POST'])
+    def linkedin_post():
+        post_id = f'urn:li:share:{next(ids)}'
+        response, status = published({'id': post_id}, 201)
+        response.headers['X-RestLi-Id'] = post_id
+        return response, status
+
+    # Facebook
+    @app.route('/facebook/v18.0/oauth/access_token')
+    def facebook_token():
+        return token_response(refresh_token=False)
+
+    @app.route('/facebook/v18.0/me')
+    def facebook_me():
+        return jsonify({'id': str(next(ids)), 'name': 'Stand In'})
+
+    @app.route('/facebook/v18.0/<account_id>/feed', methods=['POST'])
+    def facebook_feed(account_id):
+        return published({'id': f'{account_id}_{next(ids)}'})
+
+    @app.route('/facebook/v18.0/<account_id>/photos', methods=['POST'])
+    def facebook_photos(account_id):
+        photo_id = next(ids)
+        if request.form.get('published') == 'false':
+            # Unpublished photo, attached to a feed post later
+            return jsonify({'id': str(photo_id)})
+        return published({'id': str(photo_id), 'post_id': f'{account_id}_{photo_id}'})
+
+    # Instagram
+    @app.route('/instagram/refresh_access_token')
+    def instagram_token():
+        return token_response(refresh_token=False)
+
+    @app.route('/instagram/v21.0/<account_id>/media', methods=['POST'])
+    def instagram_container(account_id):
+        if not request.values.get('image_url'):
+            return jsonify({'error': {'message': 'image_url is required', 'code': 100}}), 400
+        return jsonify({'id': str(next(ids))})
+
+    @app.route('/instagram/v21.0/<account_id>/media_publish', methods=['POST'])
+    def instagram_publish(account_id):
+        return published({'id': str(next(ids))})
+
+    # Twitter
+    @app.route('/twitter/2/oauth2/token', methods=['POST'])
+    def twitter_token():
+        return token_response()
+
+    @app.route('/twitter/2/media/upload', methods=['POST'])
+    def twitter_media():
+        media = request.files.get('media')
+        with lock:
+            state['uploaded_bytes'] += len(media.read()) if media else 0
+        return jsonify({'data': {'id': str(next(ids))}})
+
+    @app.route('/twitter/2/tweets', methods=['POST'])
+    def twitter_tweet():
+        data = request.get_json(silent=True) or {}
+        return published({'data': {'id': str(next(ids)), 'text': data.get('text', '')}}, 201)
+
+    # Control endpoints
+    @app.route('/_standin/image.png')
+    def standin_image():
+        """Image to publish: ?size= bytes, same ?seed= gives the same content."""
+        size = min(request.args.get('size', 100 * 1024, type=int), 20 * 1024 * 1024)
+        seed = request.args.get('seed', 0, type=int)
+        return random.Random(seed).randbytes(size), 200, {'Content-Type': 'image/png'}
+
+    @app.route('/_standin/config', methods=['GET', 'POST'])
+    def standin_config():
+        if request.method == 'POST':
+            data = request.get_json() or {}
+            with lock:
+                state['behaviour'].update({key: value for key, value in data.items() if key in DEFAULT_BEHAVIOUR})
+                for platform, overrides in (data.get('platforms') or {}).items():
+                    state['platforms'].setdefault(platform, {}).update(overrides)
+        with lock:
+            return jsonify({'behaviour': state['behaviour'], 'platforms': state['platforms']})
+
+    @app.route('/_standin/stats', methods=['GET', 'DELETE'])
+    def standin_stats():
+        with lock:
+            if request.method == 'DELETE':
+                state['requests'].clear()
+                state['posts'].clear()
+                state['windows'].clear()
+                state['uploaded_bytes'] = 0
+                state['started_at'] = time.time()
+            return jsonify({
+                'requests': dict(state['requests']),
+                'posts': dict(state['posts']),
+                'uploaded_bytes': state['uploaded_bytes'],
+                'uptime_seconds': round(time.time() - state['started_at'], 3)
+            })
+
+    return app
+
+def start_standin_server(host='127.0.0.1', port=0, **kwargs):
+    """
+    Run the stand-ins in a background thread.
+
+    Returns:
+        (server, base URL); call server.shutdown() to stop it
+    """
+    import logging
+    from werkzeug.serving import make_server
+
+    # Keep the access log of every stand-in request out of the load test output
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server(host, port, create_standin_app(**kwargs), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-ins for the social platform APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_BEHAVIOUR['latency_ms'])
+    parser.add_argument('--jitter-ms', type=float, default=DEFAULT_BEHAVIOUR['jitter_ms'])
+    parser.add_argument('--throttle-rate', type=float, default=DEFAULT_BEHAVIOUR['throttle_rate'])
+    parser.add_argument('--error-rate', type=float, default=DEFAULT_BEHAVIOUR['error_rate'])
+    parser.add_argument('--quota', type=int, default=DEFAULT_BEHAVIOUR['quota'])
+    parser.add_argument('--window-seconds', type=int, default=DEFAULT_BEHAVIOUR['window_seconds'])
+    args = parser.parse_args()
+
+    app = create_standin_app(behaviour={
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'throttle_rate': args.throttle_rate,
+        'error_rate': args.error_rate,
+        'quota': args.quota,
+        'window_seconds': args.window_seconds
+    })
+    print(f"🧪 Platform stand-ins on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}ms, 429 rate {args.throttle_rate}, error rate {args.error_rate})")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Release command: applies pending database migrations before a release goes live.
+
+Runs once per deploy, as the `release` process type of the Procfile or as the
+pre-deploy command of the hosting platform (on Render: Settings, Pre-Deploy
+Command `python release.py`):
+
+    python release.py
+
+Web and scheduler workers no longer change the schema; they only check at
+startup that the database is at the revision the code expects. Exits with a
+non-zero status if the migrations fail, which stops the deploy.
+"""
+
+import logging
+import os
+import sys
+
+def main():
+    # Only migrate; no background threads and no startup upgrade in this process
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+    os.environ['TOKEN_REFRESH_ENABLED'] = 'false'
+    os.environ['SCHEMA_AUTO_UPGRADE'] = 'false'
+
+    from src.main import app
+    from src.database_migration import upgrade_database
+
+    logger = logging.getLogger('release')
+
+    with app.app_context():
+        try:
+            status = upgrade_database()
+        except Exception as e:
+            logger.error(f"Database migration failed: {e}")
+            return 1
+
+    if not status['up_to_date']:
+        logger.error(f"Database schema is at {status['current']} after the migration, expected {status['head']}")
+        return 1
+    logger.info(f"Database schema at revision {', '.join(status['head'])} ({status['database_type']})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Standalone scheduler process: publishes scheduled posts when they are due.
+
+Runs the background scheduler outside of the web workers, e.g. as the
+`worker` process type of the Procfile:
+
+    python scheduler_worker.py
+
+Several workers (and web workers with SCHEDULER_ENABLED=true) may run at the
+same time; they elect a leader over the 'scheduler' lease and only the
+leader claims and publishes posts. The others take over within
+SCHEDULER_LEADER_LEASE_SECONDS if the leader dies. The OAuth token refresher
+(TOKEN_REFRESH_ENABLED) runs the same way under the 'token_refresh' lease.
+On SIGTERM/SIGINT the worker stops and releases its leases, so a standby
+takes over right away.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+
+def main():
+    # The web app must not start its own scheduler here; it is started below, after the schema check
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+
+    from src.main import app
+    from src.database_migration import check_schema_version
+    from src.services.background_scheduler import start_background_scheduler, stop_background_scheduler
+    from src.services.token_refresh_service import stop_token_refresher
+
+    logger = logging.getLogger('scheduler_worker')
+
+    # Migrations are applied by the release command; exit so the process manager retries after it ran
+    if not check_schema_version(app):
+        logger.error("Database schema is not up to date, scheduler worker not started")
+        return 1
+
+    stopping = threading.Event()
+
+    def handle_signal(signum, frame):
+        logger.info(f"Received signal {signum}, stopping scheduler worker")
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    scheduler = start_background_scheduler(app)
+    logger.info(f"Scheduler worker {scheduler.leader_election.holder} running")
+
+    while not stopping.wait(30):
+        if not scheduler.thread.is_alive():
+            logger.error("Scheduler thread died, exiting")
+            return 1
+
+    stop_background_scheduler()
+    stop_token_refresher()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -36,10 +36,128 @@ class Config:
     TWITTER_CLIENT_SECRET = os.environ.get('TWITTER_CLIENT_SECRET')
     INSTAGRAM_CLIENT_ID = os.environ.get('INSTAGRAM_CLIENT_ID')
     INSTAGRAM_CLIENT_SECRET = os.environ.get('INSTAGRAM_CLIENT_SECRET')
+
+    # Platform API Endpoints
+    LINKEDIN_API_URL = os.environ.get('LINKEDIN_API_URL', 'https://api.linkedin.com')
+    LINKEDIN_OAUTH_URL = os.environ.get('LINKEDIN_OAUTH_URL', 'https://www.linkedin.com/oauth/v2')
+    FACEBOOK_GRAPH_URL = os.environ.get('FACEBOOK_GRAPH_URL', 'https://graph.facebook.com/v18.0')
+    INSTAGRAM_GRAPH_URL = os.environ.get('INSTAGRAM_GRAPH_URL', 'https://graph.instagram.com')
+    TWITTER_API_URL = os.environ.get('TWITTER_API_URL', 'https://api.twitter.com')
+    # Platforms that really publish over HTTP; the others return a simulated result
+    HTTP_PUBLISH_PLATFORMS = os.environ.get('HTTP_PUBLISH_PLATFORMS', 'linkedin').split(',')
+    # Base URL of a running platform_standins.py server. If set, all platform API
+    # endpoints point at the local stand-ins and every platform publishes over HTTP.
+    PLATFORM_STANDIN_URL = os.environ.get('PLATFORM_STANDIN_URL')
+
+    # Outgoing HTTP Settings (shared per-platform sessions)
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', '30'))
+    HTTP_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', '10'))
+    HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', '3'))
+    
+    # Publishing Settings
+    # Maximum number of platforms a single post is published to in parallel
+    PUBLISH_MAX_WORKERS = int(os.environ.get('PUBLISH_MAX_WORKERS', '4'))
+    # Images up to this size are buffered in memory before upload, larger ones spill to disk
+    IMAGE_SPOOL_MAX_BYTES = int(os.environ.get('IMAGE_SPOOL_MAX_BYTES', str(1024 * 1024)))
+    
+    # Bulk publishing: publishes per request, and per delivered (and streamed) chunk
+    BULK_PUBLISH_MAX_ITEMS = int(os.environ.get('BULK_PUBLISH_MAX_ITEMS', '500'))
+    BULK_PUBLISH_BATCH_SIZE = int(os.environ.get('BULK_PUBLISH_BATCH_SIZE', '50'))
+    
+    # Async publishing engine: platform calls of a dispatch batch run concurrently on one event loop per process
+    ASYNC_PUBLISHING_ENABLED = os.environ.get('ASYNC_PUBLISHING_ENABLED', 'true').lower() == 'true'
+    ASYNC_PUBLISH_CONCURRENCY = int(os.environ.get('ASYNC_PUBLISH_CONCURRENCY', '200'))  # Publishes in flight
+    ASYNC_HTTP_POOL_SIZE = int(os.environ.get('ASYNC_HTTP_POOL_SIZE', '100'))  # Open connections
+    ASYNC_HTTP_LIMIT_PER_HOST = int(os.environ.get('ASYNC_HTTP_LIMIT_PER_HOST', '20'))
+    
+    # Background scheduler: sleeps until the next due post; picks up changes of other processes every
+    # sync interval and rebuilds its queue of posts due within the horizon every reconcile interval
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_SYNC_INTERVAL = int(os.environ.get('SCHEDULER_SYNC_INTERVAL', '15'))
+    SCHEDULER_RECONCILE_INTERVAL = int(os.environ.get('SCHEDULER_RECONCILE_INTERVAL', '300'))
+    SCHEDULER_HORIZON_MINUTES = int(os.environ.get('SCHEDULER_HORIZON_MINUTES', '60'))
+    # Due scheduled posts are claimed in batches under a lease; a worker that dies loses its claim when the lease expires
+    SCHEDULER_CLAIM_BATCH_SIZE = int(os.environ.get('SCHEDULER_CLAIM_BATCH_SIZE', '100'))
+    SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', '120'))
+    # Outbox dispatchers running side by side per scheduler run, and how long a run keeps draining due batches
+    SCHEDULER_DISPATCH_CONCURRENCY = int(os.environ.get('SCHEDULER_DISPATCH_CONCURRENCY', '2'))
+    SCHEDULER_DRAIN_SECONDS = int(os.environ.get('SCHEDULER_DRAIN_SECONDS', '20'))
+    # Maximum number of posts in one bulk scheduling request
+    SCHEDULER_BULK_MAX_ITEMS = int(os.environ.get('SCHEDULER_BULK_MAX_ITEMS', '500'))
+    # Scheduled posts should go out within this many seconds of their time; exceeding it raises metric alerts
+    SCHEDULER_LAG_SLO_SECONDS = int(os.environ.get('SCHEDULER_LAG_SLO_SECONDS', '60'))
+    # Bearer token for the /metrics endpoint; the endpoint is disabled without one
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Only the process holding the scheduler lease is active; standbys take over once it is not renewed for this long
+    SCHEDULER_LEADER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEADER_LEASE_SECONDS', '60'))
+    
+    # Publish warm-up: tokens are refreshed and images uploaded this many minutes before a scheduled post is due
+    PUBLISH_WARMUP_ENABLED = os.environ.get('PUBLISH_WARMUP_ENABLED', 'true').lower() == 'true'
+    PUBLISH_WARMUP_MINUTES = int(os.environ.get('PUBLISH_WARMUP_MINUTES', '15'))
+    PUBLISH_WARMUP_BATCH_SIZE = int(os.environ.get('PUBLISH_WARMUP_BATCH_SIZE', '50'))
+    PUBLISH_WARMUP_MAX_WORKERS = int(os.environ.get('PUBLISH_WARMUP_MAX_WORKERS', '4'))
+    
+    # Recurring schedules: occurrences exist as scheduled posts only this many days ahead
+    RECURRING_WINDOW_DAYS = int(os.environ.get('RECURRING_WINDOW_DAYS', '14'))
+    RECURRING_MAX_OCCURRENCES = int(os.environ.get('RECURRING_MAX_OCCURRENCES', '100'))  # Per series and run
+    RECURRING_BATCH_SIZE = int(os.environ.get('RECURRING_BATCH_SIZE', '100'))  # Series extended per run
+    
+    # Publish Outbox Settings
+    OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '50'))  # Intents claimed per dispatch
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '5'))  # Attempts before dead-lettering
+    OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', '300'))
+    OUTBOX_RETRY_BASE_SECONDS = int(os.environ.get('OUTBOX_RETRY_BASE_SECONDS', '30'))
+    OUTBOX_RETRY_MAX_SECONDS = int(os.environ.get('OUTBOX_RETRY_MAX_SECONDS', '3600'))
+    
+    # Scheduled posts whose publish intent was dead-lettered: total attempts and backoff per error class.
+    # 'auth' (revoked token, no account), 'rejected' (content refused) and 'unknown_outcome' always fail fast.
+    SCHEDULED_POST_RETRY_POLICY = {
+        'server_error': {'max_attempts': 4, 'base_seconds': 300, 'max_seconds': 21600},
+        'network': {'max_attempts': 4, 'base_seconds': 300, 'max_seconds': 21600},
+        'rate_limited': {'max_attempts': 6, 'base_seconds': 900, 'max_seconds': 21600}
+    }
+    
+    # Publish rate limits per platform: tokens per second and burst, for the platform
+    # (all accounts together, shared by all workers) and for each single account
+    RATE_LIMITS = {
+        'linkedin': {'platform_rate': 2.0, 'platform_burst': 10, 'account_rate': 0.1, 'account_burst': 3},
+        'facebook': {'platform_rate': 5.0, 'platform_burst': 20, 'account_rate': 0.2, 'account_burst': 5},
+        'instagram': {'platform_rate': 1.0, 'platform_burst': 5, 'account_rate': 0.05, 'account_burst': 2},
+        'twitter': {'platform_rate': 1.0, 'platform_burst': 5, 'account_rate': 0.1, 'account_burst': 3}
+    }
+    
+    # OAuth Token Refresh Settings
+    TOKEN_REFRESH_ENABLED = os.environ.get('TOKEN_REFRESH_ENABLED', 'true').lower() == 'true'
+    TOKEN_REFRESH_INTERVAL = int(os.environ.get('TOKEN_REFRESH_INTERVAL', '300'))  # Seconds between scans
+    TOKEN_REFRESH_WINDOW_MINUTES = int(os.environ.get('TOKEN_REFRESH_WINDOW_MINUTES', '1440'))  # Refresh tokens expiring within this window
+    TOKEN_REFRESH_BATCH_SIZE = int(os.environ.get('TOKEN_REFRESH_BATCH_SIZE', '100'))
+    TOKEN_REFRESH_RETRY_MINUTES = int(os.environ.get('TOKEN_REFRESH_RETRY_MINUTES', '60'))  # Wait after a failed refresh or one without expiry
+    # Only the holder of this lease refreshes; it must outlast one batch, a standby takes over after it
+    TOKEN_REFRESH_LEASE_SECONDS = int(os.environ.get('TOKEN_REFRESH_LEASE_SECONDS', '600'))
+    TOKEN_REFRESH_CONCURRENCY = {
+        'linkedin': int(os.environ.get('TOKEN_REFRESH_CONCURRENCY_LINKEDIN', '4')),
+        'facebook': int(os.environ.get('TOKEN_REFRESH_CONCURRENCY_FACEBOOK', '4')),
+        'instagram': int(os.environ.get('TOKEN_REFRESH_CONCURRENCY_INSTAGRAM', '2')),
+        'twitter': int(os.environ.get('TOKEN_REFRESH_CONCURRENCY_TWITTER', '2'))
+    }
     
     # CORS Configuration - Allow all frontend URLs
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,https://social-media-post-generator-frontend.onrender.com,https://mjrlibdb.manus.space,https://hcnsdkkl.manus.space,https://vmxwerbz.manus.space').split(',')
     
+    # Content Planner Settings
+    # Estimated Jaccard similarity at which a new idea counts as a duplicate of a stored one
+    PLANNER_DUPLICATE_THRESHOLD = float(os.environ.get('PLANNER_DUPLICATE_THRESHOLD', '0.7'))
+    # Plan-to-schedule pipeline: ideas per transaction and parallel OpenAI requests
+    PIPELINE_BATCH_SIZE = int(os.environ.get('PIPELINE_BATCH_SIZE', '5'))
+    PIPELINE_MAX_WORKERS = int(os.environ.get('PIPELINE_MAX_WORKERS', '4'))
+    # A running pipeline job without progress for this long is reported as interrupted
+    PIPELINE_STALE_SECONDS = int(os.environ.get('PIPELINE_STALE_SECONDS', '900'))
+    
+    # Database schema: migrations run out of band (python release.py); at startup the revision is only compared.
+    # With auto-upgrade pending migrations are applied at startup instead (default in development)
+    SCHEMA_AUTO_UPGRADE = os.environ.get('SCHEMA_AUTO_UPGRADE', 'false').lower() == 'true'
+    
     # App Settings
     APP_NAME = os.environ.get('APP_NAME', 'Social Media Post Generator')
     APP_VERSION = os.environ.get('APP_VERSION', '1.0.0')
@@ -57,6 +175,7 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = Config.get_database_uri() or 'sqlite:///app.db'
+    SCHEMA_AUTO_UPGRADE = os.environ.get('SCHEMA_AUTO_UPGRADE', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -68,6 +187,9 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TOKEN_REFRESH_ENABLED = False
+    SCHEDULER_ENABLED = False
+    SCHEMA_AUTO_UPGRADE = True
 
 # Configuration dictionary
 config = {
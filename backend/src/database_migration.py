@@ -1,243 +1,114 @@
-#!/usr/bin/env python3
 """
-Database Migration Script for Social Media Post Generator
-Adds subscription field to users table - Pure SQLAlchemy version
+Database schema migrations.
+
+The schema is versioned with Alembic (Flask-Migrate) in backend/migrations.
+Migrations run out of band, before a new release serves traffic:
+
+    python release.py                    # release / pre-deploy command
+    flask --app src.main db upgrade      # the same through the Flask CLI
+
+At startup the app only compares the database's revision with the head of
+the migrations (check_schema_version), which costs a single query.
 """
 
+import logging
 import os
-import sys
-from sqlalchemy import create_engine, text, inspect
+from functools import lru_cache
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
-def get_database_url():
-    """Get database URL from environment variables."""
-    database_url = os.getenv('DATABASE_URL')
-    if not database_url:
-        # Fallback to local SQLite for development
-        database_url = 'sqlite:///social_media_generator.db'
-    
-    # Handle PostgreSQL URL format for SQLAlchemy 2.0+
-    if database_url.startswith('postgres://'):
-        database_url = database_url.replace('postgres://', 'postgresql://', 1)
-    
-    return database_url
-
-def check_table_exists(engine, table_name):
-    """Check if a table exists."""
-    try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        return table_name in tables
-    except Exception as e:
-        print(f"Error checking table existence: {e}")
-        return False
-
-def check_column_exists(engine, table_name, column_name):
-    """Check if a column exists in a table."""
-    try:
-        if not check_table_exists(engine, table_name):
-            print(f"Table {table_name} does not exist")
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Key of the PostgreSQL advisory lock that serializes concurrent upgrades
+UPGRADE_LOCK_KEY = 72350611
+
+@lru_cache(maxsize=1)
+def get_head_revisions():
+    """Head revision(s) of the migrations shipped with the code."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS_DIRECTORY)
+    return tuple(sorted(ScriptDirectory.from_config(config).get_heads()))
+
+def get_current_revisions(engine):
+    """Revision(s) the database is at; empty if it was never migrated."""
+    with engine.connect() as conn:
+        try:
+            return tuple(sorted(conn.execute(text("SELECT version_num FROM alembic_version")).scalars().all()))
+        except SQLAlchemyError:
+            return ()
+
+def get_schema_status():
+    """
+    Compare the database with the migrations.
+
+    Must be called inside an application context.
+    """
+    from src.models import db
+
+    current = get_current_revisions(db.engine)
+    head = get_head_revisions()
+    return {
+        'current': list(current),
+        'head': list(head),
+        'up_to_date': current == head,
+        'database_type': db.engine.dialect.name
+    }
+
+def upgrade_database():
+    """
+    Apply all pending migrations.
+
+    Must be called inside an application context. On PostgreSQL concurrent
+    callers wait for each other on an advisory lock, so the second one finds
+    the schema up to date instead of racing on the same DDL.
+
+    Returns:
+        Schema status after the upgrade
+    """
+    from flask_migrate import upgrade
+    from src.models import db
+
+    if db.engine.dialect.name != 'postgresql':
+        upgrade(directory=MIGRATIONS_DIRECTORY)
+        return get_schema_status()
+
+    with db.engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {'key': UPGRADE_LOCK_KEY})
+        try:
+            upgrade(directory=MIGRATIONS_DIRECTORY)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': UPGRADE_LOCK_KEY})
+            lock_conn.commit()
+    return get_schema_status()
+
+def check_schema_version(app):
+    """
+    Check once at startup whether the database schema matches the code.
+
+    With SCHEMA_AUTO_UPGRADE (the default in development) pending migrations
+    are applied instead.
+
+    Returns:
+        True if the schema is up to date
+    """
+    with app.app_context():
+        try:
+            status = get_schema_status()
+            if not status['up_to_date'] and app.config.get('SCHEMA_AUTO_UPGRADE'):
+                logger.info(f"Upgrading database schema from {status['current'] or 'empty'} to {status['head']}")
+                status = upgrade_database()
+        except Exception as e:
+            logger.error(f"Could not check the database schema version: {e}")
             return False
-            
-        inspector = inspect(engine)
-        columns = inspector.get_columns(table_name)
-        return any(col['name'] == column_name for col in columns)
-    except Exception as e:
-        print(f"Error checking column existence: {e}")
-        return False
-
-def add_subscription_column(engine):
-    """Add subscription column to users table."""
-    try:
-        # Check if users table exists
-        if not check_table_exists(engine, 'users'):
-            print("⚠️  Users table does not exist yet - will be created by Flask app")
-            return True
-        
-        # Check if subscription column already exists
-        if check_column_exists(engine, 'users', 'subscription'):
-            print("✅ Subscription column already exists in users table")
-            return True
-        
-        print("🔄 Adding subscription column to users table...")
-        
-        # Add subscription column with default value 'free'
-        with engine.connect() as conn:
-            # Use raw SQL that works with both PostgreSQL and SQLite
-            try:
-                # Try PostgreSQL syntax first
-                conn.execute(text("""
-                    ALTER TABLE users 
-                    ADD COLUMN subscription VARCHAR(20) DEFAULT 'free' NOT NULL
-                """))
-                conn.commit()
-                print("✅ Added subscription column (PostgreSQL)")
-            except Exception as e:
-                # If PostgreSQL syntax fails, try SQLite approach
-                print(f"PostgreSQL syntax failed: {e}")
-                print("Trying SQLite approach...")
-                conn.rollback()
-                
-                # For SQLite, we need to recreate the table
-                conn.execute(text("""
-                    CREATE TABLE users_new (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username VARCHAR(80) UNIQUE NOT NULL,
-                        email VARCHAR(120) UNIQUE NOT NULL,
-                        password_hash VARCHAR(255) NOT NULL,
-                        role VARCHAR(20) DEFAULT 'user' NOT NULL,
-                        subscription VARCHAR(20) DEFAULT 'free' NOT NULL,
-                        is_active BOOLEAN DEFAULT 1 NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                
-                # Copy data from old table
-                conn.execute(text("""
-                    INSERT INTO users_new (id, username, email, password_hash, role, is_active, created_at, updated_at)
-                    SELECT id, username, email, password_hash, role, is_active, created_at, updated_at
-                    FROM users
-                """))
-                
-                # Drop old table and rename new one
-                conn.execute(text("DROP TABLE users"))
-                conn.execute(text("ALTER TABLE users_new RENAME TO users"))
-                conn.commit()
-                print("✅ Added subscription column (SQLite)")
-        
-        return True
-        
-    except SQLAlchemyError as e:
-        print(f"❌ Database error: {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return False
-
-def update_existing_users(engine):
-    """Update existing users to have default subscription."""
-    try:
-        # Check if users table exists
-        if not check_table_exists(engine, 'users'):
-            print("⚠️  Users table does not exist - skipping user updates")
-            return True
-        
-        print("🔄 Updating existing users with default subscription...")
-        
-        with engine.connect() as conn:
-            # Update users without subscription to 'free'
-            result = conn.execute(text("""
-                UPDATE users 
-                SET subscription = 'free' 
-                WHERE subscription IS NULL OR subscription = ''
-            """))
-            conn.commit()
-            
-            updated_count = result.rowcount
-            print(f"✅ Updated {updated_count} users with default subscription")
-        
-        return True
-        
-    except SQLAlchemyError as e:
-        print(f"❌ Database error updating users: {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error updating users: {e}")
-        return False
-
-def verify_migration(engine):
-    """Verify that the migration was successful."""
-    try:
-        # Check if users table exists
-        if not check_table_exists(engine, 'users'):
-            print("⚠️  Users table does not exist - migration will run after table creation")
-            return True
-        
-        print("🔍 Verifying migration...")
-        
-        with engine.connect() as conn:
-            # Check if subscription column exists and has data
-            result = conn.execute(text("""
-                SELECT COUNT(*) as total_users,
-                       COUNT(CASE WHEN subscription = 'free' THEN 1 END) as free_users,
-                       COUNT(CASE WHEN subscription IS NOT NULL THEN 1 END) as users_with_subscription
-                FROM users
-            """))
-            
-            row = result.fetchone()
-            total_users = row[0]
-            free_users = row[1]
-            users_with_subscription = row[2]
-            
-            print(f"📊 Migration verification:")
-            print(f"   Total users: {total_users}")
-            print(f"   Users with subscription: {users_with_subscription}")
-            print(f"   Free subscription users: {free_users}")
-            
-            if total_users == 0:
-                print("✅ No users yet - migration ready for when users are created")
-                return True
-            elif users_with_subscription == total_users:
-                print("✅ Migration successful - all users have subscription field")
-                return True
-            else:
-                print("❌ Migration incomplete - some users missing subscription")
-                return False
-        
-    except SQLAlchemyError as e:
-        print(f"❌ Database error during verification: {e}")
-        return False
-    except Exception as e:
-        print(f"❌ Unexpected error during verification: {e}")
-        return False
-
-def main():
-    """Main migration function."""
-    print("🚀 Starting database migration for subscription field...")
-    
-    # Get database URL
-    database_url = get_database_url()
-    print(f"📍 Database URL: {database_url.split('@')[0]}@***")
-    
-    try:
-        # Create engine with connection pooling disabled for migration
-        engine = create_engine(database_url, poolclass=None)
-        
-        # Test connection
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        print("✅ Database connection successful")
-        
-        # Run migration steps
-        success = True
-        
-        # Step 1: Add subscription column
-        if not add_subscription_column(engine):
-            success = False
-        
-        # Step 2: Update existing users
-        if success and not update_existing_users(engine):
-            success = False
-        
-        # Step 3: Verify migration
-        if success and not verify_migration(engine):
-            success = False
-        
-        if success:
-            print("🎉 Database migration completed successfully!")
-            return 0
-        else:
-            print("💥 Database migration failed!")
-            return 1
-            
-    except SQLAlchemyError as e:
-        print(f"❌ Database connection error: {e}")
-        return 1
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        return 1
-
-if __name__ == "__main__":
-    sys.exit(main())
 
+    if status['up_to_date']:
+        logger.info(f"Database schema at revision {', '.join(status['head'])}")
+    else:
+        logger.warning(f"Database schema is at {status['current'] or 'no revision'}, the code expects "
+                       f"{status['head']}; apply the migrations with `python release.py`")
+    return status['up_to_date']
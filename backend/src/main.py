@@ -29,126 +29,9 @@ from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 
 from src.config import config
+from src.database_migration import MIGRATIONS_DIRECTORY, check_schema_version, get_schema_status
 from src.models import db, User, Post, SocialAccount, PostUsage, ScheduledPost
 
-def run_database_migration():
-    """Run database migration on startup using SQLAlchemy."""
-    try:
-        print("🔄 Running database migration on startup...")
-        
-        # Import here to avoid circular imports
-        from sqlalchemy import inspect, text
-        
-        # Check if subscription column exists
-        inspector = inspect(db.engine)
-        
-        if 'users' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('users')]
-            if 'subscription' not in columns:
-                print("🔄 Adding subscription column to users table...")
-                try:
-                    with db.engine.connect() as conn:
-                        conn.execute(text("""
-                            ALTER TABLE users 
-                            ADD COLUMN subscription VARCHAR(20) DEFAULT 'free' NOT NULL
-                        """))
-                        conn.commit()
-                    print("✅ Added subscription column successfully")
-                    
-                    # Update existing users
-                    with db.engine.connect() as conn:
-                        result = conn.execute(text("""
-                            UPDATE users 
-                            SET subscription = 'free' 
-                            WHERE subscription IS NULL OR subscription = ''
-                        """))
-                        conn.commit()
-                        print(f"✅ Updated {result.rowcount} users with default subscription")
-                        
-                except Exception as e:
-                    print(f"⚠️  Could not add subscription column: {e}")
-                    print("   This is normal if the column already exists")
-            else:
-                print("✅ Subscription column already exists")
-        else:
-            print("⚠️  Users table will be created on first user registration")
-        
-        # Check and update posts table column types
-        if 'posts' in inspector.get_table_names():
-            print("🔄 Checking posts table column types...")
-            posts_columns = [col['name'] for col in inspector.get_columns('posts')]
-            
-            try:
-                with db.engine.connect() as conn:
-                    # Convert title from VARCHAR(200) to TEXT
-                    conn.execute(text("""
-                        ALTER TABLE posts 
-                        ALTER COLUMN title TYPE TEXT
-                    """))
-                    
-                    # Convert post_theme from VARCHAR(200) to TEXT  
-                    conn.execute(text("""
-                        ALTER TABLE posts 
-                        ALTER COLUMN post_theme TYPE TEXT
-                    """))
-                    
-                    # Add new columns for status and scheduling
-                    if 'status' not in posts_columns:
-                        print("🔄 Adding status column to posts table...")
-                        conn.execute(text("""
-                            ALTER TABLE posts 
-                            ADD COLUMN status VARCHAR(20) DEFAULT 'ungeplant' NOT NULL
-                        """))
-                        print("✅ Added status column")
-                    
-                    if 'scheduled_at' not in posts_columns:
-                        print("🔄 Adding scheduled_at column to posts table...")
-                        conn.execute(text("""
-                            ALTER TABLE posts 
-                            ADD COLUMN scheduled_at TIMESTAMP
-                        """))
-                        print("✅ Added scheduled_at column")
-                    
-                    if 'post_group_id' not in posts_columns:
-                        print("🔄 Adding post_group_id column to posts table...")
-                        conn.execute(text("""
-                            ALTER TABLE posts 
-                            ADD COLUMN post_group_id VARCHAR(50)
-                        """))
-                        print("✅ Added post_group_id column")
-                    
-                    if 'updated_at' not in posts_columns:
-                        print("🔄 Adding updated_at column to posts table...")
-                        conn.execute(text("""
-                            ALTER TABLE posts 
-                            ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        """))
-                        print("✅ Added updated_at column")
-                    
-                    conn.commit()
-                    print("✅ Updated posts table column types and added new fields")
-                    
-            except Exception as e:
-                print(f"⚠️  Could not update posts table columns: {e}")
-                print("   This is normal if columns are already correct type or exist")
-        else:
-            print("⚠️  Posts table will be created on first post creation")
-        
-        # Ensure all tables are created
-        print("🔄 Creating any missing database tables...")
-        try:
-            db.create_all()
-            print("✅ All database tables created/verified")
-        except Exception as e:
-            print(f"⚠️  Error creating tables: {e}")
-        
-        print("✅ Database migration completed successfully")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Error running database migration: {e}")
-        return False
-
 def create_app(config_name=None):
     """Application factory pattern."""
     if config_name is None:
@@ -159,7 +42,7 @@ def create_app(config_name=None):
     
     # Initialize extensions
     db.init_app(app)
-    migrate = Migrate(app, db)
+    migrate = Migrate(app, db, directory=MIGRATIONS_DIRECTORY, render_as_batch=True)
     
     # Stelle sicher, dass JWT das gleiche Secret wie die App verwendet
     app.config['JWT_SECRET_KEY'] = app.config['SECRET_KEY']
@@ -217,6 +100,7 @@ def create_app(config_name=None):
     from src.routes.migration import migration_bp
     from src.routes.subscription_api import subscription_api_bp
     from src.routes.planner import planner_bp
+    from src.routes.recurring_schedules import recurring_schedules_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(posts_bp, url_prefix='/api/posts')
@@ -233,11 +117,38 @@ def create_app(config_name=None):
     app.register_blueprint(migration_bp, url_prefix='/api/migration')
     app.register_blueprint(subscription_api_bp, url_prefix='/api/subscription')
     app.register_blueprint(planner_bp, url_prefix='/api/planner')
+    app.register_blueprint(recurring_schedules_bp, url_prefix='/api/scheduler/recurring')
     
     # Health check endpoint
     @app.route('/health')
     def health_check():
-        return jsonify({'status': 'healthy', 'message': 'Social Media Post Generator API is running'}), 200
+        try:
+            schema = get_schema_status()
+        except Exception as e:
+            schema = {'up_to_date': False, 'error': str(e)}
+        return jsonify({'status': 'healthy', 'message': 'Social Media Post Generator API is running',
+                        'schema': schema}), 200
+    
+    @app.route('/metrics')
+    def scheduler_metrics():
+        """Scheduler metrics in Prometheus text format (or JSON with ?format=json), for monitoring and alerting."""
+        import hmac
+        from src.services.scheduler_metrics_service import SchedulerMetricsService
+        
+        token = app.config.get('METRICS_TOKEN')
+        if not token:
+            return jsonify({'error': 'Metrics are disabled; set METRICS_TOKEN to enable them'}), 404
+        provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not hmac.compare_digest(provided, token):
+            return jsonify({'error': 'Invalid metrics token'}), 401
+        
+        try:
+            metrics = SchedulerMetricsService().get_metrics(window_minutes=max(1, request.args.get('window', 60, type=int)))
+        except Exception as e:
+            return jsonify({'error': f'Error collecting metrics: {str(e)}'}), 500
+        if request.args.get('format') == 'json':
+            return jsonify(metrics), 200
+        return SchedulerMetricsService.to_prometheus(metrics), 200, {'Content-Type': 'text/plain; version=0.0.4'}
     
     # Simple scheduler endpoints with lazy loading
     @app.route('/api/scheduler/scheduled', methods=['GET', 'OPTIONS'])
@@ -253,13 +164,8 @@ def create_app(config_name=None):
             
         try:
             from src.services.scheduler_service import SchedulerService
-            from src.services.background_scheduler import get_simple_scheduler
             
-            # Auto-check for posts to publish
-            simple_scheduler = get_simple_scheduler()
-            simple_scheduler.check_and_process()
-            
-            # Get scheduled posts
+            # Get scheduled posts (publishing is done by the scheduler process, not by reads)
             scheduler_service = SchedulerService()
             user_id = request.args.get('user_id', 1, type=int)
             status = request.args.get('status')
@@ -433,6 +339,39 @@ def create_app(config_name=None):
         except Exception as e:
             return jsonify({'error': f'Error scheduling existing post: {str(e)}'}), 500
 
+    @app.route('/api/scheduler/schedule-bulk', methods=['POST', 'OPTIONS'])
+    def schedule_posts_bulk():
+        """Schedule many posts in one request; returns a result per item."""
+        if request.method == 'OPTIONS':
+            # Handle CORS preflight request
+            response = jsonify({'status': 'ok'})
+            response.headers.add('Access-Control-Allow-Origin', '*')
+            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
+            response.headers.add('Access-Control-Allow-Methods', 'POST,OPTIONS')
+            return response
+        
+        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        verify_jwt_in_request()
+        try:
+            from src.services.scheduler_service import SchedulerService
+            
+            data = request.get_json() or {}
+            user_id = int(get_jwt_identity())
+            try:
+                result = SchedulerService().schedule_posts_bulk(
+                    user_id, data.get('items'), default_timezone=data.get('timezone', 'UTC')
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            status_code = 201 if result['scheduled'] else 400
+            if result['scheduled'] and result['failed']:
+                status_code = 207
+            return jsonify(result), status_code
+            
+        except Exception as e:
+            return jsonify({'error': f'Error scheduling posts: {str(e)}'}), 500
+
     @app.route('/api/scheduler/scheduled/<int:post_id>', methods=['DELETE', 'OPTIONS'])
     def cancel_scheduled_post(post_id):
         """Cancel a scheduled post with lazy service loading."""
@@ -463,16 +402,25 @@ def create_app(config_name=None):
         except Exception as e:
             return jsonify({'error': f'Error cancelling scheduled post: {str(e)}'}), 500
     
-    # Run database migration on first request
-    migration_done = False
+    # Schema changes run out of band (release.py); here the revision is only compared
+    schema_up_to_date = check_schema_version(app)
     
-    @app.before_request
-    def run_migration_once():
-        nonlocal migration_done
-        if not migration_done:
-            with app.app_context():
-                run_database_migration()
-                migration_done = True
+    # Renew OAuth tokens in the background so publishing never hits an expired token;
+    # every process starts a refresher, only the holder of the 'token_refresh' lease runs
+    if app.config.get('TOKEN_REFRESH_ENABLED'):
+        if schema_up_to_date:
+            from src.services.token_refresh_service import start_token_refresher
+            start_token_refresher(app)
+        else:
+            logging.getLogger(__name__).warning("Token refresher not started: database schema is not up to date")
+    
+    # Publish scheduled posts when they are due, independent of user traffic
+    if app.config.get('SCHEDULER_ENABLED'):
+        if schema_up_to_date:
+            from src.services.background_scheduler import start_background_scheduler
+            start_background_scheduler(app)
+        else:
+            logging.getLogger(__name__).warning("Background scheduler not started: database schema is not up to date")
     
     return app
 
@@ -3,7 +3,14 @@ from src.models.post import Post
 from src.models.social_account import SocialAccount
 from src.models.post_usage import PostUsage
 from src.models.scheduled_post import ScheduledPost
+from src.models.planner_idea import PlannerIdea, PlannerIdeaBand
+from src.models.media_asset import MediaAsset
+from src.models.publish_outbox import PublishIntent
+from src.models.rate_limit_bucket import RateLimitBucket
+from src.models.publication import Publication
+from src.models.scheduler_lease import SchedulerLease
+from src.models.recurring_schedule import RecurringSchedule
+from src.models.pipeline_job import PipelineJob
 
 # Export all models and db instance
-__all__ = ['db', 'User', 'Post', 'SocialAccount', 'PostUsage', 'ScheduledPost']
-
+__all__ = ['db', 'User', 'Post', 'SocialAccount', 'PostUsage', 'ScheduledPost', 'PlannerIdea', 'PlannerIdeaBand', 'MediaAsset', 'PublishIntent', 'RateLimitBucket', 'Publication', 'SchedulerLease', 'RecurringSchedule', 'PipelineJob']
@@ -0,0 +1,22 @@
+from src.models.user import db
+from datetime import datetime
+
+class MediaAsset(db.Model):
+    """Uploaded platform media, keyed by account and image content hash, so identical images are uploaded only once."""
+    __tablename__ = 'media_assets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    social_account_id = db.Column(db.Integer, db.ForeignKey('social_accounts.id', ondelete='CASCADE'), nullable=False)
+    platform = db.Column(db.String(20), nullable=False)  # 'linkedin'
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the image bytes
+    asset_urn = db.Column(db.String(255), nullable=False)  # e.g. 'urn:li:digitalmediaAsset:...'
+    size_bytes = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('social_account_id', 'content_hash', name='unique_account_media_hash'),
+    )
+
+    def __repr__(self):
+        return f'<MediaAsset {self.asset_urn} for SocialAccount {self.social_account_id}>'
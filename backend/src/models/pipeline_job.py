@@ -0,0 +1,72 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class PipelineJob(db.Model):
+    """
+    Progress of a plan-to-schedule pipeline run.
+
+    Stored in the database so any worker process can answer status polls and
+    the state survives a restart of the process running the job.
+    """
+    __tablename__ = 'pipeline_jobs'
+
+    id = db.Column(db.String(36), primary_key=True)  # Job id returned to the client (uuid4)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    status = db.Column(db.String(20), default='queued', nullable=False)  # 'queued', 'processing', 'completed', 'error'
+    progress = db.Column(db.Text, nullable=True)  # Human-readable progress message
+    message = db.Column(db.Text, nullable=True)  # Summary once finished
+    error = db.Column(db.Text, nullable=True)  # Error that ended the job
+
+    # Counters, updated in the same transaction as each batch of posts
+    total = db.Column(db.Integer, default=0, nullable=False)
+    generated = db.Column(db.Integer, default=0, nullable=False)
+    scheduled = db.Column(db.Integer, default=0, nullable=False)
+    failed = db.Column(db.Integer, default=0, nullable=False)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of per-post errors
+    scheduled_post_ids = db.Column(db.Text, nullable=True)  # JSON list
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_pipeline_jobs_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<PipelineJob {self.id}: {self.status}>'
+
+    @staticmethod
+    def _load_list(value):
+        try:
+            return json.loads(value) if value else []
+        except (TypeError, ValueError):
+            return []
+
+    def get_errors(self):
+        """Return the per-post errors as a list."""
+        return self._load_list(self.errors)
+
+    def get_scheduled_post_ids(self):
+        """Return the ids of the scheduled posts created so far."""
+        return self._load_list(self.scheduled_post_ids)
+
+    def to_dict(self):
+        """Convert pipeline job to the status dictionary returned to the client."""
+        return {
+            'job_id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'error': self.error,
+            'total': self.total,
+            'generated': self.generated,
+            'scheduled': self.scheduled,
+            'failed': self.failed,
+            'errors': self.get_errors(),
+            'scheduled_post_ids': self.get_scheduled_post_ids(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
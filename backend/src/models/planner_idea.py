@@ -0,0 +1,79 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class PlannerIdea(db.Model):
+    __tablename__ = 'planner_ideas'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    idea_key = db.Column(db.String(40), unique=True, nullable=False)  # Public id returned by the planner, 'idea_' + uuid4 hex
+
+    # Idea content
+    title = db.Column(db.Text, nullable=False)
+    hook = db.Column(db.Text, nullable=True)
+    persona = db.Column(db.String(200), nullable=True)
+    funnel = db.Column(db.String(50), nullable=True)  # 'Awareness', 'Consideration', 'Decision'
+    channels = db.Column(db.Text, nullable=True)  # JSON list, e.g. '["LI","FB"]'
+
+    # Where the idea came from
+    source_mode = db.Column(db.String(10), nullable=True)  # 'url' or 'idea'
+    source = db.Column(db.Text, nullable=True)  # URLs or the custom idea text
+
+    # Near-duplicate detection
+    search_text = db.Column(db.Text, nullable=False)  # Normalized title + hook
+    signature = db.Column(db.Text, nullable=False)  # MinHash signature as hex values
+
+    times_suggested = db.Column(db.Integer, default=1, nullable=False)  # How often the planner produced this idea
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_suggested_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    bands = db.relationship('PlannerIdeaBand', backref='idea', lazy=True, cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_planner_ideas_user_created', 'user_id', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f'<PlannerIdea {self.idea_key}: {self.title}>'
+
+    def get_channels(self):
+        """Return the channels as a list."""
+        try:
+            return json.loads(self.channels) if self.channels else []
+        except (TypeError, ValueError):
+            return []
+
+    def to_dict(self):
+        """Convert idea to the planner idea schema plus library metadata."""
+        return {
+            'id': self.idea_key,
+            'library_id': self.id,
+            'title': self.title,
+            'hook': self.hook,
+            'persona': self.persona,
+            'funnel': self.funnel,
+            'channels': self.get_channels(),
+            'source_mode': self.source_mode,
+            'source': self.source,
+            'times_suggested': self.times_suggested,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_suggested_at': self.last_suggested_at.isoformat() if self.last_suggested_at else None
+        }
+
+class PlannerIdeaBand(db.Model):
+    """LSH band of a planner idea's MinHash signature, used to find near-duplicate candidates."""
+    __tablename__ = 'planner_idea_bands'
+
+    id = db.Column(db.Integer, primary_key=True)
+    idea_id = db.Column(db.Integer, db.ForeignKey('planner_ideas.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    band_hash = db.Column(db.String(24), nullable=False)  # '<band index>:<hash of band rows>'
+
+    __table_args__ = (
+        db.Index('ix_planner_idea_bands_user_band', 'user_id', 'band_hash'),
+        db.Index('ix_planner_idea_bands_idea', 'idea_id'),
+    )
+
+    def __repr__(self):
+        return f'<PlannerIdeaBand {self.band_hash} for Idea {self.idea_id}>'
@@ -1,5 +1,6 @@
 from src.models.user import db
 from datetime import datetime
+from sqlalchemy import text
 
 class Post(db.Model):
     __tablename__ = 'posts'
@@ -26,6 +27,14 @@ class Post(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        # Post lists and library: WHERE user_id = ? ORDER BY created_at DESC
+        db.Index('ix_posts_user_created', 'user_id', 'created_at'),
+        # Multi-platform groups; most posts have no group, so only grouped rows are indexed
+        db.Index('ix_posts_post_group', 'post_group_id',
+                 postgresql_where=text('post_group_id IS NOT NULL'), sqlite_where=text('post_group_id IS NOT NULL')),
+    )
+    
     def __repr__(self):
         return f'<Post {self.id}: {self.title or "Untitled"}>'
     
@@ -51,12 +60,17 @@ class Post(db.Model):
         }
     
     def mark_as_posted(self, platform=None):
-        """Mark the post as posted with safe field access."""
+        """
+        Mark the post as posted with safe field access.
+        
+        The platforms it was published to are recorded in publications;
+        platform only fills in Post.platform if the post has none yet.
+        """
         self.is_posted = True
         self.posted_at = datetime.utcnow()
         if hasattr(self, 'status'):
             self.status = 'veröffentlicht'
-        if platform:
+        if platform and not self.platform:
             self.platform = platform
     
     def schedule_post(self, scheduled_datetime):
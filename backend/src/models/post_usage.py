@@ -43,10 +43,10 @@ class PostUsage(db.Model):
         """Check if the user can generate multiple posts."""
         return self.get_remaining_posts() >= count
     
-    def increment_generated(self):
+    def increment_generated(self, count=1):
         """Increment the posts generated counter."""
         self.check_and_reset_monthly_usage()
-        self.posts_generated += 1
+        self.posts_generated += count
         self.updated_at = datetime.utcnow()
     
     def increment_posted(self):
@@ -0,0 +1,62 @@
+from src.models.user import db
+from datetime import datetime
+
+class Publication(db.Model):
+    """
+    Record of one post published (or attempted) on one platform.
+
+    Post.platform is the platform a post was written for; where it actually
+    went is recorded here, one row per delivery, so multi-platform posts are
+    counted once per platform.
+    """
+    __tablename__ = 'publications'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='SET NULL'), nullable=True)
+    scheduled_post_id = db.Column(db.Integer, db.ForeignKey('scheduled_posts.id', ondelete='SET NULL'), nullable=True)
+    intent_id = db.Column(db.Integer, db.ForeignKey('publish_outbox.id', ondelete='SET NULL'), unique=True, nullable=True)
+    platform = db.Column(db.String(20), nullable=False)  # 'linkedin', 'facebook', 'twitter', 'instagram'
+
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'published', 'failed'
+    external_id = db.Column(db.String(255), nullable=True)  # Platform post id
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)  # Last error, kept while retrying
+    published_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    intent = db.relationship('PublishIntent', backref=db.backref('publication', uselist=False))
+
+    __table_args__ = (
+        # Per-platform counts of a user: GROUP BY platform, status
+        db.Index('ix_publications_user_platform_status', 'user_id', 'platform', 'status'),
+        # Publishing history and recent activity of a user
+        db.Index('ix_publications_user_status_published', 'user_id', 'status', 'published_at'),
+        # Where a post has been published
+        db.Index('ix_publications_post_platform', 'post_id', 'platform'),
+        # Failed publications to retry, oldest first
+        db.Index('ix_publications_status_updated', 'status', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<Publication {self.id}: post {self.post_id} on {self.platform} ({self.status})>'
+
+    def to_dict(self):
+        """Convert publication to dictionary."""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'post_id': self.post_id,
+            'scheduled_post_id': self.scheduled_post_id,
+            'intent_id': self.intent_id,
+            'platform': self.platform,
+            'status': self.status,
+            'external_id': self.external_id,
+            'attempts': self.attempts,
+            'error': self.error,
+            'published_at': self.published_at.isoformat() if self.published_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,80 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class PublishIntent(db.Model):
+    """
+    Outbox entry for one publish of content to one platform.
+
+    Intents are written in the same transaction as the Post/ScheduledPost
+    change that requests the publish and are delivered by the outbox
+    dispatcher, which retries with backoff and dead-letters what cannot be sent.
+    """
+    __tablename__ = 'publish_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='SET NULL'), nullable=True)
+    scheduled_post_id = db.Column(db.Integer, db.ForeignKey('scheduled_posts.id', ondelete='SET NULL'), nullable=True)
+    platform = db.Column(db.String(20), nullable=False)
+    idempotency_key = db.Column(db.String(120), unique=True, nullable=False)  # One delivery per key
+
+    # Snapshot of what is published
+    content = db.Column(db.Text, nullable=False)
+    image_url = db.Column(db.Text, nullable=True)
+    media_asset = db.Column(db.String(255), nullable=True)  # Platform media id if the image was uploaded ahead of time
+
+    # Delivery state
+    status = db.Column(db.String(20), default='pending', nullable=False)  # 'pending', 'processing', 'sent', 'dead'
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = db.Column(db.String(64), nullable=True)  # Dispatcher holding the lease
+    locked_until = db.Column(db.DateTime, nullable=True)  # Lease expiry
+    dispatched_at = db.Column(db.DateTime, nullable=True)  # Set right before the platform call of an attempt
+
+    # Outcome
+    external_id = db.Column(db.String(255), nullable=True)  # Platform post id
+    result = db.Column(db.Text, nullable=True)  # JSON summary of the last platform response
+    last_error = db.Column(db.Text, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_publish_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_publish_outbox_post', 'post_id'),
+        db.Index('ix_publish_outbox_scheduled_post', 'scheduled_post_id'),
+    )
+
+    def __repr__(self):
+        return f'<PublishIntent {self.id}: {self.platform} ({self.status})>'
+
+    def get_result(self):
+        """Return the stored platform response summary."""
+        try:
+            return json.loads(self.result) if self.result else None
+        except (TypeError, ValueError):
+            return None
+
+    def to_dict(self):
+        """Convert publish intent to dictionary."""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'post_id': self.post_id,
+            'scheduled_post_id': self.scheduled_post_id,
+            'platform': self.platform,
+            'idempotency_key': self.idempotency_key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'external_id': self.external_id,
+            'result': self.get_result(),
+            'last_error': self.last_error,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
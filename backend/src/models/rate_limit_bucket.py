@@ -0,0 +1,42 @@
+from src.models.user import db
+from datetime import datetime
+
+class RateLimitBucket(db.Model):
+    """Token bucket shared by all publish workers, per platform ('platform:linkedin') or account ('account:42')."""
+    __tablename__ = 'rate_limit_buckets'
+
+    id = db.Column(db.Integer, primary_key=True)
+    bucket_key = db.Column(db.String(64), unique=True, nullable=False)
+    platform = db.Column(db.String(20), nullable=False)
+
+    capacity = db.Column(db.Float, nullable=False)  # Maximum burst
+    refill_rate = db.Column(db.Float, nullable=False)  # Tokens per second, adjusted from rate-limit headers
+    tokens = db.Column(db.Float, nullable=False)
+    blocked_until = db.Column(db.DateTime, nullable=True)  # Set from 429 / exhausted quota responses
+
+    # Last limits reported by the platform
+    reported_limit = db.Column(db.Integer, nullable=True)
+    reported_remaining = db.Column(db.Integer, nullable=True)
+    reported_reset_at = db.Column(db.DateTime, nullable=True)
+    throttled_count = db.Column(db.Integer, default=0, nullable=False)  # 429 responses seen
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.bucket_key}: {self.tokens:.1f}/{self.capacity}>'
+
+    def to_dict(self):
+        """Convert bucket to dictionary."""
+        return {
+            'bucket_key': self.bucket_key,
+            'platform': self.platform,
+            'capacity': self.capacity,
+            'refill_rate': self.refill_rate,
+            'tokens': round(self.tokens, 2),
+            'blocked_until': self.blocked_until.isoformat() if self.blocked_until else None,
+            'reported_limit': self.reported_limit,
+            'reported_remaining': self.reported_remaining,
+            'reported_reset_at': self.reported_reset_at.isoformat() if self.reported_reset_at else None,
+            'throttled_count': self.throttled_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
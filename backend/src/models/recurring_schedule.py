@@ -0,0 +1,64 @@
+from src.models.user import db
+from datetime import datetime
+
+class RecurringSchedule(db.Model):
+    """
+    A series of posts published by a recurrence rule, e.g. every Tuesday 09:00.
+    
+    The rule is stored once; its occurrences become ScheduledPost rows only
+    within a rolling window ahead of now (see RecurringScheduleService), so a
+    series that runs for years never has more than a window's worth of
+    unpublished rows.
+    """
+    __tablename__ = 'recurring_schedules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=True)  # Generated post the series was created from
+    
+    # Content of every occurrence
+    title = db.Column(db.Text, nullable=True)
+    content = db.Column(db.Text, nullable=False)
+    generated_image_url = db.Column(db.Text, nullable=True)
+    platform = db.Column(db.String(20), nullable=False)
+    
+    # Recurrence: RFC 5545 RRULE (e.g. 'FREQ=WEEKLY;BYDAY=TU'), expanded from dtstart in the user's timezone
+    rrule = db.Column(db.String(255), nullable=False)
+    dtstart = db.Column(db.DateTime, nullable=False)  # First occurrence, wall-clock time in `timezone`
+    timezone = db.Column(db.String(50), default='UTC', nullable=False)
+    
+    status = db.Column(db.String(20), default='active', nullable=False)  # 'active', 'paused', 'finished', 'cancelled'
+    # Occurrences up to here (UTC) exist as ScheduledPost rows
+    materialized_until = db.Column(db.DateTime, nullable=True)
+    occurrences_created = db.Column(db.Integer, default=0, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Finding series whose window needs extending: WHERE status = 'active' AND materialized_until < ...
+        db.Index('ix_recurring_schedules_status_materialized', 'status', 'materialized_until'),
+    )
+    
+    def __repr__(self):
+        return f'<RecurringSchedule {self.id}: {self.platform} {self.rrule}>'
+    
+    def to_dict(self):
+        """Convert recurring schedule to dictionary."""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'post_id': self.post_id,
+            'title': self.title,
+            'content': self.content,
+            'generated_image_url': self.generated_image_url,
+            'platform': self.platform,
+            'rrule': self.rrule,
+            'dtstart': self.dtstart.isoformat() if self.dtstart else None,
+            'timezone': self.timezone,
+            'status': self.status,
+            'materialized_until': self.materialized_until.isoformat() if self.materialized_until else None,
+            'occurrences_created': self.occurrences_created,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,12 +1,16 @@
 from src.models.user import db
 from datetime import datetime
+from sqlalchemy import text
 
 class ScheduledPost(db.Model):
     __tablename__ = 'scheduled_posts'
     
+    STATUSES = ('scheduled', 'publishing', 'queued', 'retrying', 'published', 'failed', 'cancelled')
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=True)  # Reference to generated post
+    recurring_schedule_id = db.Column(db.Integer, db.ForeignKey('recurring_schedules.id'), nullable=True)  # Series this is an occurrence of
     
     # Post content (can be stored here or referenced from posts table)
     title = db.Column(db.Text, nullable=True)
@@ -19,14 +23,52 @@ class ScheduledPost(db.Model):
     timezone = db.Column(db.String(50), default='UTC', nullable=False)  # User's timezone
     
     # Status tracking
-    status = db.Column(db.String(20), default='scheduled', nullable=False)  # 'scheduled', 'published', 'failed', 'cancelled'
+    status = db.Column(db.String(20), default='scheduled', nullable=False)  # 'scheduled', 'publishing', 'queued', 'retrying', 'published', 'failed', 'cancelled'
     published_at = db.Column(db.DateTime, nullable=True)  # When it was actually published
+    publish_lag_seconds = db.Column(db.Float, nullable=True)  # published_at - scheduled_time
     error_message = db.Column(db.Text, nullable=True)  # Error details if publishing failed
     
+    # Retries: publish attempts so far, and when a 'retrying' post is due again
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+    error_class = db.Column(db.String(30), nullable=True)  # 'server_error', 'network', 'rate_limited', 'auth', 'rejected', 'unknown_outcome'
+    
+    # Claim of a scheduler worker while status is 'publishing'; reclaimable once the lease expired
+    locked_by = db.Column(db.String(64), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    
+    # Warm-up: media uploaded ahead of scheduled_time, so publishing only creates the post
+    media_asset = db.Column(db.String(255), nullable=True)  # Platform media id of the uploaded image
+    prepared_account_id = db.Column(db.Integer, nullable=True)  # SocialAccount the media was uploaded with
+    prepared_at = db.Column(db.DateTime, nullable=True)  # When the warm-up ran (also if the upload failed)
+    
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
+    __table_args__ = (
+        # Claiming due posts: WHERE status = 'scheduled' AND scheduled_time <= now
+        db.Index('ix_scheduled_posts_status_time', 'status', 'scheduled_time'),
+        # Claiming due retries: WHERE status = 'retrying' AND next_attempt_at <= now
+        db.Index('ix_scheduled_posts_status_next_attempt', 'status', 'next_attempt_at'),
+        # Scheduler metrics: posts published/failed within a recent window
+        db.Index('ix_scheduled_posts_status_updated', 'status', 'updated_at'),
+        # One row per occurrence of a series; also serves series-wide edits
+        db.Index('ux_scheduled_posts_series_time', 'recurring_schedule_id', 'scheduled_time', unique=True),
+        # A user's scheduled posts: WHERE user_id = ? [AND status = ?] ORDER BY scheduled_time; status
+        # last so both variants read in index order and the status filter is checked on the index
+        db.Index('ix_scheduled_posts_user_time_status', 'user_id', 'scheduled_time', 'status'),
+        # PostgreSQL: one partial index per claim condition (SchedulerService._claimable). They only
+        # hold pending rows, so the scheduler's scan stays small however much history the table keeps.
+        # SQLite cannot match partial indexes against bound parameters and uses the composites above.
+        db.Index('ix_scheduled_posts_due', 'scheduled_time',
+                 postgresql_where=text("status = 'scheduled'")).ddl_if(dialect='postgresql'),
+        db.Index('ix_scheduled_posts_retry_due', 'next_attempt_at',
+                 postgresql_where=text("status = 'retrying'")).ddl_if(dialect='postgresql'),
+        db.Index('ix_scheduled_posts_lease_expiry', 'lease_expires_at',
+                 postgresql_where=text("status = 'publishing'")).ddl_if(dialect='postgresql'),
+    )
+    
     def __repr__(self):
         return f'<ScheduledPost {self.id}: {self.platform} at {self.scheduled_time}>'
     
@@ -36,6 +78,7 @@ class ScheduledPost(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'post_id': self.post_id,
+            'recurring_schedule_id': self.recurring_schedule_id,
             'title': self.title,
             'content': self.content,
             'generated_image_url': self.generated_image_url,
@@ -44,7 +87,12 @@ class ScheduledPost(db.Model):
             'timezone': self.timezone,
             'status': self.status,
             'published_at': self.published_at.isoformat() if self.published_at else None,
+            'publish_lag_seconds': self.publish_lag_seconds,
             'error_message': self.error_message,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'error_class': self.error_class,
+            'prepared_at': self.prepared_at.isoformat() if self.prepared_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -53,12 +101,32 @@ class ScheduledPost(db.Model):
         """Mark the scheduled post as successfully published."""
         self.status = 'published'
         self.published_at = datetime.utcnow()
+        self.publish_lag_seconds = (self.published_at - self.scheduled_time).total_seconds()
         self.error_message = None
+        self.error_class = None
+        self.next_attempt_at = None
     
-    def mark_as_failed(self, error_message):
+    def mark_as_failed(self, error_message, error_class=None):
         """Mark the scheduled post as failed with error message."""
         self.status = 'failed'
         self.error_message = error_message
+        self.error_class = error_class
+        self.next_attempt_at = None
+    
+    def mark_for_retry(self, error_message, error_class, next_attempt_at):
+        """Put the post back into the due queue after a failed attempt."""
+        self.status = 'retrying'
+        self.error_message = error_message
+        self.error_class = error_class
+        self.next_attempt_at = next_attempt_at
+        # Uploaded media may be what failed; upload again on the next attempt
+        self.clear_preparation()
+    
+    def clear_preparation(self):
+        """Forget the warm-up, e.g. after rescheduling, so it runs again before the new time."""
+        self.media_asset = None
+        self.prepared_account_id = None
+        self.prepared_at = None
     
     def mark_as_cancelled(self):
         """Mark the scheduled post as cancelled."""
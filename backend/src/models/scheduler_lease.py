@@ -0,0 +1,26 @@
+from src.models.user import db
+from datetime import datetime
+
+class SchedulerLease(db.Model):
+    """Named lease held by at most one process at a time, e.g. the active scheduler ('scheduler')."""
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)  # host:pid:token of the process holding the lease
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Start of the current holder's term
+    renewed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)  # Free for others once passed
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name}: {self.holder} until {self.expires_at}>'
+
+    def to_dict(self):
+        """Convert lease to dictionary."""
+        return {
+            'name': self.name,
+            'holder': self.holder,
+            'acquired_at': self.acquired_at.isoformat() if self.acquired_at else None,
+            'renewed_at': self.renewed_at.isoformat() if self.renewed_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'active': self.expires_at > datetime.utcnow() if self.expires_at else False
+        }
@@ -12,6 +12,7 @@ class SocialAccount(db.Model):
     access_token = db.Column(db.Text, nullable=True)
     refresh_token = db.Column(db.Text, nullable=True)
     expires_at = db.Column(db.DateTime, nullable=True)
+    next_refresh_at = db.Column(db.DateTime, nullable=True)  # Background refresh backs off until then after a failed or inconclusive refresh
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -55,5 +56,6 @@ class SocialAccount(db.Model):
             self.refresh_token = refresh_token
         if expires_at:
             self.expires_at = expires_at
+        self.next_refresh_at = None
         self.updated_at = datetime.utcnow()
 
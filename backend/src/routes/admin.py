@@ -218,6 +218,127 @@ def get_system_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/token-refresh', methods=['GET'])
+@admin_required
+def get_token_refresh_stats():
+    """Get OAuth token refresh statistics (admin only)."""
+    try:
+        from src.services.token_refresh_service import (
+            TokenRefreshService, get_token_refresh_stats, get_token_refresh_lease
+        )
+        
+        # Counters are those of this process; runs happen in the process holding the lease
+        stats = get_token_refresh_stats()
+        stats['expiring_soon'] = TokenRefreshService().count_expiring()
+        stats['lease'] = get_token_refresh_lease()
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/token-refresh/run', methods=['POST'])
+@admin_required
+def run_token_refresh():
+    """Refresh all expiring OAuth tokens now (admin only)."""
+    try:
+        from src.services.token_refresh_service import refresh_now, get_token_refresh_lease
+        
+        results = refresh_now()
+        if results is None:
+            return jsonify({
+                'error': 'Token refresh is running in another process',
+                'lease': get_token_refresh_lease()
+            }), 409
+        return jsonify(results), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/outbox', methods=['GET'])
+@admin_required
+def get_outbox_stats():
+    """Get publish outbox depth, lag and throughput (admin only)."""
+    try:
+        from src.services.publish_outbox_service import PublishOutboxService
+        
+        window_minutes = request.args.get('window', 15, type=int)
+        return jsonify(PublishOutboxService().get_stats(window_minutes=max(1, window_minutes))), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/outbox/dead', methods=['GET'])
+@admin_required
+def get_dead_letters():
+    """List dead-lettered publish intents (admin only)."""
+    try:
+        from src.models import PublishIntent
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        
+        intents = PublishIntent.query.filter_by(status='dead').order_by(
+            PublishIntent.updated_at.desc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'intents': [intent.to_dict() for intent in intents.items],
+            'total': intents.total,
+            'pages': intents.pages,
+            'current_page': page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/outbox/<int:intent_id>/retry', methods=['POST'])
+@admin_required
+def retry_dead_letter(intent_id):
+    """Put a dead-lettered publish intent back into the outbox (admin only)."""
+    try:
+        from src.services.publish_outbox_service import PublishOutboxService
+        
+        intent = PublishOutboxService().requeue(intent_id)
+        if not intent:
+            return jsonify({'error': 'Dead-lettered intent not found, or its scheduled post is being retried'}), 404
+        
+        return jsonify({
+            'message': 'Intent requeued',
+            'intent': intent.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/scheduler', methods=['GET'])
+@admin_required
+def get_scheduler_summary():
+    """Get scheduler lag, backlog, throughput and failure rates, and the active scheduler (admin only)."""
+    try:
+        from src.services.scheduler_metrics_service import SchedulerMetricsService
+        from src.services.background_scheduler import get_scheduler_status
+        
+        window_minutes = request.args.get('window', 60, type=int)
+        metrics = SchedulerMetricsService().get_metrics(window_minutes=max(1, window_minutes))
+        metrics['scheduler'] = get_scheduler_status()
+        return jsonify(metrics), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/rate-limits', methods=['GET'])
+@admin_required
+def get_rate_limits():
+    """Get publish rate-limit bucket states (admin only)."""
+    try:
+        from src.services.rate_limit_service import RateLimitService
+        
+        platform = request.args.get('platform')
+        return jsonify({'buckets': RateLimitService().get_buckets(platform=platform)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/posts', methods=['GET'])
 @admin_required
 def get_all_posts():
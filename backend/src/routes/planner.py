@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from src.services.content_planner_service import ContentPlannerService
+from src.services.idea_library_service import IdeaLibraryService
+from src.services.plan_pipeline_service import PlanPipelineService, get_pipeline_job, update_pipeline_job
+from src.models import db, User, PostUsage, PlannerIdea
+import threading
+import uuid
+import json
 import logging
 
 # Create blueprint for planner routes
@@ -22,7 +29,8 @@ def generate_ideas():
         "idea": "Custom idea text",         // Required for mode=idea
         "limit": 10,                        // Optional, default 10
         "persona": "Inhaber:in KMU Köln",   // Optional
-        "channels": ["LI","FB","IG","X"]    // Optional
+        "channels": ["LI","FB","IG","X"],   // Optional
+        "duplicates": "flag" | "filter"     // Optional, default "flag" (only with JWT)
     }
     
     Response JSON:
@@ -34,7 +42,9 @@ def generate_ideas():
                 "hook": "Kurzer 1-Satz-Hook mit Nutzen & Kontext.",
                 "persona": "Inhaber:in KMU Köln",
                 "funnel": "Awareness|Consideration|Decision",
-                "channels": ["LI","FB","IG","X"]
+                "channels": ["LI","FB","IG","X"],
+                "library_id": 42,                               // Only with JWT
+                "duplicate_of": {"id": "...", "similarity": 0.8} // Only for near-duplicates
             }
         ],
         "warnings": []  // Optional, only if there were issues
@@ -44,60 +54,22 @@ def generate_ideas():
         # Get request data
         data = request.get_json()
         
-        if not data:
-            return jsonify({"error": "Request body is required"}), 400
+        params, error = _validate_ideas_request(data)
+        if error:
+            return error
         
-        # Validate required fields
-        mode = data.get('mode')
-        if not mode or mode not in ['url', 'idea']:
-            return jsonify({"error": "Mode must be 'url' or 'idea'"}), 400
-        
-        # Get optional parameters
-        limit = data.get('limit', 10)
-        persona = data.get('persona')
-        channels = data.get('channels')
-        
-        # Validate limit
-        if not isinstance(limit, int) or limit < 1 or limit > 20:
-            return jsonify({"error": "Limit must be an integer between 1 and 20"}), 400
-        
-        # Validate channels if provided
-        valid_channels = ["LI", "FB", "IG", "X"]
-        if channels:
-            if not isinstance(channels, list):
-                return jsonify({"error": "Channels must be a list"}), 400
-            for channel in channels:
-                if channel not in valid_channels:
-                    return jsonify({"error": f"Invalid channel: {channel}. Valid channels: {valid_channels}"}), 400
+        params['user_id'] = _current_user_id()
+        mode = params['mode']
+        limit = params['limit']
+        persona = params['persona']
+        channels = params['channels']
         
         # Log the request (metadata only)
         logging.info(f"Content Planner request: mode={mode}, limit={limit}, persona={persona}, channels={channels}")
         
         # Handle URL mode
         if mode == 'url':
-            urls = data.get('urls')
-            if not urls:
-                return jsonify({"error": "URLs are required for URL mode"}), 400
-            
-            if not isinstance(urls, list):
-                return jsonify({"error": "URLs must be a list"}), 400
-            
-            if len(urls) == 0:
-                return jsonify({"error": "At least one URL is required"}), 400
-            
-            if len(urls) > 3:
-                return jsonify({"error": "Maximum 3 URLs allowed"}), 400
-            
-            # Validate URL formats
-            for url in urls:
-                if not isinstance(url, str) or not url.strip():
-                    return jsonify({"error": "All URLs must be non-empty strings"}), 400
-                
-                # Basic URL validation
-                url_lower = url.lower().strip()
-                if not (url_lower.startswith('http://') or url_lower.startswith('https://') or 
-                       ('.' in url_lower and not url_lower.startswith('.'))):
-                    return jsonify({"error": f"Invalid URL format: {url}"}), 400
+            urls = params['urls']
             
             # Generate ideas from URLs
             try:
@@ -107,6 +79,7 @@ def generate_ideas():
                     persona=persona,
                     channels=channels
                 )
+                result['ideas'] = _register_ideas(result.get('ideas', []), params)
                 
                 logging.info(f"Generated {len(result.get('ideas', []))} ideas from {len(urls)} URLs")
                 return jsonify(result), 200
@@ -117,15 +90,7 @@ def generate_ideas():
         
         # Handle idea mode
         elif mode == 'idea':
-            idea = data.get('idea')
-            if not idea:
-                return jsonify({"error": "Idea text is required for idea mode"}), 400
-            
-            if not isinstance(idea, str) or not idea.strip():
-                return jsonify({"error": "Idea must be a non-empty string"}), 400
-            
-            if len(idea.strip()) < 5:
-                return jsonify({"error": "Idea text must be at least 5 characters long"}), 400
+            idea = params['idea']
             
             # Generate ideas from custom idea
             try:
@@ -135,6 +100,7 @@ def generate_ideas():
                     persona=persona,
                     channels=channels
                 )
+                result['ideas'] = _register_ideas(result.get('ideas', []), params)
                 
                 logging.info(f"Generated {len(result.get('ideas', []))} ideas from custom idea")
                 return jsonify(result), 200
@@ -147,6 +113,437 @@ def generate_ideas():
         logging.error(f"Unexpected error in generate_ideas: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@planner_bp.route('/ideas/stream', methods=['POST'])
+@cross_origin()
+def stream_ideas():
+    """
+    Stream content ideas as Server-Sent Events while they are generated.
+    
+    Accepts the same request JSON as /ideas. Each normalized idea is sent
+    as soon as its JSON object is complete in the OpenAI token stream.
+    
+    Events:
+        event: warning   data: {"message": "..."}
+        event: idea      data: {"id": "idea_1", "title": "...", ...}
+        event: done      data: {"count": 10}
+        event: error     data: {"error": "..."}
+    """
+    data = request.get_json(silent=True)
+    
+    params, error = _validate_ideas_request(data)
+    if error:
+        return error
+    
+    params['user_id'] = _current_user_id()
+    mode = params['mode']
+    logging.info(f"Content Planner stream request: mode={mode}, limit={params['limit']}, "
+                 f"persona={params['persona']}, channels={params['channels']}")
+    
+    if mode == 'url':
+        events = content_planner_service.stream_ideas_from_urls(
+            urls=params['urls'],
+            limit=params['limit'],
+            persona=params['persona'],
+            channels=params['channels']
+        )
+    else:
+        events = content_planner_service.stream_ideas_from_idea(
+            idea=params['idea'],
+            limit=params['limit'],
+            persona=params['persona'],
+            channels=params['channels']
+        )
+    
+    def generate():
+        count = 0
+        try:
+            for event, payload in events:
+                if event == 'idea':
+                    registered = _register_ideas([payload], params)
+                    if not registered:
+                        # Duplicate filtered out by the idea library
+                        continue
+                    count += 1
+                    yield _sse('idea', registered[0])
+                else:
+                    yield _sse(event, {"message": payload})
+            
+            logging.info(f"Streamed {count} ideas (mode={mode})")
+            yield _sse('done', {"count": count})
+            
+        except Exception as e:
+            logging.error(f"Error streaming ideas: {str(e)}")
+            yield _sse('error', {"error": f"Failed to generate ideas: {str(e)}"})
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _sse(event, payload):
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def _validate_ideas_request(data):
+    """
+    Validate an idea generation request.
+    
+    Returns:
+        Tuple of (params, None) on success or (None, error_response) on failure
+    """
+    if not data:
+        return None, (jsonify({"error": "Request body is required"}), 400)
+    
+    # Validate required fields
+    mode = data.get('mode')
+    if not mode or mode not in ['url', 'idea']:
+        return None, (jsonify({"error": "Mode must be 'url' or 'idea'"}), 400)
+    
+    # Get optional parameters
+    limit = data.get('limit', 10)
+    persona = data.get('persona')
+    channels = data.get('channels')
+    
+    # Validate limit
+    if not isinstance(limit, int) or limit < 1 or limit > 20:
+        return None, (jsonify({"error": "Limit must be an integer between 1 and 20"}), 400)
+    
+    # Validate channels if provided
+    valid_channels = ["LI", "FB", "IG", "X"]
+    if channels:
+        if not isinstance(channels, list):
+            return None, (jsonify({"error": "Channels must be a list"}), 400)
+        for channel in channels:
+            if channel not in valid_channels:
+                return None, (jsonify({"error": f"Invalid channel: {channel}. Valid channels: {valid_channels}"}), 400)
+    
+    duplicates = data.get('duplicates', 'flag')
+    if duplicates not in ['flag', 'filter']:
+        return None, (jsonify({"error": "Duplicates must be 'flag' or 'filter'"}), 400)
+    
+    params = {
+        'mode': mode,
+        'limit': limit,
+        'persona': persona,
+        'channels': channels,
+        'duplicates': duplicates
+    }
+    
+    if mode == 'url':
+        urls = data.get('urls')
+        if not urls:
+            return None, (jsonify({"error": "URLs are required for URL mode"}), 400)
+        
+        if not isinstance(urls, list):
+            return None, (jsonify({"error": "URLs must be a list"}), 400)
+        
+        if len(urls) == 0:
+            return None, (jsonify({"error": "At least one URL is required"}), 400)
+        
+        if len(urls) > 3:
+            return None, (jsonify({"error": "Maximum 3 URLs allowed"}), 400)
+        
+        # Validate URL formats
+        for url in urls:
+            if not isinstance(url, str) or not url.strip():
+                return None, (jsonify({"error": "All URLs must be non-empty strings"}), 400)
+            
+            # Basic URL validation
+            url_lower = url.lower().strip()
+            if not (url_lower.startswith('http://') or url_lower.startswith('https://') or 
+                   ('.' in url_lower and not url_lower.startswith('.'))):
+                return None, (jsonify({"error": f"Invalid URL format: {url}"}), 400)
+        
+        params['urls'] = urls
+    else:
+        idea = data.get('idea')
+        if not idea:
+            return None, (jsonify({"error": "Idea text is required for idea mode"}), 400)
+        
+        if not isinstance(idea, str) or not idea.strip():
+            return None, (jsonify({"error": "Idea must be a non-empty string"}), 400)
+        
+        if len(idea.strip()) < 5:
+            return None, (jsonify({"error": "Idea text must be at least 5 characters long"}), 400)
+        
+        params['idea'] = idea
+    
+    return params, None
+
+def _current_user_id():
+    """Return the user id from an optional JWT, or None for anonymous requests."""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        return int(identity) if identity else None
+    except Exception:
+        # Invalid or expired tokens fall back to anonymous planner usage
+        return None
+
+def _register_ideas(ideas, params):
+    """Store ideas in the user's idea library and flag or drop near-duplicates."""
+    user_id = params.get('user_id')
+    if not user_id or not ideas:
+        return ideas
+    
+    source = '\n'.join(params['urls']) if params['mode'] == 'url' else params.get('idea')
+    try:
+        return IdeaLibraryService().register_ideas(
+            user_id=user_id,
+            ideas=ideas,
+            source_mode=params['mode'],
+            source=source,
+            duplicates=params.get('duplicates', 'flag')
+        )
+    except Exception as e:
+        # The library is an add-on, never fail idea generation because of it
+        logging.error(f"Error storing ideas in library: {str(e)}")
+        db.session.rollback()
+        return ideas
+
+@planner_bp.route('/library', methods=['GET'])
+@cross_origin()
+@jwt_required()
+def get_idea_library():
+    """
+    Browse and search previously generated ideas.
+    
+    Query parameters:
+        q: Search terms (matched against title and hook)
+        funnel: Funnel stage filter
+        channel: Channel filter (LI, FB, IG, X)
+        page, per_page: Pagination (per_page max 100)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        
+        ideas = IdeaLibraryService().search_ideas(
+            user_id=user_id,
+            query=request.args.get('q'),
+            funnel=request.args.get('funnel'),
+            channel=request.args.get('channel'),
+            page=page,
+            per_page=per_page
+        )
+        
+        return jsonify({
+            'ideas': [idea.to_dict() for idea in ideas.items],
+            'pagination': {
+                'page': ideas.page,
+                'pages': ideas.pages,
+                'per_page': ideas.per_page,
+                'total': ideas.total,
+                'has_next': ideas.has_next,
+                'has_prev': ideas.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        logging.error(f"Error browsing idea library: {str(e)}")
+        return jsonify({"error": f"Failed to load idea library: {str(e)}"}), 500
+
+@planner_bp.route('/library/similar', methods=['GET'])
+@cross_origin()
+@jwt_required()
+def find_similar_ideas():
+    """
+    Find stored ideas similar to a topic before generating new ones.
+    
+    Query parameters:
+        text: Topic, title or hook to compare against (required)
+        limit: Maximum number of results (default 10, max 50)
+        min_similarity: Minimum estimated similarity (default 0.3)
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        
+        text = request.args.get('text', '').strip()
+        if not text:
+            return jsonify({"error": "Parameter 'text' is required"}), 400
+        
+        limit = min(request.args.get('limit', 10, type=int), 50)
+        min_similarity = request.args.get('min_similarity', 0.3, type=float)
+        
+        ideas = IdeaLibraryService().find_similar(user_id, text, limit=limit, min_similarity=min_similarity)
+        
+        return jsonify({'ideas': ideas}), 200
+        
+    except Exception as e:
+        logging.error(f"Error searching similar ideas: {str(e)}")
+        return jsonify({"error": f"Failed to search similar ideas: {str(e)}"}), 500
+
+@planner_bp.route('/library/<int:library_id>', methods=['DELETE'])
+@cross_origin()
+@jwt_required()
+def delete_library_idea(library_id):
+    """Remove an idea from the user's idea library."""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        if not IdeaLibraryService().delete_idea(user_id, library_id):
+            return jsonify({"error": "Idea not found"}), 404
+        
+        return jsonify({"message": "Idea deleted successfully"}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Error deleting library idea: {str(e)}")
+        return jsonify({"error": f"Failed to delete idea: {str(e)}"}), 500
+
+@planner_bp.route('/pipeline', methods=['POST'])
+@cross_origin()
+@jwt_required()
+def start_plan_pipeline():
+    """
+    Generate and schedule posts for a set of ideas in a single background job.
+    
+    Request JSON:
+    {
+        "ideas": [{"title": "...", "hook": "...", ...}],  // Planner ideas, or
+        "library_ids": [1, 2, 3],                         // ideas from the idea library
+        "platforms": ["linkedin", "facebook"],
+        "start_date": "2025-07-01",
+        "end_date": "2025-07-31",
+        "slots": ["09:00", {"time": "17:30", "weekdays": [1, 3]}],  // weekdays: 0 = Monday
+        "timezone": "Europe/Berlin",                      // Optional, default UTC
+        "profile_url": "https://www.greven.de",           // Optional
+        "additional_details": "",                         // Optional
+        "generate_image": false                           // Optional
+    }
+    
+    Ideas are assigned to the slots in chronological order. Returns a job id;
+    progress is available at GET /pipeline/<job_id>.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+        
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({"error": "Request body is required"}), 400
+        
+        # Collect ideas
+        ideas = data.get('ideas') or []
+        library_ids = data.get('library_ids') or []
+        if not isinstance(ideas, list) or not isinstance(library_ids, list):
+            return jsonify({"error": "Ideas and library_ids must be lists"}), 400
+        
+        if library_ids:
+            stored_ideas = PlannerIdea.query.filter(
+                PlannerIdea.user_id == user_id,
+                PlannerIdea.id.in_(library_ids)
+            ).all()
+            stored_by_id = {idea.id: idea.to_dict() for idea in stored_ideas}
+            ideas = ideas + [stored_by_id[i] for i in library_ids if i in stored_by_id]
+        
+        ideas = [idea for idea in ideas if isinstance(idea, dict) and idea.get('title')]
+        if not ideas:
+            return jsonify({"error": "At least one idea with a title is required"}), 400
+        
+        # Validate platforms
+        valid_platforms = ['linkedin', 'facebook', 'twitter', 'instagram']
+        platforms = data.get('platforms') or ['linkedin']
+        if not isinstance(platforms, list) or any(p not in valid_platforms for p in platforms):
+            return jsonify({"error": f"Platforms must be a list of {valid_platforms}"}), 400
+        platforms = list(dict.fromkeys(platforms))
+        
+        for field in ['start_date', 'end_date', 'slots']:
+            if field not in data:
+                return jsonify({"error": f"Missing required field: {field}"}), 400
+        
+        timezone = data.get('timezone', 'UTC')
+        generate_image = bool(data.get('generate_image', False))
+        
+        # Expand slots and pair them with ideas
+        pipeline_service = PlanPipelineService()
+        try:
+            local_slots = pipeline_service.build_slots(
+                data['start_date'], data['end_date'], data['slots'], timezone
+            )
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": f"Invalid schedule: {str(e)}"}), 400
+        
+        if not local_slots:
+            return jsonify({"error": "No future posting slots in the given date range"}), 400
+        
+        plan = list(zip(ideas, local_slots))
+        
+        # Check limits for the whole job up front
+        if generate_image and user.subscription == 'free':
+            return jsonify({
+                'error': 'Image generation is not available in the free plan. Please upgrade your subscription.',
+                'subscription': user.subscription,
+                'feature': 'image_generation'
+            }), 403
+        
+        post_usage = PostUsage.query.filter_by(user_id=user_id).first()
+        needed_posts = len(plan) * len(platforms)
+        if post_usage and not post_usage.can_generate_posts(needed_posts):
+            return jsonify({
+                'error': f'Not enough posts remaining. Need {needed_posts}, have {post_usage.get_remaining_posts()}',
+                'remaining_posts': post_usage.get_remaining_posts(),
+                'monthly_limit': post_usage.monthly_limit
+            }), 429
+        
+        job_id = str(uuid.uuid4())
+        update_pipeline_job(job_id, user_id=user_id, status='queued', progress='Queued', total=needed_posts)
+        
+        app = current_app._get_current_object()
+        
+        def run_job():
+            with app.app_context():
+                try:
+                    pipeline_service.run(
+                        job_id=job_id,
+                        user_id=user_id,
+                        plan=plan,
+                        platforms=platforms,
+                        timezone=timezone,
+                        profile_url=data.get('profile_url', ''),
+                        additional_details=data.get('additional_details', ''),
+                        generate_image=generate_image
+                    )
+                except Exception as e:
+                    logging.error(f"Pipeline job {job_id} failed: {str(e)}")
+                    db.session.rollback()
+                    update_pipeline_job(job_id, status='error', error=str(e))
+        
+        thread = threading.Thread(target=run_job, daemon=True)
+        thread.start()
+        
+        logging.info(f"Started pipeline job {job_id}: {len(plan)} ideas x {len(platforms)} platforms")
+        
+        return jsonify({
+            'job_id': job_id,
+            'status': 'started',
+            'ideas_planned': len(plan),
+            'ideas_unplanned': len(ideas) - len(plan),
+            'posts_planned': needed_posts,
+            'first_slot': local_slots[0].isoformat(),
+            'last_slot': plan[-1][1].isoformat(),
+            'message': 'Pipeline started. Use the job_id to check status.'
+        }), 202
+        
+    except Exception as e:
+        logging.error(f"Error starting pipeline: {str(e)}")
+        return jsonify({"error": f"Failed to start pipeline: {str(e)}"}), 500
+
+@planner_bp.route('/pipeline/<job_id>', methods=['GET'])
+@cross_origin()
+@jwt_required()
+def get_plan_pipeline_status(job_id):
+    """Get the status of a plan-to-schedule pipeline job."""
+    job = get_pipeline_job(job_id)
+    if not job or job.get('user_id') != int(get_jwt_identity()):
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job), 200
+
 @planner_bp.route('/health', methods=['GET'])
 @cross_origin()
 def health_check():
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models import db, User, Post, PostUsage
+from src.models import db, User, Post, PostUsage, Publication
 from src.services.openai_service import OpenAIService
 import requests
 from datetime import datetime
@@ -367,6 +367,14 @@ def publish_post(post_id):
         # TODO: Implement actual social media publishing
         # For now, just mark as posted
         post.mark_as_posted(platform)
+        db.session.add(Publication(
+            user_id=current_user_id,
+            post_id=post.id,
+            platform=platform,
+            status='published',
+            attempts=1,
+            published_at=post.posted_at
+        ))
         
         # Update usage counter
         post_usage = PostUsage.query.filter_by(user_id=current_user_id).first()
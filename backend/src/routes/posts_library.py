@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
-from src.models import db, User, Post
+from src.models import db, User, Post, Publication
 from datetime import datetime
 from sqlalchemy import desc
+from src.services.post_search_service import PostSearchService
 
 posts_library_bp = Blueprint('posts_library', __name__)
 
@@ -22,6 +23,25 @@ def get_user_posts():
         platform = request.args.get('platform')
         search = request.args.get('search')
         
+        # Full-text search: best matches first, with highlighted snippets
+        if search and search.strip():
+            found = PostSearchService().search(current_user_id, search, platform=platform,
+                                               page=page, per_page=per_page)
+            return jsonify({
+                'posts': [
+                    {**result['post'].to_dict(), 'search': {'rank': result['rank'], 'snippet': result['snippet']}}
+                    for result in found['results']
+                ],
+                'pagination': {
+                    'page': found['page'],
+                    'pages': found['pages'],
+                    'per_page': found['per_page'],
+                    'total': found['total'],
+                    'has_next': found['has_next'],
+                    'has_prev': found['has_prev']
+                }
+            }), 200
+        
         # Build query
         query = Post.query.filter_by(user_id=current_user_id)
         
@@ -29,15 +49,6 @@ def get_user_posts():
         if platform:
             query = query.filter(Post.platform == platform)
         
-        if search:
-            query = query.filter(
-                db.or_(
-                    Post.title.ilike(f'%{search}%'),
-                    Post.content.ilike(f'%{search}%'),
-                    Post.post_theme.ilike(f'%{search}%')
-                )
-            )
-        
         # Order by creation date (newest first)
         query = query.order_by(desc(Post.created_at))
         
@@ -194,32 +205,41 @@ def get_posts_stats():
         
         current_user_id = user.id
         
-        # Get total posts count
-        total_posts = Post.query.filter_by(user_id=current_user_id).count()
-        
-        # Get posts by platform
-        platform_stats = {}
-        for platform in ['linkedin', 'facebook', 'twitter', 'instagram']:
-            count = Post.query.filter_by(user_id=current_user_id, platform=platform).count()
-            platform_stats[platform] = count
-        
-        # Get posted vs draft posts
-        posted_count = Post.query.filter_by(user_id=current_user_id, is_posted=True).count()
-        draft_count = total_posts - posted_count
-        
-        # Get recent posts (last 7 days)
+        # Posts by platform with posted and recent counts in one aggregate
         from datetime import timedelta
+        from sqlalchemy import case, func
         week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_posts = Post.query.filter(
-            Post.user_id == current_user_id,
-            Post.created_at >= week_ago
-        ).count()
+        rows = db.session.query(
+            Post.platform,
+            func.count(Post.id),
+            func.sum(case((Post.is_posted == True, 1), else_=0)),
+            func.sum(case((Post.created_at >= week_ago, 1), else_=0))
+        ).filter(Post.user_id == current_user_id).group_by(Post.platform).all()
+        
+        platform_stats = {platform: 0 for platform in ['linkedin', 'facebook', 'twitter', 'instagram']}
+        total_posts = posted_count = recent_posts = 0
+        for platform, count, posted, recent in rows:
+            if platform in platform_stats:
+                platform_stats[platform] = count
+            total_posts += count
+            posted_count += posted or 0
+            recent_posts += recent or 0
+        
+        # Where posts actually went: multi-platform publishes count once per platform
+        published_stats = {platform: 0 for platform in platform_stats}
+        published_stats.update(dict(db.session.query(
+            Publication.platform, func.count(Publication.id)
+        ).filter(
+            Publication.user_id == current_user_id,
+            Publication.status == 'published'
+        ).group_by(Publication.platform).all()))
         
         return jsonify({
             'total_posts': total_posts,
             'platform_stats': platform_stats,
+            'published_stats': published_stats,
             'posted_count': posted_count,
-            'draft_count': draft_count,
+            'draft_count': total_posts - posted_count,
             'recent_posts': recent_posts
         }), 200
         
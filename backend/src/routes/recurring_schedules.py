@@ -0,0 +1,170 @@
+from flask import Blueprint, request, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from src.services.recurring_schedule_service import RecurringScheduleService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Create blueprint for recurring schedule routes
+recurring_schedules_bp = Blueprint('recurring_schedules', __name__)
+
+def _parse_start(data):
+    """Combine start_date ('YYYY-MM-DD') and start_time ('HH:MM') to a wall-clock datetime."""
+    return datetime.strptime(f"{data['start_date']} {data['start_time']}", '%Y-%m-%d %H:%M')
+
+@recurring_schedules_bp.route('', methods=['POST'])
+@cross_origin()
+@jwt_required()
+def create_recurring_schedule():
+    """
+    Create a recurring schedule.
+
+    Request JSON:
+    {
+        "content": "Post text",
+        "title": "Optional title",
+        "image_url": "Optional image",
+        "post_id": 12,                       // Optional
+        "platform": "linkedin",
+        "rrule": "FREQ=WEEKLY;BYDAY=TU,TH",  // At most daily; COUNT/UNTIL optional
+        "start_date": "2025-01-07",
+        "start_time": "09:00",
+        "timezone": "Europe/Berlin"          // Optional, default UTC
+    }
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+
+        for field in ['content', 'platform', 'rrule', 'start_date', 'start_time']:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        try:
+            dtstart = _parse_start(data)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date/time format: {str(e)}'}), 400
+
+        post_content = {
+            'title': data.get('title', ''),
+            'content': data['content'],
+            'image_url': data.get('image_url', '')
+        }
+        try:
+            schedule, created = RecurringScheduleService().create_schedule(
+                user_id=user_id,
+                post_content=post_content,
+                platform=data['platform'],
+                rule_text=data['rrule'],
+                dtstart=dtstart,
+                timezone=data.get('timezone', 'UTC'),
+                post_id=data.get('post_id')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'message': 'Recurring schedule created successfully',
+            'recurring_schedule': schedule.to_dict(),
+            'occurrences_scheduled': created
+        }), 201
+
+    except Exception as e:
+        logger.error(f"Error creating recurring schedule: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recurring_schedules_bp.route('', methods=['GET'])
+@cross_origin()
+@jwt_required()
+def get_recurring_schedules():
+    """Get the recurring schedules of the user (optional ?status=)."""
+    try:
+        user_id = int(get_jwt_identity())
+        schedules = RecurringScheduleService().get_schedules(user_id, request.args.get('status'))
+        return jsonify({
+            'recurring_schedules': [schedule.to_dict() for schedule in schedules]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error getting recurring schedules: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recurring_schedules_bp.route('/<int:schedule_id>', methods=['GET'])
+@cross_origin()
+@jwt_required()
+def get_recurring_schedule(schedule_id):
+    """Get a recurring schedule with its upcoming materialized occurrences."""
+    try:
+        user_id = int(get_jwt_identity())
+        service = RecurringScheduleService()
+        schedule = service.get_schedule(schedule_id, user_id)
+        if not schedule:
+            return jsonify({'error': 'Recurring schedule not found'}), 404
+
+        limit = min(request.args.get('limit', 20, type=int), 100)
+        return jsonify({
+            'recurring_schedule': schedule.to_dict(),
+            'upcoming': [post.to_dict() for post in service.get_upcoming(schedule, limit)]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error getting recurring schedule: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recurring_schedules_bp.route('/<int:schedule_id>', methods=['PUT'])
+@cross_origin()
+@jwt_required()
+def update_recurring_schedule(schedule_id):
+    """
+    Edit a whole series.
+
+    Accepts any of title, content, image_url, platform (applied to all
+    unpublished occurrences), rrule, start_date + start_time, timezone
+    (occurrences are rebuilt) and status ('paused' or 'active').
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+
+        changes = {field: data[field] for field in
+                   ('title', 'content', 'image_url', 'platform', 'rrule', 'timezone', 'status') if field in data}
+        if 'start_date' in data or 'start_time' in data:
+            try:
+                changes['dtstart'] = _parse_start(data)
+            except (KeyError, ValueError):
+                return jsonify({'error': 'start_date and start_time are required together (YYYY-MM-DD, HH:MM)'}), 400
+        if not changes:
+            return jsonify({'error': 'No changes given'}), 400
+
+        try:
+            schedule = RecurringScheduleService().update_schedule(schedule_id, user_id, changes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not schedule:
+            return jsonify({'error': 'Recurring schedule not found'}), 404
+
+        return jsonify({
+            'message': 'Recurring schedule updated successfully',
+            'recurring_schedule': schedule.to_dict()
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error updating recurring schedule: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@recurring_schedules_bp.route('/<int:schedule_id>', methods=['DELETE'])
+@cross_origin()
+@jwt_required()
+def cancel_recurring_schedule(schedule_id):
+    """Cancel a series; its unpublished occurrences are removed."""
+    try:
+        user_id = int(get_jwt_identity())
+        if RecurringScheduleService().cancel_schedule(schedule_id, user_id):
+            return jsonify({'message': 'Recurring schedule cancelled successfully'}), 200
+        return jsonify({'error': 'Recurring schedule not found'}), 404
+
+    except Exception as e:
+        logger.error(f"Error cancelling recurring schedule: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -3,7 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 import pytz
 from src.services.scheduler_service import SchedulerService
-from src.services.background_scheduler import get_simple_scheduler
+from src.services.background_scheduler import get_scheduler_status
 from src.models import db, Post
 import logging
 
@@ -81,6 +81,30 @@ def schedule_post():
         logger.error(f"Error scheduling post: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@scheduler_bp.route('/schedule-bulk', methods=['POST'])
+@jwt_required()
+def schedule_posts_bulk():
+    """Schedule many posts in one request; returns a result per item."""
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        try:
+            result = scheduler_service.schedule_posts_bulk(
+                user_id, data.get('items'), default_timezone=data.get('timezone', 'UTC')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        status_code = 201 if result['scheduled'] else 400
+        if result['scheduled'] and result['failed']:
+            status_code = 207
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.error(f"Error bulk scheduling posts: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
 @scheduler_bp.route('/scheduled', methods=['GET'])
 @jwt_required()
 def get_scheduled_posts():
@@ -89,10 +113,6 @@ def get_scheduled_posts():
         # Get the real current user from JWT token (convert string to int)
         user_id = int(get_jwt_identity())
         
-        # Automatically check for posts to publish when user views scheduled posts
-        simple_scheduler = get_simple_scheduler()
-        simple_scheduler.check_and_process()
-        
         status = request.args.get('status')  # Optional status filter
         
         scheduled_posts = scheduler_service.get_scheduled_posts(user_id, status)
@@ -176,23 +196,6 @@ def reschedule_post(post_id):
         logger.error(f"Error rescheduling post: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
-@scheduler_bp.route('/process', methods=['POST'])
-def process_scheduled_posts():
-    """Manually trigger processing of scheduled posts (for testing)."""
-    try:
-        # Use simple scheduler for automatic processing
-        simple_scheduler = get_simple_scheduler()
-        results = simple_scheduler.check_and_process()
-        
-        return jsonify({
-            'message': 'Scheduled posts processed',
-            'results': results
-        }), 200
-        
-    except Exception as e:
-        logger.error(f"Error processing scheduled posts: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
-
 @scheduler_bp.route('/schedule-existing', methods=['POST'])
 def schedule_existing_post():
     """Schedule an existing post for future publishing."""
@@ -270,11 +273,9 @@ def schedule_existing_post():
 
 @scheduler_bp.route('/auto-check', methods=['GET'])
 def auto_check_scheduled_posts():
-    """Automatically check and process scheduled posts (called periodically)."""
+    """Report the scheduler state; due posts are published by the active scheduler, not by this call."""
     try:
-        # Use simple scheduler for automatic processing
-        simple_scheduler = get_simple_scheduler()
-        results = simple_scheduler.check_and_process()
+        results = get_scheduler_status()
         
         return jsonify({
             'message': 'Auto-check completed',
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, url_for, redirect
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models import db, User, SocialAccount
-from src.services.social_media_service import SocialMediaService
+from src.services.service_registry import get_social_media_service
 
 social_bp = Blueprint('social', __name__)
 
@@ -53,7 +53,7 @@ def connect_account(platform):
         
         # Generate OAuth URL
         try:
-            social_service = SocialMediaService()
+            social_service = get_social_media_service()
             
             # Build redirect URI
             redirect_uri = url_for('social.oauth_callback', platform=platform, _external=True, _scheme='https')
@@ -96,7 +96,7 @@ def oauth_callback(platform):
             return jsonify({'error': 'Unsupported platform'}), 400
         
         try:
-            social_service = SocialMediaService()
+            social_service = get_social_media_service()
             
             # Build redirect URI
             redirect_uri = url_for('social.oauth_callback', platform=platform, _external=True, _scheme='https')
@@ -178,7 +178,7 @@ def publish_to_platform():
             }), 404
         
         try:
-            social_service = SocialMediaService()
+            social_service = get_social_media_service()
             
             # Publish to platform
             result = social_service.post_to_platform(platform, current_user_id, content, image_url)
@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models import db, User, SocialAccount, Post
+from src.models import db, User, SocialAccount, Post, Publication
 from datetime import datetime
+import json
 
 social_accounts_api_bp = Blueprint('social_accounts_api', __name__)
 
@@ -100,11 +101,11 @@ def connect_social_account(platform):
         
         # For LinkedIn, use real OAuth flow
         if platform == 'linkedin':
-            from src.services.social_media_service import SocialMediaService
+            from src.services.service_registry import get_social_media_service
             from flask import url_for
             
             try:
-                social_service = SocialMediaService()
+                social_service = get_social_media_service()
                 
                 # Build redirect URI for LinkedIn with HTTPS
                 redirect_uri = url_for('social.oauth_callback', platform=platform, _external=True, _scheme='https')
@@ -200,6 +201,36 @@ def disconnect_social_account(platform):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _publish_result(outcome):
+    """Client-facing result of one outbox delivery."""
+    platform = outcome['platform']
+    result = outcome.get('result') or {}
+    if outcome['success']:
+        return {
+            'platform': platform,
+            'success': True,
+            'message': result.get('message', f'Successfully published to {platform.title()}'),
+            'post_id': outcome.get('external_id') or result.get('post_id', f'unknown_{platform}_post_id'),
+            'has_image': result.get('has_image', False),
+            'media_asset': result.get('media_asset')
+        }
+    
+    failure = {
+        'platform': platform,
+        'success': False,
+        'error': outcome.get('error') or f'Failed to publish to {platform.title()}',
+        'details': result,
+        'has_image': result.get('has_image', False),
+        'status': outcome['status']
+    }
+    if outcome['next_attempt_at']:
+        failure['retry_scheduled_at'] = outcome['next_attempt_at']
+    if outcome.get('deferred'):
+        failure['deferred'] = True  # Rate limited; published automatically when the limit resets
+    if 'exception' in result:
+        failure['exception'] = result['exception']
+    return failure
+
 @social_accounts_api_bp.route('/publish', methods=['POST'])
 @jwt_required()
 def publish_to_social_media():
@@ -241,6 +272,9 @@ def publish_to_social_media():
             print(f"ERROR: At least one platform must be selected")
             return jsonify({'error': 'At least one platform must be selected'}), 400
         
+        # Publish at most once per platform
+        platforms = list(dict.fromkeys(platforms))
+        
         # Get the post
         post = Post.query.filter_by(id=post_id, user_id=current_user_id).first()
         if not post:
@@ -253,112 +287,72 @@ def publish_to_social_media():
         if post.generated_image_url:
             print(f"Image URL: {post.generated_image_url}")
         
-        # Check connected accounts for selected platforms
-        results = []
+        # Check connected accounts for selected platforms (one query for all platforms)
+        supported_platforms = ['linkedin', 'facebook', 'twitter', 'instagram']
+        social_accounts = SocialAccount.query.filter(
+            SocialAccount.user_id == current_user_id,
+            SocialAccount.platform.in_([p for p in platforms if p in supported_platforms]),
+            SocialAccount.is_active == True
+        ).all()
+        accounts_by_platform = {}
+        for social_account in social_accounts:
+            accounts_by_platform.setdefault(social_account.platform, social_account)
+        
+        results_by_platform = {}
+        accounts_to_publish = {}
         for platform in platforms:
-            print(f"\n--- Processing platform: {platform} ---")
-            
-            if platform not in ['linkedin', 'facebook', 'twitter', 'instagram']:
+            if platform not in supported_platforms:
                 print(f"ERROR: Unsupported platform: {platform}")
-                results.append({
+                results_by_platform[platform] = {
                     'platform': platform,
                     'success': False,
                     'error': 'Unsupported platform'
-                })
+                }
                 continue
             
-            social_account = SocialAccount.query.filter_by(
-                user_id=current_user_id, platform=platform, is_active=True
-            ).first()
-            
+            social_account = accounts_by_platform.get(platform)
             if not social_account:
                 print(f"ERROR: No active {platform} account found for user {current_user_id}")
-                results.append({
+                results_by_platform[platform] = {
                     'platform': platform,
                     'success': False,
                     'error': f'No active {platform.title()} account found'
-                })
+                }
                 continue
             
-            print(f"Social account found: {social_account.account_name} (ID: {social_account.account_id})")
-            print(f"Account active: {social_account.is_active}")
-            print(f"Token expires: {social_account.expires_at}")
-            
-            # Use real API calls for publishing
-            try:
-                from src.services.social_media_service import SocialMediaService
-                social_service = SocialMediaService()
-                
-                # Get image URL if post has an image
-                image_url = post.generated_image_url if post.generated_image_url else None
-                print(f"Image URL for posting: {image_url}")
-                
-                # Call the appropriate posting method with image support
-                print(f"Calling {platform} posting method...")
-                if platform == 'linkedin':
-                    print(f"=== LINKEDIN POSTING START ===")
-                    result = social_service._post_to_linkedin(social_account, post.content, image_url)
-                    print(f"=== LINKEDIN POSTING RESULT: {result} ===")
-                elif platform == 'facebook':
-                    result = social_service._post_to_facebook(social_account, post.content, image_url)
-                elif platform == 'twitter':
-                    result = social_service._post_to_twitter(social_account, post.content, image_url)
-                elif platform == 'instagram':
-                    result = social_service._post_to_instagram(social_account, post.content, image_url)
-                
-                if result.get('success'):
-                    print(f"SUCCESS: {platform} posting successful")
-                    # Mark post as published for this platform
-                    post.is_posted = True
-                    post.posted_at = datetime.utcnow()
-                    post.platform = platform  # Update to last published platform
-                    
-                    # Update status to 'veröffentlicht' if the field exists
-                    if hasattr(post, 'status'):
-                        post.status = 'veröffentlicht'
-                        print(f"Updated post status to 'veröffentlicht' for post ID {post.id}")
-                    
-                    # Commit immediately to ensure status is saved
-                    try:
-                        db.session.commit()
-                        print(f"Database committed successfully for post ID {post.id}")
-                    except Exception as commit_error:
-                        print(f"Database commit error: {commit_error}")
-                        db.session.rollback()
-                    
-                    results.append({
-                        'platform': platform,
-                        'success': True,
-                        'message': result.get('message', f'Successfully published to {platform.title()}'),
-                        'post_id': result.get('post_id', f'unknown_{platform}_post_id'),
-                        'has_image': result.get('has_image', False),
-                        'media_asset': result.get('media_asset')
-                    })
-                else:
-                    print(f"FAILURE: {platform} posting failed")
-                    print(f"Error details: {result}")
-                    results.append({
-                        'platform': platform,
-                        'success': False,
-                        'error': result.get('error', f'Failed to publish to {platform.title()}'),
-                        'details': result,
-                        'has_image': result.get('has_image', False)
-                    })
-                
-            except Exception as e:
-                error_msg = f'Publishing exception for {platform}: {str(e)}'
-                print(f"EXCEPTION: {error_msg}")
-                import traceback
-                print(f"Traceback: {traceback.format_exc()}")
-                results.append({
-                    'platform': platform,
-                    'success': False,
-                    'error': error_msg,
-                    'exception': str(e)
-                })
-        
+            print(f"Social account found for {platform}: {social_account.account_name} (ID: {social_account.account_id})")
+            accounts_to_publish[platform] = social_account
+        
+        # Write one publish intent per platform in a single transaction, then deliver them right away.
+        # Transient failures stay in the outbox and are retried by the scheduler with backoff.
+        from src.services.publish_outbox_service import PublishOutboxService
+        outbox_service = PublishOutboxService()
+        image_url = post.generated_image_url if post.generated_image_url else None
+        client_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        
+        intents = [
+            outbox_service.enqueue(
+                user_id=current_user_id,
+                platform=platform,
+                content=post.content,
+                image_url=image_url,
+                post_id=post.id,
+                idempotency_key=f"publish:{post.id}:{platform}:{client_key}"[:120] if client_key else None
+            )
+            for platform in accounts_to_publish
+        ]
         db.session.commit()
         
+        print(f"Publishing to {list(accounts_to_publish)} in parallel (image: {bool(image_url)})")
+        for outcome in outbox_service.dispatch_intents(intents):
+            platform = outcome['platform']
+            print(f"{'SUCCESS' if outcome['success'] else 'FAILURE'}: {platform} posting {'successful' if outcome['success'] else 'failed'}")
+            if not outcome['success']:
+                print(f"Error details: {outcome.get('result')}")
+            results_by_platform[platform] = _publish_result(outcome)
+        
+        results = [results_by_platform[platform] for platform in platforms]
+        
         # Calculate success rate
         successful_posts = len([r for r in results if r['success']])
         total_platforms = len(platforms)
@@ -383,6 +377,158 @@ def publish_to_social_media():
         db.session.rollback()
         return jsonify({'error': error_msg}), 500
 
+@social_accounts_api_bp.route('/publish/bulk', methods=['POST'])
+@jwt_required()
+def bulk_publish_to_social_media():
+    """
+    Publish a post group or a selection of posts in one request.
+    
+    Body: either post_group_id (all posts of a multi-platform group) or
+    post_ids. Each post goes to the platform it was written for, unless
+    platforms is given, in which case every post goes to all of them.
+    
+    Posts and accounts are loaded in one query each, all publish intents are
+    written in one transaction and delivered in chunks of BULK_PUBLISH_BATCH_SIZE.
+    With ?stream=1 or Accept: application/x-ndjson, every chunk's results are
+    streamed as JSON lines as soon as they are in, followed by a summary line.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        data = request.get_json() or {}
+        
+        post_group_id = data.get('post_group_id')
+        post_ids = data.get('post_ids') or []
+        platforms = data.get('platforms') or []
+        
+        if not post_group_id and not post_ids:
+            return jsonify({'error': 'post_group_id or post_ids is required'}), 400
+        if post_group_id and not isinstance(post_group_id, str):
+            return jsonify({'error': 'post_group_id must be a string'}), 400
+        if post_ids and (not isinstance(post_ids, list) or not all(isinstance(i, int) for i in post_ids)):
+            return jsonify({'error': 'post_ids must be a list of post IDs'}), 400
+        if not isinstance(platforms, list) or not all(isinstance(p, str) for p in platforms):
+            return jsonify({'error': 'platforms must be a list of platform names'}), 400
+        platforms = list(dict.fromkeys(platforms))
+        
+        max_items = current_app.config.get('BULK_PUBLISH_MAX_ITEMS', 500)
+        query = Post.query.filter(Post.user_id == current_user_id)
+        if post_group_id:
+            query = query.filter(Post.post_group_id == post_group_id)
+        if post_ids:
+            query = query.filter(Post.id.in_(post_ids))
+        posts = query.order_by(Post.id).all()
+        
+        if not posts:
+            return jsonify({'error': 'No posts found'}), 404
+        
+        # Requested ids keep their order; ids that are not the user's are reported as not found
+        posts_by_id = {post.id: post for post in posts}
+        order = list(dict.fromkeys(post_ids)) if post_ids else [post.id for post in posts]
+        
+        supported_platforms = ['linkedin', 'facebook', 'twitter', 'instagram']
+        items = []
+        for post_id in order:
+            post = posts_by_id.get(post_id)
+            if not post:
+                items.append((post_id, None, None))
+                continue
+            for platform in (platforms or [post.platform]):
+                items.append((post_id, post, platform))
+        
+        if len(items) > max_items:
+            return jsonify({'error': f'At most {max_items} publishes per request'}), 400
+        
+        social_accounts = SocialAccount.query.filter(
+            SocialAccount.user_id == current_user_id,
+            SocialAccount.platform.in_({platform for _, post, platform in items if platform in supported_platforms}),
+            SocialAccount.is_active == True
+        ).all()
+        accounts_by_platform = {}
+        for social_account in social_accounts:
+            accounts_by_platform.setdefault(social_account.platform, social_account)
+        
+        from src.services.publish_outbox_service import PublishOutboxService
+        outbox_service = PublishOutboxService()
+        client_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        
+        # Rejected items are reported right away; the others get one intent each, all in one transaction
+        results = []
+        pending = []
+        for post_id, post, platform in items:
+            if post is None:
+                results.append({'post_id': post_id, 'platform': None, 'success': False, 'error': 'Post not found'})
+            elif platform not in supported_platforms:
+                results.append({'post_id': post_id, 'platform': platform, 'success': False,
+                                'error': 'Unsupported platform' if platform else 'Post has no platform'})
+            elif platform not in accounts_by_platform:
+                results.append({'post_id': post_id, 'platform': platform, 'success': False,
+                                'error': f'No active {platform.title()} account found'})
+            else:
+                pending.append(outbox_service.enqueue(
+                    user_id=current_user_id,
+                    platform=platform,
+                    content=post.content,
+                    image_url=post.generated_image_url or None,
+                    post_id=post.id,
+                    idempotency_key=f"publish:{post.id}:{platform}:{client_key}"[:120] if client_key else None
+                ))
+        db.session.commit()
+        
+        print(f"Bulk publish for user {current_user_id}: {len(pending)} publishes, {len(results)} rejected")
+        batch_size = max(1, current_app.config.get('BULK_PUBLISH_BATCH_SIZE', 50))
+        
+        def publish_batches():
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                yield [
+                    dict(_publish_result(outcome), post_id=outcome['post_id'], external_id=outcome.get('external_id'))
+                    for outcome in outbox_service.dispatch_intents(batch)
+                ]
+        
+        def summary(all_results):
+            successful = len([r for r in all_results if r['success']])
+            return {
+                'message': f'Published {successful}/{len(all_results)} posts',
+                'total': len(all_results),
+                'successful': successful,
+                'failed': len(all_results) - successful,
+                'success_rate': f'{successful}/{len(all_results)}'
+            }
+        
+        streaming = request.args.get('stream', '').lower() in ('1', 'true') or \
+            request.accept_mimetypes.best == 'application/x-ndjson'
+        
+        if streaming:
+            def generate():
+                all_results = list(results)
+                for result in results:
+                    yield json.dumps(result) + '\n'
+                try:
+                    for batch_results in publish_batches():
+                        all_results.extend(batch_results)
+                        for result in batch_results:
+                            yield json.dumps(result) + '\n'
+                except Exception as e:
+                    # Undelivered intents stay in the outbox and are retried by the scheduler
+                    print(f"Bulk publish stream exception: {e}")
+                    db.session.rollback()
+                    yield json.dumps({'summary': True, 'error': f'Bulk publishing exception: {str(e)}'}) + '\n'
+                    return
+                yield json.dumps(dict(summary(all_results), summary=True)) + '\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        for batch_results in publish_batches():
+            results.extend(batch_results)
+        
+        return jsonify(dict(summary(results), results=results)), 200
+        
+    except Exception as e:
+        error_msg = f'Bulk publishing exception: {str(e)}'
+        print(f"ROUTE EXCEPTION: {error_msg}")
+        db.session.rollback()
+        return jsonify({'error': error_msg}), 500
+
 @social_accounts_api_bp.route('/platforms', methods=['GET'])
 def get_supported_platforms():
     """Get list of supported social media platforms with their features."""
@@ -438,6 +584,43 @@ def get_supported_platforms():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@social_accounts_api_bp.route('/publications', methods=['GET'])
+@jwt_required()
+def get_publications():
+    """Get the publishing history of the current user, newest first."""
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        status = request.args.get('status', 'published')
+        platform = request.args.get('platform')
+        post_id = request.args.get('post_id', type=int)
+        
+        query = Publication.query.filter_by(user_id=current_user_id, status=status)
+        if platform:
+            query = query.filter_by(platform=platform)
+        if post_id:
+            query = query.filter_by(post_id=post_id)
+        
+        order = Publication.published_at if status == 'published' else Publication.updated_at
+        pagination = query.order_by(order.desc(), Publication.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        
+        return jsonify({
+            'publications': [publication.to_dict() for publication in pagination.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': pagination.total,
+                'pages': pagination.pages
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @social_accounts_api_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_social_media_stats():
@@ -455,33 +638,35 @@ def get_social_media_stats():
             user_id=current_user_id, is_active=True
         ).count()
         
-        # Get published posts by platform
-        published_posts = {}
-        for platform in ['linkedin', 'facebook', 'twitter', 'instagram']:
-            count = Post.query.filter_by(
-                user_id=current_user_id, platform=platform, is_posted=True
-            ).count()
-            published_posts[platform] = count
-        
-        # Get total published posts
-        total_published = Post.query.filter_by(
-            user_id=current_user_id, is_posted=True
-        ).count()
-        
-        # Get recent activity (last 30 days)
+        # Publications by platform and status, with the last 30 days, in one aggregate
         from datetime import timedelta
+        from sqlalchemy import case, func
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_posts = Post.query.filter(
-            Post.user_id == current_user_id,
-            Post.is_posted == True,
-            Post.posted_at >= thirty_days_ago
-        ).count()
+        rows = db.session.query(
+            Publication.platform,
+            Publication.status,
+            func.count(Publication.id),
+            func.sum(case((Publication.published_at >= thirty_days_ago, 1), else_=0))
+        ).filter(
+            Publication.user_id == current_user_id
+        ).group_by(Publication.platform, Publication.status).all()
+        
+        published_posts = {platform: 0 for platform in ['linkedin', 'facebook', 'twitter', 'instagram']}
+        failed_posts = dict(published_posts)
+        recent_posts = 0
+        for platform, status, count, recent in rows:
+            if status == 'published':
+                published_posts[platform] = published_posts.get(platform, 0) + count
+                recent_posts += recent or 0
+            elif status == 'failed':
+                failed_posts[platform] = failed_posts.get(platform, 0) + count
         
         return jsonify({
             'connected_accounts': connected_accounts,
             'total_platforms': 4,
             'published_posts': published_posts,
-            'total_published': total_published,
+            'failed_posts': failed_posts,
+            'total_published': sum(published_posts.values()),
             'recent_posts': recent_posts,
             'connection_rate': f'{connected_accounts}/4'
         }), 200
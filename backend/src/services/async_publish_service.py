@@ -0,0 +1,573 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy.exc import IntegrityError
+from src.models import db, MediaAsset
+from src.services.rate_limit_service import parse_rate_limit_headers
+from src.services.social_media_service import STAGE_PRE_SEND, STAGE_CREATE
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+class _EventLoopThread:
+    """An asyncio event loop running forever in a daemon thread."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, daemon=True, name='async-publish-loop')
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine):
+        """Run a coroutine on the loop and wait for its result from the calling thread."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+# One loop per process, started lazily (i.e. after gunicorn has forked its workers)
+_loop_lock = threading.Lock()
+_loop_thread = None
+
+def _get_loop_thread() -> _EventLoopThread:
+    global _loop_thread
+    with _loop_lock:
+        if _loop_thread is None or _loop_thread.pid != os.getpid():
+            _loop_thread = _EventLoopThread()
+        return _loop_thread
+
+def is_async_publishing_available() -> bool:
+    """True if aiohttp is installed."""
+    return aiohttp is not None
+
+class _Response:
+    """Fully read aiohttp response, shaped like the requests responses SocialMediaService expects."""
+
+    def __init__(self, status_code: int, headers, text: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+class AsyncPublishEngine:
+    """
+    Publishing engine that keeps many platform calls in flight on one event loop.
+
+    The HTTP part of SocialMediaService's publish methods (image download,
+    LinkedIn register/upload/post, Facebook, Instagram and Twitter calls) is
+    run concurrently on a per-process event loop with a pooled aiohttp
+    session limited per host, so a worker thread waits for a whole batch
+    instead of blocking on each call. Database work stays in the calling
+    thread: images are fetched and hashed first, cached LinkedIn assets are
+    looked up in one query, and newly uploaded assets are stored afterwards.
+    Each image URL is downloaded once per batch and each (account, image)
+    uploaded once; images uploaded ahead of time by the warm-up stage are
+    not touched at all.
+    """
+
+    DEFAULT_CONCURRENCY = 200
+    DEFAULT_POOL_SIZE = 100
+    DEFAULT_LIMIT_PER_HOST = 20
+
+    def __init__(self, social_service, concurrency: Optional[int] = None, pool_size: Optional[int] = None,
+                 limit_per_host: Optional[int] = None):
+        config = current_app.config if has_app_context() else {}
+        self.social_service = social_service
+        self.concurrency = concurrency or config.get('ASYNC_PUBLISH_CONCURRENCY', self.DEFAULT_CONCURRENCY)
+        self.pool_size = pool_size or config.get('ASYNC_HTTP_POOL_SIZE', self.DEFAULT_POOL_SIZE)
+        self.limit_per_host = limit_per_host or config.get('ASYNC_HTTP_LIMIT_PER_HOST', self.DEFAULT_LIMIT_PER_HOST)
+        self.connect_timeout = config.get('HTTP_CONNECT_TIMEOUT', 5)
+        self.read_timeout = config.get('HTTP_READ_TIMEOUT', 30)
+        self.max_retries = config.get('HTTP_MAX_RETRIES', 3)
+        self.spool_max_bytes = config.get('IMAGE_SPOOL_MAX_BYTES', 1024 * 1024)
+        self._session = None
+        self._session_loop = None
+
+    def _get_session(self, loop) -> 'aiohttp.ClientSession':
+        """Pooled session of this engine; must be called on the event loop."""
+        if self._session is None or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            )
+            self._session_loop = loop
+        return self._session
+
+    # Entry point (calling thread, inside an app context)
+    def publish(self, tasks: List[Tuple[str, Any, str, Optional[str], Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        Publish a batch concurrently.
+
+        Newly uploaded LinkedIn assets are added to the current transaction;
+        the caller commits.
+
+        Args:
+            tasks: (platform, SocialAccount or None, content, image_url, media_asset) tuples;
+                   media_asset is the platform media id if the image was uploaded ahead of time
+
+        Returns:
+            One result per task, in order, shaped like SocialMediaService.publish_with_account results
+        """
+        service = self.social_service
+        results = [None] * len(tasks)
+        jobs = []
+        for index, (platform, account, content, image_url, media_asset) in enumerate(tasks):
+            if account is None or not account.is_active:
+                results[index] = {
+                    'success': False,
+                    'error': f'No active {platform.title()} account found',
+                    'permanent': True,
+                    'error_class': 'auth'
+                }
+            elif platform not in service.http_publish_platforms:
+                results[index] = service._simulated_post(platform)
+            else:
+                # Plain snapshot, so the event loop never touches ORM state
+                snapshot = SimpleNamespace(id=account.id, account_id=account.account_id,
+                                           access_token=account.access_token)
+                jobs.append((index, platform, snapshot, content, image_url, media_asset))
+        if not jobs:
+            return results
+
+        image_urls = {
+            image_url for _, platform, _, _, image_url, media_asset in jobs
+            if image_url and not media_asset and self._needs_image_bytes(platform, image_url)
+        }
+        loop_thread = _get_loop_thread()
+        images = {}
+        try:
+            try:
+                images = loop_thread.run(self._fetch_images(image_urls)) if image_urls else {}
+                cached_assets = self._load_cached_assets(jobs, images)
+            except Exception as e:
+                # Nothing was sent to any platform yet
+                logger.error(f"Preparing the publish batch failed: {_describe(e)}")
+                for index, platform, _, _, _, _ in jobs:
+                    results[index] = {'success': False, 'platform': platform,
+                                      'error': f'Publishing preparation failed: {_describe(e)}',
+                                      'exception': _describe(e), 'stage': STAGE_PRE_SEND}
+                return results
+
+            outcomes = loop_thread.run(self._publish_jobs(jobs, images, cached_assets))
+            for (index, _, _, _, _, _), (result, _) in zip(jobs, outcomes):
+                results[index] = result
+            try:
+                self._remember_assets([asset for _, asset in outcomes if asset])
+            except Exception as e:
+                # Only the asset cache is lost; the results of the posts that went out must be recorded
+                logger.warning(f"Could not cache uploaded media assets: {_describe(e)}")
+        finally:
+            for image in images.values():
+                if image.get('path'):
+                    os.unlink(image['path'])
+        return results
+
+    @staticmethod
+    def _needs_image_bytes(platform: str, image_url: str) -> bool:
+        # Facebook and Instagram fetch public image URLs themselves
+        if platform in ('linkedin', 'twitter'):
+            return True
+        return platform == 'facebook' and image_url.startswith('data:image/')
+
+    def _load_cached_assets(self, jobs, images) -> Dict[Tuple[int, str], str]:
+        """Look up already uploaded LinkedIn assets of the batch in one query."""
+        account_ids = set()
+        hashes = set()
+        for _, platform, account, _, image_url, media_asset in jobs:
+            image = images.get(image_url) if image_url and not media_asset else None
+            if platform == 'linkedin' and image and image.get('success'):
+                account_ids.add(account.id)
+                hashes.add(image['content_hash'])
+        if not account_ids:
+            return {}
+
+        assets = MediaAsset.query.filter(
+            MediaAsset.social_account_id.in_(account_ids),
+            MediaAsset.content_hash.in_(hashes)
+        ).all()
+        now = datetime.utcnow()
+        for asset in assets:
+            asset.last_used_at = now
+        return {(asset.social_account_id, asset.content_hash): asset.asset_urn for asset in assets}
+
+    def _remember_assets(self, assets: List[Dict[str, Any]]):
+        for asset in assets:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(MediaAsset(
+                        social_account_id=asset['social_account_id'],
+                        platform='linkedin',
+                        content_hash=asset['content_hash'],
+                        asset_urn=asset['asset_urn'],
+                        size_bytes=asset['size']
+                    ))
+            except IntegrityError:
+                # Stored concurrently by another worker
+                pass
+
+    # Event loop side
+    async def _fetch_images(self, image_urls) -> Dict[str, Dict[str, Any]]:
+        session = self._get_session(asyncio.get_running_loop())
+        image_urls = list(image_urls)
+        images = await asyncio.gather(*(self._fetch_image(session, url) for url in image_urls))
+        return dict(zip(image_urls, images))
+
+    async def _fetch_image(self, session, image_url: str) -> Dict[str, Any]:
+        """
+        Download or decode an image and hash it.
+
+        Images up to IMAGE_SPOOL_MAX_BYTES stay in memory, larger ones are
+        written to a temporary file that every upload of the batch streams from.
+        """
+        buffer = _ImageBuffer(self.spool_max_bytes)
+        try:
+            if image_url.startswith('data:image/'):
+                await asyncio.to_thread(buffer.write_data_url, image_url)
+                return buffer.finish()
+
+            for attempt in range(self.max_retries + 1):
+                async with session.get(image_url) as response:
+                    if response.status in (429, 500, 502, 503, 504) and attempt < self.max_retries:
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                        continue
+                    if response.status != 200:
+                        buffer.discard()
+                        return {
+                            'success': False,
+                            'error': f'Failed to download image from {image_url[:100]}: {response.status}',
+                            'step': 'download_image'
+                        }
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        buffer.write(chunk)
+                    return buffer.finish()
+        except Exception as e:
+            buffer.discard()
+            return {'success': False, 'error': f'Image processing failed: {_describe(e)}', 'step': 'download_image'}
+
+    async def _publish_jobs(self, jobs, images, cached_assets) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        session = self._get_session(asyncio.get_running_loop())
+        semaphore = asyncio.Semaphore(self.concurrency)
+        uploads = {}  # (account id, content hash) -> upload task shared by the batch
+
+        async def run(job):
+            _, platform, account, content, image_url, media_asset = job
+            image = images.get(image_url) if image_url else None
+            # Set to STAGE_CREATE by the post methods right before the request that creates the post
+            progress = {'stage': STAGE_PRE_SEND}
+            async with semaphore:
+                try:
+                    if platform == 'linkedin':
+                        return await self._post_to_linkedin(session, account, content, image_url, image,
+                                                            cached_assets, uploads, media_asset, progress)
+                    if platform == 'facebook':
+                        return await self._post_to_facebook(session, account, content, image_url, image,
+                                                            media_asset, progress), None
+                    if platform == 'twitter':
+                        return await self._post_to_twitter(session, account, content, image_url, image,
+                                                           media_asset, progress), None
+                    if platform == 'instagram':
+                        return await self._post_to_instagram(session, account, content, image_url, media_asset,
+                                                             progress), None
+                    return {'success': False, 'platform': platform, 'error': f'Unsupported platform: {platform}',
+                            'permanent': True}, None
+                except Exception as e:
+                    error_msg = f"{platform.title()} posting exception: {_describe(e)}"
+                    logger.warning(error_msg)
+                    # A read timeout or reset after the create request was sent leaves the outcome unknown
+                    stage = STAGE_PRE_SEND if _never_sent(e) else progress['stage']
+                    return {'success': False, 'platform': platform, 'error': error_msg, 'exception': _describe(e),
+                            'stage': stage}, None
+
+        return await asyncio.gather(*(run(job) for job in jobs))
+
+    async def _request(self, session, method: str, url: str, **kwargs) -> _Response:
+        async with session.request(method, url, **kwargs) as response:
+            return _Response(response.status, response.headers, await response.text())
+
+    @staticmethod
+    def _body(image: Dict[str, Any]):
+        """Request body for an image: bytes, or a file streamed by aiohttp."""
+        return image['data'] if image.get('data') is not None else open(image['path'], 'rb')
+
+    async def _upload_image_to_linkedin(self, session, account, image: Dict[str, Any]) -> Dict[str, Any]:
+        service = self.social_service
+        register_response = await self._request(
+            session, 'POST', f'{service.linkedin_api_url}/v2/assets?action=registerUpload',
+            json=service._linkedin_register_data(account),
+            headers=service._linkedin_headers(account)
+        )
+        if register_response.status_code != 200:
+            return {
+                'success': False,
+                'error': f'LinkedIn upload registration failed: {register_response.status_code} - {register_response.text}',
+                'step': 'register_upload',
+                'status_code': register_response.status_code,
+                'rate_limit': parse_rate_limit_headers(register_response.headers)
+            }
+
+        register_result = register_response.json()
+        upload_url = register_result['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
+        asset_id = register_result['value']['asset']
+
+        body = self._body(image)
+        try:
+            upload_response = await self._request(
+                session, 'PUT', upload_url, data=body,
+                headers={'Authorization': f'Bearer {account.access_token}'},
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=120)
+            )
+        finally:
+            if not isinstance(body, bytes):
+                body.close()
+        if upload_response.status_code not in (200, 201):
+            return {
+                'success': False,
+                'error': f'LinkedIn image upload failed: {upload_response.status_code} - {upload_response.text}',
+                'step': 'binary_upload',
+                'status_code': upload_response.status_code,
+                'rate_limit': parse_rate_limit_headers(upload_response.headers),
+                'upload_url': upload_url
+            }
+        return {'success': True, 'asset_id': asset_id, 'upload_url': upload_url}
+
+    async def _post_to_linkedin(self, session, account, content, image_url, image, cached_assets, uploads,
+                                media_asset=None, progress=None):
+        service = self.social_service
+        new_asset = None
+        if image_url and not media_asset:
+            if not image.get('success'):
+                return {'success': False, 'platform': 'linkedin',
+                        'error': f"Image upload failed: {image.get('error')}", 'upload_details': image,
+                        'stage': STAGE_PRE_SEND}, None
+
+            key = (account.id, image['content_hash'])
+            media_asset = cached_assets.get(key)
+            if media_asset is None:
+                # Several posts of the batch with the same image and account share one upload
+                first_upload = key not in uploads
+                if first_upload:
+                    uploads[key] = asyncio.ensure_future(self._upload_image_to_linkedin(session, account, image))
+                upload_result = await asyncio.shield(uploads[key])
+                if not upload_result.get('success'):
+                    return {
+                        'success': False,
+                        'platform': 'linkedin',
+                        'error': f"Image upload failed: {upload_result.get('error')}",
+                        'status_code': upload_result.get('status_code'),
+                        'rate_limit': upload_result.get('rate_limit'),
+                        'upload_details': upload_result,
+                        'stage': STAGE_PRE_SEND
+                    }, None
+                media_asset = upload_result['asset_id']
+                if first_upload:
+                    new_asset = {
+                        'social_account_id': account.id,
+                        'content_hash': image['content_hash'],
+                        'asset_urn': media_asset,
+                        'size': image['size']
+                    }
+
+        _mark_create(progress)
+        response = await self._request(
+            session, 'POST', f'{service.linkedin_api_url}/v2/ugcPosts',
+            json=service._linkedin_post_data(account, content, media_asset),
+            headers=service._linkedin_headers(account)
+        )
+        if response.status_code != 201:
+            result = service._api_result('linkedin', response, has_image=bool(image_url))
+            result['media_asset'] = media_asset
+            return result, new_asset
+
+        response_data = response.json()
+        return {
+            'success': True,
+            'platform': 'linkedin',
+            'post_id': response_data.get('id', 'unknown'),
+            'message': f'Post successfully published to LinkedIn{"" if not image_url else " with image"}',
+            'has_image': bool(image_url),
+            'media_asset': media_asset,
+            'response': response_data,
+            'status_code': response.status_code,
+            'rate_limit': parse_rate_limit_headers(response.headers)
+        }, new_asset
+
+    async def _post_to_facebook(self, session, account, content, image_url, image, media_asset=None, progress=None):
+        service = self.social_service
+        url = f'{service.facebook_graph_url}/{account.account_id}'
+        body = None
+        try:
+            if image_url and not media_asset and image_url.startswith('data:image/') and not image.get('success'):
+                return {'success': False, 'platform': 'facebook', 'error': f"Image upload failed: {image.get('error')}",
+                        'stage': STAGE_PRE_SEND}
+            # Every request below publishes the post (feed post or photo with caption)
+            _mark_create(progress)
+            if not image_url:
+                response = await self._request(session, 'POST', f'{url}/feed',
+                                               data={'message': content, 'access_token': account.access_token})
+            elif media_asset:
+                response = await self._request(session, 'POST', f'{url}/feed', data={
+                    'message': content,
+                    'attached_media': json.dumps([{'media_fbid': media_asset}]),
+                    'access_token': account.access_token
+                })
+            elif image_url.startswith('data:image/'):
+                body = self._body(image)
+                form = aiohttp.FormData()
+                form.add_field('caption', content)
+                form.add_field('access_token', account.access_token)
+                form.add_field('source', body, filename='image')
+                response = await self._request(session, 'POST', f'{url}/photos', data=form)
+            else:
+                response = await self._request(session, 'POST', f'{url}/photos', data={
+                    'caption': content, 'url': image_url, 'access_token': account.access_token
+                })
+        finally:
+            if body is not None and not isinstance(body, bytes):
+                body.close()
+
+        post_id = None
+        if response.status_code == 200:
+            response_data = response.json()
+            post_id = response_data.get('post_id') or response_data.get('id')
+        return service._api_result('facebook', response, post_id, bool(image_url))
+
+    async def _post_to_twitter(self, session, account, content, image_url, image, media_asset=None, progress=None):
+        service = self.social_service
+        headers = {'Authorization': f'Bearer {account.access_token}'}
+        tweet = {'text': content}
+        if image_url and media_asset:
+            tweet['media'] = {'media_ids': [media_asset]}
+        elif image_url:
+            if not image.get('success'):
+                return {'success': False, 'platform': 'twitter', 'error': f"Image upload failed: {image.get('error')}",
+                        'stage': STAGE_PRE_SEND}
+            body = self._body(image)
+            try:
+                form = aiohttp.FormData()
+                form.add_field('media_category', 'tweet_image')
+                form.add_field('media', body, filename='image')
+                upload_response = await self._request(session, 'POST', f'{service.twitter_api_url}/2/media/upload',
+                                                      data=form, headers=headers)
+            finally:
+                if not isinstance(body, bytes):
+                    body.close()
+            if upload_response.status_code not in (200, 201):
+                result = service._api_result('twitter', upload_response, has_image=True)
+                result['error'] = f"Image upload failed: {result['error']}"
+                return result
+            tweet['media'] = {'media_ids': [str(upload_response.json()['data']['id'])]}
+
+        _mark_create(progress)
+        response = await self._request(session, 'POST', f'{service.twitter_api_url}/2/tweets',
+                                       json=tweet, headers=headers)
+        post_id = response.json().get('data', {}).get('id') if response.status_code == 201 else None
+        return service._api_result('twitter', response, post_id, bool(image_url))
+
+    async def _post_to_instagram(self, session, account, content, image_url, media_asset=None, progress=None):
+        service = self.social_service
+        if not image_url or not image_url.startswith('http'):
+            return {
+                'success': False,
+                'platform': 'instagram',
+                'error': 'Instagram posts require a publicly reachable image URL',
+                'permanent': True
+            }
+
+        url = f'{service.instagram_graph_url}/v21.0/{account.account_id}'
+        if not media_asset:
+            container_response = await self._request(session, 'POST', f'{url}/media', data={
+                'image_url': image_url, 'caption': content, 'access_token': account.access_token
+            })
+            if container_response.status_code != 200:
+                return service._api_result('instagram', container_response, has_image=True)
+            media_asset = container_response.json()['id']
+
+        _mark_create(progress)
+        response = await self._request(session, 'POST', f'{url}/media_publish', data={
+            'creation_id': media_asset, 'access_token': account.access_token
+        })
+        post_id = response.json().get('id') if response.status_code == 200 else None
+        return service._api_result('instagram', response, post_id, True)
+
+class _ImageBuffer:
+    """Collects image bytes in memory, spilling to a temporary file above max_bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.chunks = []
+        self.file = None
+
+    def write(self, chunk: bytes):
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        if self.file is None and self.size > self.max_bytes:
+            self.file = tempfile.NamedTemporaryFile(prefix='publish-image-', delete=False)
+            for buffered in self.chunks:
+                self.file.write(buffered)
+            self.chunks = []
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.chunks.append(chunk)
+
+    def write_data_url(self, image_url: str):
+        _, data = image_url.split(',', 1)
+        # Decode in multiples of 4 characters so every chunk is valid base64
+        step = CHUNK_SIZE // 3 * 4
+        for offset in range(0, len(data), step):
+            self.write(base64.b64decode(data[offset:offset + step]))
+
+    def finish(self) -> Dict[str, Any]:
+        image = {'success': True, 'content_hash': self.digest.hexdigest(), 'size': self.size,
+                 'data': None, 'path': None}
+        if self.file is not None:
+            self.file.close()
+            image['path'] = self.file.name
+        else:
+            image['data'] = b''.join(self.chunks)
+        return image
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            os.unlink(self.file.name)
+            self.file = None
+
+def _describe(error: Exception) -> str:
+    # Timeouts have no message
+    return str(error) or error.__class__.__name__
+
+def _mark_create(progress: Optional[Dict[str, str]]):
+    if progress is not None:
+        progress['stage'] = STAGE_CREATE
+
+def _never_sent(error: Exception) -> bool:
+    """True if an aiohttp exception shows the connection was never established."""
+    if aiohttp is None:
+        return False
+    # ConnectionTimeoutError (sock_connect) exists since aiohttp 3.10; older versions raise ServerTimeoutError for both
+    connect_timeout = getattr(aiohttp, 'ConnectionTimeoutError', None)
+    return isinstance(error, aiohttp.ClientConnectorError) or (
+        connect_timeout is not None and isinstance(error, connect_timeout)
+    )
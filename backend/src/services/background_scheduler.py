@@ -1,18 +1,115 @@
+import heapq
 import threading
-import time
 import logging
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+class DueTimeQueue:
+    """
+    Min-heap of the due times of upcoming scheduled posts.
+    
+    Every post has one current due time. Rescheduling pushes a new entry and
+    cancelling forgets the post; entries that no longer match are dropped
+    when they reach the top of the heap (lazy deletion). With a warm-up lead,
+    a second entry fires that long before the due time.
+    """
+    
+    def __init__(self):
+        self._heap = []  # (fire_at, scheduled_post_id, due_time)
+        self._due_times = {}  # scheduled_post_id -> current due time
+    
+    def __len__(self):
+        return len(self._due_times)
+    
+    def set(self, scheduled_post_id, due_time, warmup_lead=None):
+        """Add a post or move it to a new due time."""
+        if self._due_times.get(scheduled_post_id) == due_time:
+            return
+        self._due_times[scheduled_post_id] = due_time
+        heapq.heappush(self._heap, (due_time, scheduled_post_id, due_time))
+        if warmup_lead:
+            heapq.heappush(self._heap, (due_time - warmup_lead, scheduled_post_id, due_time))
+    
+    def discard(self, scheduled_post_id):
+        """Forget a post, e.g. after it was cancelled or published elsewhere."""
+        self._due_times.pop(scheduled_post_id, None)
+    
+    def next_fire_time(self):
+        """Earliest time an entry fires, or None if the queue is empty."""
+        while self._heap:
+            _, scheduled_post_id, due_time = self._heap[0]
+            if self._due_times.get(scheduled_post_id) == due_time:
+                return self._heap[0][0]
+            heapq.heappop(self._heap)
+        return None
+    
+    def pop_due(self, now):
+        """
+        Remove all entries that fire at or before now.
+        
+        Posts whose due time has come leave the queue.
+        
+        Returns:
+            Number of live entries that fired
+        """
+        fired = 0
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, scheduled_post_id, due_time = heapq.heappop(self._heap)
+            if self._due_times.get(scheduled_post_id) != due_time:
+                continue
+            fired += 1
+            if fire_at == due_time:
+                del self._due_times[scheduled_post_id]
+        return fired
+
 class BackgroundScheduler:
-    """Background service for processing scheduled posts."""
+    """
+    Timer-driven background service for processing scheduled posts.
+    
+    The due times of scheduled posts within the horizon are kept in a
+    DueTimeQueue and the scheduler sleeps exactly until the next one (or its
+    warm-up, or the next outbox retry). Schedule, reschedule and cancel in
+    this process update the queue right away via notify(). Changes made by
+    other processes are picked up incrementally from ScheduledPost.updated_at
+    every sync interval, and the queue is rebuilt from the database when the
+    scheduler starts and every reconcile interval, so it stays correct across
+    restarts.
     
-    def __init__(self, check_interval=60):  # Check every 60 seconds
-        self.check_interval = check_interval
+    Any number of processes may run a scheduler (web workers, the standalone
+    scheduler_worker.py); only the one holding the 'scheduler' lease is
+    active. The others stand by and only try to take the lease over, which
+    succeeds once the leader stopped renewing it.
+    """
+    
+    def __init__(self, app, sync_interval=15, reconcile_interval=300, horizon_minutes=60, leader_lease_seconds=60):
+        from src.services.leader_election_service import LeaderElection
+        
+        self.app = app
+        self.sync_interval = timedelta(seconds=sync_interval)
+        self.reconcile_interval = timedelta(seconds=reconcile_interval)
+        self.horizon = timedelta(minutes=horizon_minutes)
         self.scheduler_service = None  # Initialize later to avoid app context issues
         self.running = False
         self.thread = None
+        
+        self.queue = DueTimeQueue()
+        self._condition = threading.Condition()
+        self._loaded_until = None  # Due times up to here are in the queue
+        self._last_sync = None
+        self._next_sync = None
+        self._next_reconcile = None
+        self._next_retry_at = None  # Earliest pending outbox intent
+        
+        self.leader_election = LeaderElection('scheduler', lease_seconds=leader_lease_seconds)
+        # Renew well before the lease runs out, so one slow iteration does not lose it
+        self.leader_check_interval = self.leader_election.lease / 3
+        self.is_leader = False
+        self._next_leader_check = None
+        self._lease_lock = threading.Lock()  # Drain threads renew the lease between batches
+        
+        warmup_enabled = app.config.get('PUBLISH_WARMUP_ENABLED', True)
+        self.warmup_lead = timedelta(minutes=app.config.get('PUBLISH_WARMUP_MINUTES', 15)) if warmup_enabled else None
     
     def _get_scheduler_service(self):
         """Get scheduler service, initializing if needed."""
@@ -30,7 +127,8 @@ class BackgroundScheduler:
         self.running = True
         self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
         self.thread.start()
-        logger.info(f"Background scheduler started with {self.check_interval}s interval")
+        logger.info(f"Background scheduler started (sync every {self.sync_interval.total_seconds():.0f}s, "
+                    f"horizon {self.horizon})")
     
     def stop(self):
         """Stop the background scheduler."""
@@ -38,106 +136,273 @@ class BackgroundScheduler:
             logger.warning("Background scheduler is not running")
             return
         
-        self.running = False
+        with self._condition:
+            self.running = False
+            self._condition.notify()
         if self.thread:
             self.thread.join(timeout=5)
+        if self.is_leader:
+            try:
+                with self.app.app_context():
+                    self.leader_election.release()
+            except Exception as e:
+                logger.error(f"Could not release scheduler lease: {e}")
+            self.is_leader = False
         logger.info("Background scheduler stopped")
     
+    def notify(self, scheduled_post_id, scheduled_time=None):
+        """
+        Update the queue after a post was scheduled or rescheduled (with its
+        new UTC scheduled_time) or cancelled (scheduled_time None).
+        """
+        with self._condition:
+            if scheduled_time is not None and self._loaded_until is not None and scheduled_time <= self._loaded_until:
+                self.queue.set(scheduled_post_id, scheduled_time, self.warmup_lead)
+            else:
+                self.queue.discard(scheduled_post_id)
+            self._condition.notify()
+    
     def _run_scheduler(self):
         """Main scheduler loop."""
         logger.info("Background scheduler loop started")
         
         while self.running:
+            now = datetime.utcnow()
             try:
-                # Process scheduled posts
-                scheduler_service = self._get_scheduler_service()
-                results = scheduler_service.process_scheduled_posts()
-                
-                if results['total_processed'] > 0:
-                    logger.info(f"Processed {results['total_processed']} scheduled posts: "
-                               f"{results['successful']} successful, {results['failed']} failed")
+                with self.app.app_context():
+                    if self._keep_lease():
+                        if self._next_reconcile is None or now >= self._next_reconcile:
+                            self._reconcile(now)
+                        elif now >= self._next_sync:
+                            self._sync(now)
+                        
+                        with self._condition:
+                            fired = self.queue.pop_due(now)
+                        if fired or (self._next_retry_at is not None and self._next_retry_at <= now):
+                            self._process()
                     
-                    if results['errors']:
-                        for error in results['errors']:
-                            logger.error(f"Scheduler error: {error}")
-                
-                # Wait for next check
-                time.sleep(self.check_interval)
-                
             except Exception as e:
                 logger.error(f"Error in background scheduler: {e}")
-                # Continue running even if there's an error
-                time.sleep(self.check_interval)
+                # Continue running even if there's an error; retry after the sync interval
+                self._next_sync = now + self.sync_interval
+                self._next_retry_at = now + self.sync_interval
+            
+            # Sleep until the next timer, a notify() or stop()
+            with self._condition:
+                if not self.running:
+                    break
+                wait = (self._next_wakeup() - datetime.utcnow()).total_seconds()
+                if wait > 0:
+                    self._condition.wait(wait)
         
         logger.info("Background scheduler loop ended")
+    
+    def _next_wakeup(self):
+        if not self.is_leader:
+            return self._next_leader_check
+        times = [self._next_leader_check, self._next_sync, self._next_reconcile, self._next_retry_at,
+                 self.queue.next_fire_time()]
+        return min(t for t in times if t is not None)
+    
+    def _keep_lease(self):
+        """
+        Renew the lease (or try to take it over) once the leader check is due.
+        
+        Called every iteration and, during a run, before every claimed batch,
+        so a long drain never outlives the lease while another process takes
+        over. Safe to call from the drain threads.
+        
+        Returns:
+            True while this process is the leader
+        """
+        with self._lease_lock:
+            now = datetime.utcnow()
+            if self._next_leader_check is None or now >= self._next_leader_check:
+                self._check_leadership(now)
+            return self.is_leader
+    
+    def _check_leadership(self, now):
+        """Renew the scheduler lease, or try to take it over while standing by."""
+        self._next_leader_check = now + self.leader_check_interval
+        try:
+            leader = self.leader_election.try_acquire()
+        except Exception as e:
+            from src.models import db
+            db.session.rollback()
+            logger.error(f"Scheduler leader election failed: {e}")
+            leader = False
+        
+        if leader and not self.is_leader:
+            logger.info(f"Scheduler {self.leader_election.holder} became leader")
+            self._next_reconcile = None  # Load the queue on the first iteration as leader
+        elif not leader and self.is_leader:
+            logger.warning(f"Scheduler {self.leader_election.holder} lost leadership, standing by")
+            with self._condition:
+                self.queue = DueTimeQueue()
+                self._loaded_until = None
+        self.is_leader = leader
+    
+    def status(self):
+        """State of this process's scheduler, for status endpoints."""
+        with self._condition:
+            next_fire_time = self.queue.next_fire_time()
+            return {
+                'running': self.running,
+                'holder': self.leader_election.holder,
+                'is_leader': self.is_leader,
+                'queued_posts': len(self.queue),
+                'next_fire_time': next_fire_time.isoformat() if next_fire_time else None,
+                'next_retry_at': self._next_retry_at.isoformat() if self._next_retry_at else None
+            }
+    
+    def _process(self):
+        """Warm up, enqueue and dispatch whatever is due."""
+        results = self._get_scheduler_service().process_scheduled_posts(keep_lease=self._keep_lease)
+        
+        if results['total_processed'] > 0:
+            logger.info(f"Processed {results['total_processed']} scheduled posts: "
+                       f"{results['successful']} successful, {results['failed']} failed")
+            
+            if results['errors']:
+                for error in results['errors']:
+                    logger.error(f"Scheduler error: {error}")
+        
+        next_retry_at = self._next_outbox_attempt()
+        if next_retry_at is not None and not results['total_processed'] and next_retry_at <= datetime.utcnow():
+            # Nothing could be claimed (e.g. a database error); do not spin
+            next_retry_at = datetime.utcnow() + self.sync_interval
+        self._next_retry_at = next_retry_at
+    
+    def _reconcile(self, now):
+        """Rebuild the queue from all scheduled (or claimed, or retrying) posts due within the horizon."""
+        from src.models import db, ScheduledPost
+        
+        # Occurrences of recurring schedules must exist before the queue is loaded
+        self._get_scheduler_service().materialize_recurring()
+        loaded_until = now + self.horizon
+        queue = DueTimeQueue()
+        last = None
+        # Keyset pagination, so a large backlog is loaded in chunks
+        while True:
+            query = db.session.query(
+                ScheduledPost.id, ScheduledPost.status, ScheduledPost.scheduled_time, ScheduledPost.lease_expires_at,
+            ScheduledPost.next_attempt_at
+            ).filter(
+                ScheduledPost.status.in_(['scheduled', 'publishing', 'retrying']),
+                ScheduledPost.scheduled_time <= loaded_until
+            )
+            if last is not None:
+                query = query.filter(
+                    (ScheduledPost.scheduled_time > last[1]) |
+                    ((ScheduledPost.scheduled_time == last[1]) & (ScheduledPost.id > last[0]))
+                )
+            rows = query.order_by(ScheduledPost.scheduled_time, ScheduledPost.id).limit(1000).all()
+            for row in rows:
+                self._apply(queue, row, loaded_until)
+            if len(rows) < 1000:
+                break
+            last = (rows[-1].id, rows[-1].scheduled_time)
+        
+        with self._condition:
+            self.queue = queue
+            self._loaded_until = loaded_until
+        # Changes committed while loading are picked up by the next sync
+        self._last_sync = now
+        self._next_sync = now + self.sync_interval
+        self._next_reconcile = now + min(self.reconcile_interval, self.horizon / 2)
+        self._next_retry_at = self._next_outbox_attempt()
+        db.session.commit()
+        logger.info(f"Scheduler queue reconciled: {len(queue)} posts due until {loaded_until}")
+    
+    def _sync(self, now):
+        """Apply scheduled posts changed since the last sync (also by other processes)."""
+        from src.models import db, ScheduledPost
+        
+        # Small overlap against clock skew between processes. Listing every status turns the
+        # filter into one range scan of ix_scheduled_posts_status_updated per status instead
+        # of a scan over all posts ever scheduled.
+        rows = db.session.query(
+            ScheduledPost.id, ScheduledPost.status, ScheduledPost.scheduled_time, ScheduledPost.lease_expires_at,
+            ScheduledPost.next_attempt_at
+        ).filter(
+            ScheduledPost.status.in_(ScheduledPost.STATUSES),
+            ScheduledPost.updated_at >= self._last_sync - timedelta(seconds=2)
+        ).all()
+        with self._condition:
+            for row in rows:
+                self._apply(self.queue, row, self._loaded_until)
+        
+        self._last_sync = now
+        self._next_sync = now + self.sync_interval
+        self._next_retry_at = self._next_outbox_attempt()
+        db.session.commit()
+    
+    def _apply(self, queue, row, loaded_until):
+        """Put a scheduled post row into the queue, or take it out if it is no longer waiting."""
+        if row.status == 'scheduled' and row.scheduled_time <= loaded_until:
+            queue.set(row.id, row.scheduled_time, self.warmup_lead)
+        elif row.status == 'retrying' and row.next_attempt_at is not None and row.next_attempt_at <= loaded_until:
+            queue.set(row.id, row.next_attempt_at)
+        elif row.status == 'publishing' and row.lease_expires_at is not None:
+            # Claimed by a worker; becomes claimable again if that worker dies
+            queue.set(row.id, row.lease_expires_at)
+        else:
+            queue.discard(row.id)
+    
+    def _next_outbox_attempt(self):
+        """Due time of the earliest pending outbox intent (retries and deferred publishes)."""
+        from sqlalchemy import func
+        from src.models import db, PublishIntent
+        
+        return db.session.query(func.min(PublishIntent.next_attempt_at)).filter(
+            PublishIntent.status == 'pending'
+        ).scalar()
 
 # Global scheduler instance
 _background_scheduler = None
 
 def get_background_scheduler():
-    """Get the global background scheduler instance."""
+    """Get the global background scheduler instance, or None if it was not started."""
+    return _background_scheduler
+
+def start_background_scheduler(app):
+    """Start the global background scheduler for an app."""
     global _background_scheduler
     if _background_scheduler is None:
-        _background_scheduler = BackgroundScheduler()
+        _background_scheduler = BackgroundScheduler(
+            app,
+            sync_interval=app.config.get('SCHEDULER_SYNC_INTERVAL', 15),
+            reconcile_interval=app.config.get('SCHEDULER_RECONCILE_INTERVAL', 300),
+            horizon_minutes=app.config.get('SCHEDULER_HORIZON_MINUTES', 60),
+            leader_lease_seconds=app.config.get('SCHEDULER_LEADER_LEASE_SECONDS', 60)
+        )
+    _background_scheduler.start()
     return _background_scheduler
 
-def start_background_scheduler():
-    """Start the global background scheduler."""
-    scheduler = get_background_scheduler()
-    scheduler.start()
-
 def stop_background_scheduler():
     """Stop the global background scheduler."""
-    scheduler = get_background_scheduler()
-    scheduler.stop()
+    if _background_scheduler is not None:
+        _background_scheduler.stop()
 
-# Simple in-memory scheduler for Render.com (since we can't use cron jobs)
-class SimpleScheduler:
-    """Simple in-memory scheduler that checks for posts to publish."""
-    
-    def __init__(self):
-        self.scheduler_service = None  # Initialize later to avoid app context issues
-        self.last_check = datetime.utcnow()
+def get_scheduler_status():
+    """
+    Scheduler state for status endpoints: this process's scheduler (None if
+    it does not run one) and the current holder of the scheduler lease.
     
-    def _get_scheduler_service(self):
-        """Get scheduler service, initializing if needed."""
-        if self.scheduler_service is None:
-            from src.services.scheduler_service import SchedulerService
-            self.scheduler_service = SchedulerService()
-        return self.scheduler_service
+    Must be called inside an application context.
+    """
+    from src.services.leader_election_service import LeaderElection
     
-    def check_and_process(self):
-        """Check for posts to publish and process them."""
-        try:
-            current_time = datetime.utcnow()
-            
-            # Only check every minute to avoid excessive processing
-            if (current_time - self.last_check).total_seconds() < 60:
-                return {'message': 'Too soon since last check'}
-            
-            self.last_check = current_time
-            
-            # Process scheduled posts
-            scheduler_service = self._get_scheduler_service()
-            results = scheduler_service.process_scheduled_posts()
-            
-            logger.info(f"Scheduler check at {current_time}: "
-                       f"processed {results['total_processed']} posts, "
-                       f"{results['successful']} successful, {results['failed']} failed")
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error in simple scheduler check: {e}")
-            return {'error': str(e)}
-
-# Global simple scheduler instance
-_simple_scheduler = None
+    return {
+        'local': _background_scheduler.status() if _background_scheduler is not None else None,
+        'leader': LeaderElection('scheduler').current()
+    }
 
-def get_simple_scheduler():
-    """Get the global simple scheduler instance."""
-    global _simple_scheduler
-    if _simple_scheduler is None:
-        _simple_scheduler = SimpleScheduler()
-    return _simple_scheduler
+def notify_scheduled_post(scheduled_post_id, scheduled_time=None):
+    """
+    Tell this process's background scheduler that a post was scheduled,
+    rescheduled (scheduled_time in UTC) or cancelled (scheduled_time None).
+    """
+    if _background_scheduler is not None and _background_scheduler.running:
+        _background_scheduler.notify(scheduled_post_id, scheduled_time)
 
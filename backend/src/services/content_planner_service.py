@@ -1,9 +1,10 @@
 import requests
 import json
+import re
 import uuid
 from bs4 import BeautifulSoup
 from flask import current_app
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from src.services.openai_service import OpenAIService
 
 class ContentPlannerService:
@@ -42,35 +43,7 @@ class ContentPlannerService:
             channels = channels or self.default_channels
             
             # Extract content from URLs
-            extracted_content = []
-            warnings = []
-            
-            for url in urls:
-                try:
-                    content = self._extract_website_content(url)
-                    # Always add content, even if it's just fallback content
-                    if content:
-                        extracted_content.append(f"URL: {url}\n{content}")
-                    else:
-                        # Create fallback content if extraction completely fails
-                        fallback_content = f"URL: {url}\nTitel: {url}\nInhalt: Website für Content-Analyse verfügbar."
-                        extracted_content.append(fallback_content)
-                        warnings.append(f"Could not extract detailed content from {url}, using fallback")
-                except Exception as e:
-                    # Always create fallback content instead of skipping
-                    fallback_content = f"URL: {url}\nTitel: {url}\nInhalt: Website für Content-Analyse verfügbar (Fehler: {str(e)[:100]})."
-                    extracted_content.append(fallback_content)
-                    warnings.append(f"Failed to process {url}: {str(e)}")
-            
-            # We should always have content now, but double-check
-            if not extracted_content:
-                # Create minimal fallback content from URLs
-                for url in urls:
-                    extracted_content.append(f"URL: {url}\nTitel: {url}\nInhalt: Website für grundlegende Content-Analyse verfügbar.")
-                warnings.append("Could not extract detailed content from any URL, using basic URL information")
-            
-            # Combine all extracted content
-            combined_context = "\n\n---\n\n".join(extracted_content)
+            combined_context, warnings = self._build_url_context(urls)
             
             # Generate ideas using OpenAI
             ideas = self._generate_ideas_with_openai(
@@ -127,6 +100,48 @@ class ContentPlannerService:
         except Exception as e:
             raise Exception(f"Error generating ideas from custom idea: {str(e)}")
     
+    def _build_url_context(self, urls: List[str]) -> Tuple[str, List[str]]:
+        """
+        Extract and combine website content for a list of URLs.
+        
+        Args:
+            urls: List of URLs to analyze
+            
+        Returns:
+            Tuple of combined context text and list of warnings
+        """
+        extracted_content = []
+        warnings = []
+        
+        for url in urls:
+            try:
+                content = self._extract_website_content(url)
+                # Always add content, even if it's just fallback content
+                if content:
+                    extracted_content.append(f"URL: {url}\n{content}")
+                else:
+                    # Create fallback content if extraction completely fails
+                    fallback_content = f"URL: {url}\nTitel: {url}\nInhalt: Website für Content-Analyse verfügbar."
+                    extracted_content.append(fallback_content)
+                    warnings.append(f"Could not extract detailed content from {url}, using fallback")
+            except Exception as e:
+                # Always create fallback content instead of skipping
+                fallback_content = f"URL: {url}\nTitel: {url}\nInhalt: Website für Content-Analyse verfügbar (Fehler: {str(e)[:100]})."
+                extracted_content.append(fallback_content)
+                warnings.append(f"Failed to process {url}: {str(e)}")
+        
+        # We should always have content now, but double-check
+        if not extracted_content:
+            # Create minimal fallback content from URLs
+            for url in urls:
+                extracted_content.append(f"URL: {url}\nTitel: {url}\nInhalt: Website für grundlegende Content-Analyse verfügbar.")
+            warnings.append("Could not extract detailed content from any URL, using basic URL information")
+        
+        # Combine all extracted content
+        combined_context = "\n\n---\n\n".join(extracted_content)
+        
+        return combined_context, warnings
+    
     def _extract_website_content(self, url: str) -> str:
         """
         Extract relevant content from a website URL.
@@ -256,10 +271,10 @@ class ContentPlannerService:
             # Return fallback content for any other errors
             return f"Titel: {url}\nInhalt: Fehler beim Extrahieren des Inhalts - URL ist verfügbar für grundlegende Analyse."
     
-    def _generate_ideas_with_openai(self, context: str, mode: str, limit: int,
-                                   persona: str, channels: List[str]) -> List[Dict[str, Any]]:
+    def _build_idea_payload(self, context: str, mode: str, limit: int,
+                            persona: str, channels: List[str]) -> Dict[str, Any]:
         """
-        Generate ideas using OpenAI based on context.
+        Build the chat completion payload for idea generation.
         
         Args:
             context: Content context (extracted from URLs or custom idea)
@@ -269,12 +284,11 @@ class ContentPlannerService:
             channels: Target channels
             
         Returns:
-            List of generated ideas
+            Request payload for the OpenAI chat completions API
         """
-        try:
-            # Create the prompt based on mode
-            if mode == "url":
-                user_prompt = f"""
+        # Create the prompt based on mode
+        if mode == "url":
+            user_prompt = f"""
 Lies folgenden Seiten-Kontext (gekürzt, konsolidiert aus URLs). Erzeuge {limit} Social-Media-Themenideen für {', '.join(channels)}, Persona "{persona}", Funnel-Mischung aus Awareness/Consideration/Decision.
 
 Antwortformat (ausschließlich valides JSON):
@@ -283,8 +297,8 @@ Antwortformat (ausschließlich valides JSON):
 Kontext:
 {context}
 """
-            else:  # mode == "idea"
-                user_prompt = f"""
+        else:  # mode == "idea"
+            user_prompt = f"""
 Ausgangsidee: {context}
 
 Erzeuge {limit} Social-Media-Themenideen für {', '.join(channels)}, Persona "{persona}", Funnel-Mischung aus Awareness/Consideration/Decision.
@@ -292,23 +306,80 @@ Erzeuge {limit} Social-Media-Themenideen für {', '.join(channels)}, Persona "{p
 Antwortformat (ausschließlich valides JSON):
 {{"ideas":[{{"title":"","hook":"","persona":"","funnel":"","channels":["LI"]}}]}}
 """
+        
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": "Du bist eine Content-Strategie-KI für KMU. Liefere ausschließlich valides JSON gemäß Schema. Erstelle vielfältige, praxisnahe Social-Media-Ideen mit klaren Hooks und passenden Funnel-Stufen."
+                },
+                {
+                    "role": "user", 
+                    "content": user_prompt
+                }
+            ],
+            "max_tokens": 2000,
+            "temperature": 0.8
+        }
+    
+    def _normalize_idea(self, idea: Dict[str, Any], index: int,
+                        persona: str, channels: List[str]) -> Dict[str, Any]:
+        """Normalize a raw idea from OpenAI into the planner idea schema."""
+        return {
+            "id": f"idea_{uuid.uuid4().hex}",
+            "title": idea.get('title', f'Idee {index+1}'),
+            "hook": idea.get('hook', 'Interessanter Hook für Social Media Post.'),
+            "persona": idea.get('persona', persona),
+            "funnel": idea.get('funnel', 'Awareness'),
+            "channels": idea.get('channels', channels)
+        }
+    
+    def _fallback_ideas(self, limit: int, persona: str, channels: List[str]) -> List[Dict[str, Any]]:
+        """Create generic fallback ideas when OpenAI returned none."""
+        fallback_ideas = []
+        for i in range(min(3, limit)):
+            fallback_ideas.append({
+                "id": f"idea_{uuid.uuid4().hex}",
+                "title": f"Content-Idee {i+1}",
+                "hook": "Spannender Hook für Ihre Zielgruppe.",
+                "persona": persona,
+                "funnel": ["Awareness", "Consideration", "Decision"][i % 3],
+                "channels": channels
+            })
+        return fallback_ideas
+    
+    def _parse_ideas_content(self, content: str) -> List[Dict[str, Any]]:
+        """Parse the complete JSON answer from OpenAI into a list of raw ideas."""
+        try:
+            ideas_data = json.loads(content)
+            return ideas_data.get('ideas', [])
+        except json.JSONDecodeError:
+            # Fallback: try to extract JSON from response
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if json_match:
+                ideas_data = json.loads(json_match.group())
+                return ideas_data.get('ideas', [])
+            raise Exception("Could not parse JSON response from OpenAI")
+    
+    def _generate_ideas_with_openai(self, context: str, mode: str, limit: int,
+                                   persona: str, channels: List[str]) -> List[Dict[str, Any]]:
+        """
+        Generate ideas using OpenAI based on context.
+        
+        Args:
+            context: Content context (extracted from URLs or custom idea)
+            mode: Generation mode ("url" or "idea")
+            limit: Number of ideas to generate
+            persona: Target persona
+            channels: Target channels
             
+        Returns:
+            List of generated ideas
+        """
+        try:
             # Prepare the API request payload
-            payload = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": "Du bist eine Content-Strategie-KI für KMU. Liefere ausschließlich valides JSON gemäß Schema. Erstelle vielfältige, praxisnahe Social-Media-Ideen mit klaren Hooks und passenden Funnel-Stufen."
-                    },
-                    {
-                        "role": "user", 
-                        "content": user_prompt
-                    }
-                ],
-                "max_tokens": 2000,
-                "temperature": 0.8
-            }
+            payload = self._build_idea_payload(context, mode, limit, persona, channels)
             
             # Make the API request
             response = requests.post(
@@ -325,48 +396,214 @@ Antwortformat (ausschließlich valides JSON):
             content = result['choices'][0]['message']['content'].strip()
             
             # Parse JSON response
-            try:
-                ideas_data = json.loads(content)
-                raw_ideas = ideas_data.get('ideas', [])
-            except json.JSONDecodeError:
-                # Fallback: try to extract JSON from response
-                import re
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    ideas_data = json.loads(json_match.group())
-                    raw_ideas = ideas_data.get('ideas', [])
-                else:
-                    raise Exception("Could not parse JSON response from OpenAI")
+            raw_ideas = self._parse_ideas_content(content)
             
             # Normalize and validate ideas
-            normalized_ideas = []
-            for i, idea in enumerate(raw_ideas[:limit]):
-                normalized_idea = {
-                    "id": f"idea_{uuid.uuid4().hex[:8]}",
-                    "title": idea.get('title', f'Idee {i+1}'),
-                    "hook": idea.get('hook', 'Interessanter Hook für Social Media Post.'),
-                    "persona": idea.get('persona', persona),
-                    "funnel": idea.get('funnel', 'Awareness'),
-                    "channels": idea.get('channels', channels)
-                }
-                normalized_ideas.append(normalized_idea)
+            normalized_ideas = [
+                self._normalize_idea(idea, i, persona, channels)
+                for i, idea in enumerate(raw_ideas[:limit])
+            ]
             
             # Ensure we have at least some ideas
             if not normalized_ideas:
-                # Create fallback ideas
-                for i in range(min(3, limit)):
-                    fallback_idea = {
-                        "id": f"idea_{uuid.uuid4().hex[:8]}",
-                        "title": f"Content-Idee {i+1}",
-                        "hook": "Spannender Hook für Ihre Zielgruppe.",
-                        "persona": persona,
-                        "funnel": ["Awareness", "Consideration", "Decision"][i % 3],
-                        "channels": channels
-                    }
-                    normalized_ideas.append(fallback_idea)
+                normalized_ideas = self._fallback_ideas(limit, persona, channels)
             
             return normalized_ideas
             
         except Exception as e:
             raise Exception(f"Error generating ideas with OpenAI: {str(e)}")
+    
+    # Streaming variants
+    def stream_ideas_from_urls(self, urls: List[str], limit: int = 10,
+                               persona: Optional[str] = None,
+                               channels: Optional[List[str]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream content ideas from website URLs as they are generated.
+        
+        Args:
+            urls: List of URLs to analyze (max 3)
+            limit: Number of ideas to generate (default 10)
+            persona: Target persona (optional)
+            channels: Target channels (optional)
+            
+        Yields:
+            ("warning", message) tuples followed by ("idea", idea) tuples
+        """
+        if not urls or len(urls) == 0:
+            raise ValueError("At least one URL is required")
+        
+        if len(urls) > 3:
+            raise ValueError("Maximum 3 URLs allowed")
+        
+        persona = persona or self.default_persona
+        channels = channels or self.default_channels
+        
+        combined_context, warnings = self._build_url_context(urls)
+        for warning in warnings:
+            yield "warning", warning
+        
+        for idea in self._stream_ideas_with_openai(combined_context, "url", limit, persona, channels):
+            yield "idea", idea
+    
+    def stream_ideas_from_idea(self, idea: str, limit: int = 10,
+                               persona: Optional[str] = None,
+                               channels: Optional[List[str]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Stream content ideas from a custom idea/text as they are generated.
+        
+        Args:
+            idea: Custom idea or text input
+            limit: Number of ideas to generate (default 10)
+            persona: Target persona (optional)
+            channels: Target channels (optional)
+            
+        Yields:
+            ("idea", idea) tuples
+        """
+        if not idea or not idea.strip():
+            raise ValueError("Idea text is required")
+        
+        persona = persona or self.default_persona
+        channels = channels or self.default_channels
+        
+        for normalized_idea in self._stream_ideas_with_openai(idea.strip(), "idea", limit, persona, channels):
+            yield "idea", normalized_idea
+    
+    def _stream_ideas_with_openai(self, context: str, mode: str, limit: int,
+                                  persona: str, channels: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Generate ideas using the OpenAI streaming API.
+        
+        Each idea is yielded as soon as its JSON object is closed in the
+        token stream. If the streamed answer contains no parseable idea
+        objects, the complete answer is parsed like the non-streaming path.
+        
+        Args:
+            context: Content context (extracted from URLs or custom idea)
+            mode: Generation mode ("url" or "idea")
+            limit: Number of ideas to generate
+            persona: Target persona
+            channels: Target channels
+            
+        Yields:
+            Normalized idea dictionaries
+        """
+        payload = self._build_idea_payload(context, mode, limit, persona, channels)
+        payload["stream"] = True
+        
+        response = requests.post(
+            self.openai_service.chat_url,
+            headers=self.openai_service.headers,
+            json=payload,
+            timeout=30,
+            stream=True
+        )
+        
+        try:
+            if response.status_code != 200:
+                raise Exception(f"OpenAI API error: {response.status_code} - {response.text}")
+            
+            parser = IdeaStreamParser()
+            emitted = 0
+            
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    break
+                
+                try:
+                    chunk = json.loads(data)
+                    delta = chunk['choices'][0].get('delta', {}).get('content') or ''
+                except (json.JSONDecodeError, KeyError, IndexError):
+                    continue
+                
+                for raw_idea in parser.feed(delta):
+                    yield self._normalize_idea(raw_idea, emitted, persona, channels)
+                    emitted += 1
+                    if emitted >= limit:
+                        return
+            
+            if emitted == 0:
+                # Nothing could be parsed incrementally, fall back to the full answer
+                try:
+                    raw_ideas = self._parse_ideas_content(parser.text.strip())
+                except Exception:
+                    raw_ideas = []
+                
+                normalized_ideas = [
+                    self._normalize_idea(idea, i, persona, channels)
+                    for i, idea in enumerate(raw_ideas[:limit])
+                ]
+                for normalized_idea in normalized_ideas or self._fallback_ideas(limit, persona, channels):
+                    yield normalized_idea
+        finally:
+            response.close()
+
 
+class IdeaStreamParser:
+    """
+    Incremental JSON parser for streamed planner answers.
+    
+    Text is fed chunk by chunk. Every JSON object that is a direct element
+    of an array (e.g. each entry of {"ideas": [...]}) is returned as soon as
+    its closing brace arrives. Braces inside strings are ignored.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+        self._object_depth = 0
+    
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Feed the next chunk of streamed text.
+        
+        Args:
+            chunk: Newly received text
+            
+        Returns:
+            List of idea objects completed by this chunk
+        """
+        completed = []
+        offset = len(self.text)
+        self.text += chunk
+        
+        for position in range(offset, len(self.text)):
+            char = self.text[position]
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._object_start is None and self._stack and self._stack[-1] == '[':
+                    self._object_start = position
+                    self._object_depth = len(self._stack) + 1
+                self._stack.append(char)
+            elif char in '}]':
+                if self._stack:
+                    self._stack.pop()
+                if char == '}' and self._object_start is not None and len(self._stack) == self._object_depth - 1:
+                    raw = self.text[self._object_start:position + 1]
+                    self._object_start = None
+                    try:
+                        parsed = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(parsed, dict):
+                        completed.append(parsed)
+        
+        return completed
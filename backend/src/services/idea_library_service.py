@@ -0,0 +1,382 @@
+import hashlib
+import json
+import random
+import re
+import uuid
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Tuple
+from src.models import db, PlannerIdea, PlannerIdeaBand
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Objects created by migration 0003 outside of the models; autogenerate must not drop them
+IDEA_SEARCH_SCHEMA_OBJECTS = frozenset({
+    'ix_planner_ideas_search',
+    'planner_ideas_fts', 'planner_ideas_fts_data', 'planner_ideas_fts_idx',
+    'planner_ideas_fts_docsize', 'planner_ideas_fts_config'
+})
+
+# Fixed seed so signatures stay comparable across processes and restarts
+_rng = random.Random(20250101)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(64)
+]
+
+class IdeaLibraryService:
+    """
+    Service for persisting planner ideas and detecting near-duplicates.
+
+    Every idea is reduced to character shingles of its normalized title and
+    hook. A MinHash signature estimates the Jaccard similarity between two
+    ideas, and locality-sensitive hashing over signature bands narrows the
+    comparison down to a handful of candidates per idea.
+    """
+
+    NUM_PERMUTATIONS = 64
+    BANDS = 16
+    ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+    SHINGLE_SIZE = 5
+    DEFAULT_THRESHOLD = 0.7
+
+    _MERSENNE_PRIME = _MERSENNE_PRIME
+    _MAX_HASH = _MERSENNE_PRIME
+    _PERMUTATIONS = _PERMUTATIONS
+
+    # Engines on which the search index was found; a missing index is checked again on the next search
+    _search_index_available = set()
+
+    def __init__(self, threshold: Optional[float] = None):
+        if threshold is None and has_app_context():
+            threshold = current_app.config.get('PLANNER_DUPLICATE_THRESHOLD')
+        self.threshold = float(threshold) if threshold is not None else self.DEFAULT_THRESHOLD
+
+    # Signatures
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Lowercase text and collapse everything except letters and digits to single spaces."""
+        return re.sub(r'[\W_]+', ' ', (text or '').lower()).strip()
+
+    def _shingles(self, normalized: str) -> set:
+        """Build character shingles from normalized text."""
+        if len(normalized) <= self.SHINGLE_SIZE:
+            return {normalized} if normalized else set()
+        return {normalized[i:i + self.SHINGLE_SIZE] for i in range(len(normalized) - self.SHINGLE_SIZE + 1)}
+
+    def compute_signature(self, normalized: str) -> List[int]:
+        """
+        Compute the MinHash signature of normalized text.
+
+        Args:
+            normalized: Text as returned by normalize_text
+
+        Returns:
+            List of NUM_PERMUTATIONS minimum hash values
+        """
+        hashed = [
+            int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+            for shingle in self._shingles(normalized)
+        ]
+        if not hashed:
+            return [self._MAX_HASH] * self.NUM_PERMUTATIONS
+
+        prime = self._MERSENNE_PRIME
+        return [min((a * value + b) % prime for value in hashed) for a, b in self._PERMUTATIONS]
+
+    def band_hashes(self, signature: List[int]) -> List[str]:
+        """Split a signature into LSH bands and hash each band."""
+        hashes = []
+        for band in range(self.BANDS):
+            rows = signature[band * self.ROWS_PER_BAND:(band + 1) * self.ROWS_PER_BAND]
+            digest = hashlib.blake2b(','.join(str(v) for v in rows).encode('ascii'), digest_size=8).hexdigest()
+            hashes.append(f"{band}:{digest}")
+        return hashes
+
+    @staticmethod
+    def similarity(signature_a: List[int], signature_b: List[int]) -> float:
+        """Estimate the Jaccard similarity of two MinHash signatures."""
+        if not signature_a or len(signature_a) != len(signature_b):
+            return 0.0
+        return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+    @staticmethod
+    def encode_signature(signature: List[int]) -> str:
+        return ','.join(format(value, 'x') for value in signature)
+
+    @staticmethod
+    def decode_signature(encoded: str) -> List[int]:
+        return [int(value, 16) for value in encoded.split(',')] if encoded else []
+
+    @staticmethod
+    def new_idea_key() -> str:
+        """Public id for a new idea: 'idea_' and the full hex of a random uuid."""
+        return f"idea_{uuid.uuid4().hex}"
+
+    def _idea_text(self, idea: Dict[str, Any]) -> str:
+        return self.normalize_text(f"{idea.get('title', '')} {idea.get('hook', '')}")
+
+    # Library operations
+    def register_ideas(self, user_id: int, ideas: List[Dict[str, Any]],
+                       source_mode: Optional[str] = None, source: Optional[str] = None,
+                       duplicates: str = 'flag') -> List[Dict[str, Any]]:
+        """
+        Store newly generated ideas and flag or drop near-duplicates.
+
+        Candidates for all ideas are loaded with a single band lookup. An idea
+        whose estimated similarity to a stored idea (or to an earlier idea of
+        the same batch) reaches the threshold is not stored again; instead the
+        stored idea's suggestion counter is bumped.
+
+        Args:
+            user_id: Owner of the ideas
+            ideas: Normalized planner ideas
+            source_mode: Generation mode ("url" or "idea")
+            source: URLs or custom idea the ideas were generated from
+            duplicates: 'flag' to return duplicates with a duplicate_of field,
+                        'filter' to drop them from the result
+
+        Returns:
+            Ideas to return to the client, each with library_id and, for
+            duplicates, duplicate_of
+        """
+        if not ideas:
+            return []
+
+        prepared = []
+        all_bands = set()
+        for idea in ideas:
+            normalized = self._idea_text(idea)
+            signature = self.compute_signature(normalized)
+            bands = self.band_hashes(signature)
+            all_bands.update(bands)
+            prepared.append((idea, normalized, signature, bands))
+
+        candidates = self._load_candidates(user_id, all_bands)
+        # Keys are unique across all users; one already taken (or missing) gets a new one
+        # instead of failing the whole batch on insert
+        keys = [idea.get('id') for idea in ideas if isinstance(idea.get('id'), str)]
+        used_keys = {key for (key,) in db.session.query(PlannerIdea.idea_key).filter(
+            PlannerIdea.idea_key.in_(keys)
+        )} if keys else set()
+
+        now = datetime.utcnow()
+        results = []
+        batch_ideas = []
+        new_entries = []
+        flagged_entries = []
+
+        for idea, normalized, signature, bands in prepared:
+            match, score = self._best_match(signature, bands, candidates, batch_ideas)
+
+            if match is not None:
+                match.times_suggested = (match.times_suggested or 0) + 1
+                match.last_suggested_at = now
+                if duplicates == 'filter':
+                    continue
+
+                flagged = dict(idea)
+                flagged['duplicate_of'] = {
+                    'id': match.idea_key,
+                    'title': match.title,
+                    'similarity': round(score, 2)
+                }
+                flagged_entries.append((flagged, match))
+                results.append(flagged)
+                continue
+
+            idea_key = idea.get('id')
+            if (not isinstance(idea_key, str) or not idea_key or idea_key in used_keys
+                    or len(idea_key) > PlannerIdea.idea_key.type.length):
+                idea_key = self.new_idea_key()
+                idea = dict(idea, id=idea_key)
+            used_keys.add(idea_key)
+
+            stored = PlannerIdea(
+                user_id=user_id,
+                idea_key=idea_key,
+                title=idea.get('title', ''),
+                hook=idea.get('hook'),
+                persona=idea.get('persona'),
+                funnel=idea.get('funnel'),
+                channels=json.dumps(idea.get('channels') or []),
+                source_mode=source_mode,
+                source=source,
+                search_text=normalized,
+                signature=self.encode_signature(signature),
+                times_suggested=1,
+                created_at=now,
+                last_suggested_at=now
+            )
+            stored.bands = [PlannerIdeaBand(user_id=user_id, band_hash=band) for band in bands]
+            db.session.add(stored)
+            batch_ideas.append((stored, signature, set(bands)))
+
+            entry = dict(idea)
+            new_entries.append((entry, stored))
+            results.append(entry)
+
+        # Assign primary keys so results can reference their library entry
+        db.session.flush()
+        for entry, stored in new_entries:
+            entry['library_id'] = stored.id
+        for flagged, match in flagged_entries:
+            flagged['library_id'] = match.id
+            flagged['duplicate_of']['library_id'] = match.id
+
+        db.session.commit()
+        return results
+
+    def _load_candidates(self, user_id: int, bands: set) -> List[Tuple[PlannerIdea, List[int], set]]:
+        """Load stored ideas sharing at least one band with the given band hashes."""
+        if not bands:
+            return []
+
+        rows = db.session.query(PlannerIdeaBand.idea_id, PlannerIdeaBand.band_hash).filter(
+            PlannerIdeaBand.user_id == user_id,
+            PlannerIdeaBand.band_hash.in_(list(bands))
+        ).all()
+
+        matched_bands = {}
+        for idea_id, band_hash in rows:
+            matched_bands.setdefault(idea_id, set()).add(band_hash)
+
+        if not matched_bands:
+            return []
+
+        stored_ideas = PlannerIdea.query.filter(PlannerIdea.id.in_(list(matched_bands))).all()
+        return [
+            (stored, self.decode_signature(stored.signature), matched_bands[stored.id])
+            for stored in stored_ideas
+        ]
+
+    def _best_match(self, signature: List[int], bands: List[str], *candidate_lists) -> Tuple[Optional[PlannerIdea], float]:
+        """Return the most similar candidate at or above the threshold."""
+        band_set = set(bands)
+        best, best_score = None, 0.0
+        for candidates in candidate_lists:
+            for stored, stored_signature, stored_bands in candidates:
+                if not band_set & stored_bands:
+                    continue
+                score = self.similarity(signature, stored_signature)
+                if score >= self.threshold and score > best_score:
+                    best, best_score = stored, score
+        return best, best_score
+
+    def find_similar(self, user_id: int, text: str, limit: int = 10,
+                     min_similarity: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Find stored ideas similar to a free text via the band index.
+
+        Args:
+            user_id: Owner of the ideas
+            text: Title/hook or topic to compare against
+            limit: Maximum number of results
+            min_similarity: Minimum estimated Jaccard similarity
+
+        Returns:
+            Idea dictionaries with a similarity field, most similar first
+        """
+        signature = self.compute_signature(self.normalize_text(text))
+        bands = set(self.band_hashes(signature))
+
+        matches = []
+        for stored, stored_signature, _ in self._load_candidates(user_id, bands):
+            score = self.similarity(signature, stored_signature)
+            if score >= min_similarity:
+                data = stored.to_dict()
+                data['similarity'] = round(score, 2)
+                matches.append(data)
+
+        matches.sort(key=lambda item: item['similarity'], reverse=True)
+        return matches[:limit]
+
+    def search_ideas(self, user_id: int, query: Optional[str] = None, funnel: Optional[str] = None,
+                     channel: Optional[str] = None, page: int = 1, per_page: int = 20):
+        """
+        Browse and search a user's stored ideas.
+
+        Search terms are matched as word prefixes against the normalized
+        title and hook, through the token index of migration 0003. Without it
+        (other databases, SQLite without FTS5) every term is matched as a
+        substring with LIKE.
+
+        Args:
+            user_id: Owner of the ideas
+            query: Search terms; every term must occur
+            funnel: Optional funnel stage filter
+            channel: Optional channel filter (LI, FB, IG, X)
+            page: Page number
+            per_page: Page size
+
+        Returns:
+            Flask-SQLAlchemy pagination object
+        """
+        terms = self.normalize_text(query).split() if query else []
+        mode = (db.engine.dialect.name if self._search_index_exists() else 'like') if terms else None
+
+        if mode == 'sqlite':
+            # Compared as an expression, so SQLite looks the matches up by id instead of walking all
+            # of the user's ideas through ix_planner_ideas_user_created and checking each one
+            ideas_query = PlannerIdea.query.filter(PlannerIdea.user_id + 0 == user_id)
+        else:
+            ideas_query = PlannerIdea.query.filter_by(user_id=user_id)
+
+        if terms:
+            ideas_query = ideas_query.filter(self._search_filter(terms, mode))
+
+        if funnel:
+            ideas_query = ideas_query.filter(PlannerIdea.funnel == funnel)
+
+        if channel:
+            ideas_query = ideas_query.filter(PlannerIdea.channels.like(f'%"{channel}"%'))
+
+        return ideas_query.order_by(PlannerIdea.last_suggested_at.desc()).paginate(
+            page=page,
+            per_page=per_page,
+            error_out=False
+        )
+
+    @staticmethod
+    def _search_filter(terms: List[str], mode: str):
+        if mode == 'postgresql':
+            # Same expression as the index; terms only hold letters and digits (normalize_text)
+            return text(
+                "to_tsvector('simple'::regconfig, planner_ideas.search_text) @@ "
+                "to_tsquery('simple'::regconfig, :idea_query)"
+            ).bindparams(idea_query=' & '.join(f'{term}:*' for term in terms))
+        if mode == 'sqlite':
+            return text(
+                "planner_ideas.id IN (SELECT rowid FROM planner_ideas_fts WHERE planner_ideas_fts MATCH :idea_match)"
+            ).bindparams(idea_match=' '.join(f'"{term}"*' for term in terms))
+        return db.and_(*(PlannerIdea.search_text.like(f'%{term}%') for term in terms))
+
+    def _search_index_exists(self) -> bool:
+        """Whether the search index of migration 0003 exists in the current database."""
+        engine = db.engine
+        key = str(engine.url)
+        if key in self._search_index_available:
+            return True
+
+        if engine.dialect.name == 'postgresql':
+            check = text("SELECT 1 FROM pg_indexes WHERE tablename = 'planner_ideas' AND indexname = 'ix_planner_ideas_search'")
+        elif engine.dialect.name == 'sqlite':
+            check = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'planner_ideas_fts'")
+        else:
+            return False
+
+        with engine.connect() as conn:
+            available = conn.execute(check).first() is not None
+        if available:
+            self._search_index_available.add(key)
+        return available
+
+    def delete_idea(self, user_id: int, library_id: int) -> bool:
+        """Delete a stored idea and its band index entries."""
+        idea = PlannerIdea.query.filter_by(id=library_id, user_id=user_id).first()
+        if not idea:
+            return False
+        db.session.delete(idea)
+        db.session.commit()
+        return True
@@ -0,0 +1,88 @@
+import os
+import socket
+import uuid
+import logging
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class LeaderElection:
+    """
+    Leader election over a lease row in the scheduler_leases table.
+    
+    Every candidate calls try_acquire() periodically, more often than the
+    lease lasts. The holder renews its lease; the others take it over only
+    once it has expired, i.e. when the holder stopped renewing (crashed,
+    hung or lost its database connection). Both cases are a single
+    conditional UPDATE, so the database decides who wins and this works the
+    same on PostgreSQL and SQLite without advisory locks.
+    
+    Must be used inside an application context.
+    """
+    
+    DEFAULT_LEASE_SECONDS = 60
+    
+    def __init__(self, name: str, lease_seconds: Optional[int] = None, holder: Optional[str] = None):
+        config = current_app.config if has_app_context() else {}
+        self.name = name
+        self.lease = timedelta(seconds=lease_seconds or config.get('SCHEDULER_LEADER_LEASE_SECONDS',
+                                                                    self.DEFAULT_LEASE_SECONDS))
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    
+    def try_acquire(self) -> bool:
+        """
+        Acquire or renew the lease.
+        
+        Returns:
+            True if this process holds the lease for the next lease period
+        """
+        from sqlalchemy import case, or_
+        from sqlalchemy.exc import IntegrityError
+        from src.models import db, SchedulerLease
+        
+        now = datetime.utcnow()
+        updated = SchedulerLease.query.filter(
+            SchedulerLease.name == self.name,
+            or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now)
+        ).update({
+            SchedulerLease.acquired_at: case((SchedulerLease.holder == self.holder, SchedulerLease.acquired_at), else_=now),
+            SchedulerLease.holder: self.holder,
+            SchedulerLease.renewed_at: now,
+            SchedulerLease.expires_at: now + self.lease
+        }, synchronize_session=False)
+        db.session.commit()
+        if updated:
+            return True
+        
+        if db.session.get(SchedulerLease, self.name) is not None:
+            db.session.commit()
+            return False
+        
+        # First candidate ever: create the lease row; a concurrent insert wins instead
+        db.session.add(SchedulerLease(name=self.name, holder=self.holder, acquired_at=now,
+                                      renewed_at=now, expires_at=now + self.lease))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+    
+    def release(self):
+        """Give up the lease if this process holds it, so a standby can take over right away."""
+        from src.models import db, SchedulerLease
+        
+        SchedulerLease.query.filter(
+            SchedulerLease.name == self.name,
+            SchedulerLease.holder == self.holder
+        ).update({SchedulerLease.expires_at: datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+    
+    def current(self):
+        """The lease row as a dictionary, or None if no process ever held it."""
+        from src.models import db, SchedulerLease
+        
+        lease = db.session.get(SchedulerLease, self.name)
+        return lease.to_dict() if lease is not None else None
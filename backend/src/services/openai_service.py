@@ -32,7 +32,8 @@ class OpenAIService:
         }
     
     def generate_social_media_post(self, profile_url: str, post_theme: str, 
-                                 additional_details: str = "", platform: str = "linkedin") -> str:
+                                 additional_details: str = "", platform: str = "linkedin",
+                                 website_content: Optional[str] = None) -> str:
         """
         Generate a social media post using ChatGPT API via HTTP requests.
         
@@ -41,13 +42,15 @@ class OpenAIService:
             post_theme: Main theme of the post
             additional_details: Additional context and details
             platform: Target platform (linkedin, facebook, twitter, instagram)
+            website_content: Pre-analyzed website content (skips fetching profile_url again)
             
         Returns:
             Generated post content
         """
         try:
             # Analyze the website content first
-            website_content = self._analyze_website(profile_url)
+            if website_content is None:
+                website_content = self._analyze_website(profile_url)
             
             # Create the prompt based on the specifications
             prompt = self._create_post_prompt(
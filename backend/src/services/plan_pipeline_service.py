@@ -0,0 +1,321 @@
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from typing import List, Dict, Any, Optional, Tuple
+import pytz
+from src.services.background_scheduler import notify_scheduled_post
+
+logger = logging.getLogger(__name__)
+
+class PlanPipelineService:
+    """
+    Service that turns planner ideas into generated and scheduled posts.
+
+    Ideas are assigned to posting slots in a date range. Content is generated
+    batch by batch with bounded concurrency. Each batch is written in one
+    transaction: all Post rows, all ScheduledPost rows and the usage update.
+    """
+
+    MAX_RANGE_DAYS = 92
+    DEFAULT_BATCH_SIZE = 5
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_STALE_SECONDS = 900  # A running job without progress for this long was interrupted
+
+    def __init__(self, batch_size: Optional[int] = None, max_workers: Optional[int] = None):
+        if has_app_context():
+            batch_size = batch_size or current_app.config.get('PIPELINE_BATCH_SIZE')
+            max_workers = max_workers or current_app.config.get('PIPELINE_MAX_WORKERS')
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.max_workers = max_workers or self.DEFAULT_MAX_WORKERS
+
+    # Planning
+    def build_slots(self, start_date: str, end_date: str, slots: List[Any],
+                    timezone: str = 'UTC') -> List[datetime]:
+        """
+        Expand posting slots over a date range.
+
+        Args:
+            start_date: First day ('YYYY-MM-DD'), inclusive
+            end_date: Last day ('YYYY-MM-DD'), inclusive
+            slots: List of 'HH:MM' strings (every day) or
+                   {"time": "HH:MM", "weekdays": [0-6]} objects (0 = Monday)
+            timezone: Timezone the slot times are given in
+
+        Returns:
+            Sorted list of future slot datetimes in local (naive) time
+
+        Raises:
+            ValueError: If dates, slots or timezone are invalid
+        """
+        try:
+            tz = pytz.timezone(timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            raise ValueError('Invalid timezone')
+
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        if end < start:
+            raise ValueError('end_date must not be before start_date')
+        if (end - start).days >= self.MAX_RANGE_DAYS:
+            raise ValueError(f'Date range must not exceed {self.MAX_RANGE_DAYS} days')
+
+        if not slots or not isinstance(slots, list):
+            raise ValueError('At least one posting slot is required')
+
+        parsed_slots = []
+        for slot in slots:
+            if isinstance(slot, str):
+                slot = {'time': slot}
+            if not isinstance(slot, dict) or 'time' not in slot:
+                raise ValueError(f'Invalid slot: {slot}')
+
+            slot_time = datetime.strptime(slot['time'], '%H:%M').time()
+            weekdays = slot.get('weekdays')
+            if weekdays is not None:
+                if not isinstance(weekdays, list) or any(d not in range(7) for d in weekdays):
+                    raise ValueError(f'Invalid weekdays in slot: {slot}')
+                weekdays = set(weekdays)
+            parsed_slots.append((slot_time, weekdays))
+
+        now_local = pytz.UTC.localize(datetime.utcnow()).astimezone(tz).replace(tzinfo=None)
+
+        local_slots = set()
+        day = start
+        while day <= end:
+            for slot_time, weekdays in parsed_slots:
+                if weekdays is not None and day.weekday() not in weekdays:
+                    continue
+                slot_datetime = datetime.combine(day, slot_time)
+                if slot_datetime > now_local:
+                    local_slots.add(slot_datetime)
+            day += timedelta(days=1)
+
+        return sorted(local_slots)
+
+    @staticmethod
+    def to_utc(local_datetimes: List[datetime], tz) -> List[datetime]:
+        """Convert a batch of naive local datetimes to naive UTC with one timezone object."""
+        if tz is pytz.UTC:
+            return list(local_datetimes)
+        return [tz.localize(dt).astimezone(pytz.UTC).replace(tzinfo=None) for dt in local_datetimes]
+
+    # Execution
+    def run(self, job_id: str, user_id: int, plan: List[Tuple[Dict[str, Any], datetime]],
+            platforms: List[str], timezone: str, profile_url: str = '',
+            additional_details: str = '', generate_image: bool = False) -> Dict[str, Any]:
+        """
+        Generate and schedule posts for a plan of (idea, local slot) pairs.
+
+        Must be called inside an application context.
+
+        Args:
+            job_id: Pipeline job id used for progress reporting
+            user_id: Owner of the posts
+            plan: Ideas paired with their local posting time
+            platforms: Platforms to generate a post for per idea
+            timezone: Timezone of the slot times
+            profile_url: Optional company website for context
+            additional_details: Additional context for all posts
+            generate_image: Whether to generate an image per post
+
+        Returns:
+            Final job status dictionary
+        """
+        from src.models import db, Post, ScheduledPost, PostUsage
+        from src.services.openai_service import OpenAIService
+
+        total = len(plan) * len(platforms)
+        update_pipeline_job(job_id, status='processing', progress='Analyzing website...',
+                            total=total, generated=0, scheduled=0, failed=0, errors=[], scheduled_post_ids=[])
+
+        openai_service = OpenAIService()
+        website_content = openai_service._analyze_website(profile_url) if profile_url else ''
+        profile_url = profile_url or 'https://example.com'
+        tz = pytz.timezone(timezone)
+
+        post_usage = PostUsage.query.filter_by(user_id=user_id).first()
+        if not post_usage:
+            post_usage = PostUsage(user_id=user_id)
+            db.session.add(post_usage)
+            db.session.commit()
+
+        def generate(task):
+            idea, platform = task
+            post_theme = idea.get('title', '')
+            if idea.get('hook'):
+                post_theme = f"{post_theme}: {idea['hook']}"
+
+            details = additional_details or ''
+            if idea.get('persona') or idea.get('funnel'):
+                details = f"{details}\nZielgruppe: {idea.get('persona', '')}, Funnel-Stufe: {idea.get('funnel', '')}".strip()
+
+            content = openai_service.generate_social_media_post(
+                profile_url=profile_url,
+                post_theme=post_theme,
+                additional_details=details,
+                platform=platform,
+                website_content=website_content
+            )
+
+            image_url = None
+            if generate_image:
+                try:
+                    image_prompt = openai_service.create_image_prompt(post_content=content, platform=platform)
+                    image_url = openai_service.generate_image(
+                        prompt=image_prompt,
+                        size=openai_service.get_platform_image_size(platform)
+                    )
+                except Exception as e:
+                    logger.warning(f"Image generation failed for {platform}: {e}")
+            return content, image_url
+
+        def safe_generate(task):
+            try:
+                return generate(task), None
+            except Exception as e:
+                return None, str(e)
+
+        counts = {'generated': 0, 'scheduled': 0, 'failed': 0}
+        errors = []
+        scheduled_post_ids = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch_start in range(0, len(plan), self.batch_size):
+                batch = plan[batch_start:batch_start + self.batch_size]
+                update_pipeline_job(job_id, progress=f'Generating posts {batch_start + 1}-{batch_start + len(batch)} of {len(plan)} ideas...')
+
+                utc_times = self.to_utc([local_time for _, local_time in batch], tz)
+                tasks = [(idea, platform) for idea, _ in batch for platform in platforms]
+                outcomes = list(executor.map(safe_generate, tasks))
+
+                generation_errors = []
+                try:
+                    posts = []
+                    for index, (idea, _) in enumerate(batch):
+                        post_group_id = str(uuid.uuid4())
+                        for offset, platform in enumerate(platforms):
+                            result, error = outcomes[index * len(platforms) + offset]
+                            if error:
+                                generation_errors.append(f"{idea.get('title', 'Idea')} ({platform}): {error}")
+                                continue
+
+                            content, image_url = result
+                            post = Post(
+                                user_id=user_id,
+                                title=f"{idea.get('title', '')} ({platform.title()})"[:200],
+                                content=content,
+                                profile_url=profile_url,
+                                post_theme=idea.get('title'),
+                                additional_details=additional_details,
+                                generated_image_url=image_url,
+                                platform=platform,
+                                post_group_id=post_group_id
+                            )
+                            post.schedule_post(utc_times[index])
+                            posts.append(post)
+
+                    if not posts:
+                        counts['failed'] += len(generation_errors)
+                        errors.extend(generation_errors)
+                        update_pipeline_job(job_id, errors=errors, **counts)
+                        continue
+
+                    # One transaction per batch: posts, scheduled posts, usage and job progress
+                    db.session.add_all(posts)
+                    db.session.flush()
+
+                    scheduled_posts = [
+                        ScheduledPost(
+                            user_id=user_id,
+                            post_id=post.id,
+                            title=post.title,
+                            content=post.content,
+                            generated_image_url=post.generated_image_url,
+                            platform=post.platform,
+                            scheduled_time=post.scheduled_at,
+                            timezone=timezone,
+                            status='scheduled'
+                        )
+                        for post in posts
+                    ]
+                    db.session.add_all(scheduled_posts)
+                    post_usage.increment_generated(len(posts))
+                    db.session.flush()
+
+                    batch_counts = {
+                        'generated': counts['generated'] + len(posts),
+                        'scheduled': counts['scheduled'] + len(scheduled_posts),
+                        'failed': counts['failed'] + len(generation_errors)
+                    }
+                    batch_ids = scheduled_post_ids + [sp.id for sp in scheduled_posts]
+                    update_pipeline_job(job_id, commit=False, errors=errors + generation_errors,
+                                        scheduled_post_ids=batch_ids, **batch_counts)
+                    db.session.commit()
+
+                    counts.update(batch_counts)
+                    errors.extend(generation_errors)
+                    scheduled_post_ids = batch_ids
+                    for scheduled_post in scheduled_posts:
+                        notify_scheduled_post(scheduled_post.id, scheduled_post.scheduled_time)
+
+                except Exception as e:
+                    db.session.rollback()
+                    counts['failed'] += len(outcomes)
+                    errors.extend(generation_errors)
+                    errors.append(f"Saving batch starting at idea {batch_start + 1} failed: {e}")
+                    logger.error(f"Pipeline job {job_id}: error saving batch: {e}")
+                    update_pipeline_job(job_id, errors=errors, **counts)
+
+        status = 'completed' if counts['scheduled'] > 0 or total == 0 else 'error'
+        update_pipeline_job(job_id, status=status, progress='Done',
+                            message=f"Scheduled {counts['scheduled']} of {total} posts")
+        logger.info(f"Pipeline job {job_id}: scheduled {counts['scheduled']}/{total} posts, {counts['failed']} failed")
+        return get_pipeline_job(job_id)
+
+def update_pipeline_job(job_id: str, commit: bool = True, **fields):
+    """
+    Create or update a pipeline job's status fields.
+
+    Args:
+        job_id: Pipeline job id
+        commit: Commit right away; False to write the update in the caller's transaction
+        **fields: Job columns; errors and scheduled_post_ids are lists
+    """
+    from src.models import db, PipelineJob
+
+    job = db.session.get(PipelineJob, job_id)
+    if job is None:
+        job = PipelineJob(id=job_id, user_id=fields.pop('user_id'))
+        db.session.add(job)
+    for name in ('errors', 'scheduled_post_ids'):
+        if name in fields:
+            fields[name] = json.dumps(fields[name])
+    for name, value in fields.items():
+        setattr(job, name, value)
+    # Progress of a running job also serves as its heartbeat
+    job.updated_at = datetime.utcnow()
+    if commit:
+        db.session.commit()
+
+def get_pipeline_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Return a pipeline job's status; a running job that stopped making progress is reported as failed."""
+    from src.models import db, PipelineJob
+
+    job = db.session.get(PipelineJob, job_id)
+    if job is None:
+        return None
+    status = job.to_dict()
+    updated_at = job.updated_at
+    db.session.commit()
+
+    stale_seconds = PlanPipelineService.DEFAULT_STALE_SECONDS
+    if has_app_context():
+        stale_seconds = current_app.config.get('PIPELINE_STALE_SECONDS', stale_seconds)
+    if status['status'] in ('queued', 'processing') and updated_at < datetime.utcnow() - timedelta(seconds=stale_seconds):
+        # The process running it was stopped; posts of finished batches stay scheduled
+        status['status'] = 'error'
+        status['error'] = 'Pipeline job was interrupted'
+    return status
@@ -0,0 +1,218 @@
+import logging
+import math
+import re
+from sqlalchemy import bindparam, text
+from typing import Dict, Any, Optional
+from src.models import db, Post
+
+logger = logging.getLogger(__name__)
+
+# Objects created by migration 0002 outside of the models; autogenerate must not drop them
+SEARCH_SCHEMA_OBJECTS = frozenset({
+    'search_vector', 'ix_posts_search',
+    'posts_fts', 'posts_fts_data', 'posts_fts_idx', 'posts_fts_docsize', 'posts_fts_config'
+})
+
+class PostSearchService:
+    """
+    Service for full-text search in a user's post library.
+
+    The index lives in the database and is maintained by it on every write
+    (migration 0002): a generated, weighted tsvector column with a GIN index
+    on PostgreSQL and an FTS5 table kept up to date by triggers on SQLite.
+    Queries therefore touch only the posts matching the search terms, and
+    snippets are built for the rows of the requested page only.
+
+    Without the index (other databases, SQLite without FTS5, migration not
+    applied yet) the search falls back to LIKE over title, content and
+    theme, unranked and without snippets.
+    """
+
+    # Must match the configuration of the generated column in migration 0002
+    TEXT_SEARCH_CONFIG = 'german'
+    SEARCH_CONTENT_CHARS = 100000
+    MAX_QUERY_LENGTH = 200
+    HIGHLIGHT_START = '<mark>'
+    HIGHLIGHT_STOP = '</mark>'
+    SNIPPET_TOKENS = 24
+    # bm25 weights of title, post_theme and content (SQLite); PostgreSQL weights via setweight A/B/C
+    FTS5_WEIGHTS = (10.0, 5.0, 1.0)
+
+    # Engines on which the index was found; a missing index is checked again on the next search
+    _index_available = set()
+
+    def is_available(self) -> bool:
+        """Whether the full-text index exists in the current database."""
+        engine = db.engine
+        key = str(engine.url)
+        if key in self._index_available:
+            return True
+
+        if engine.dialect.name == 'postgresql':
+            check = text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'posts' AND column_name = 'search_vector'"
+            )
+        elif engine.dialect.name == 'sqlite':
+            check = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'")
+        else:
+            return False
+
+        with engine.connect() as conn:
+            available = conn.execute(check).first() is not None
+        if available:
+            self._index_available.add(key)
+        return available
+
+    @staticmethod
+    def build_fts5_query(query: str) -> Optional[str]:
+        """
+        Turn user input into an FTS5 MATCH expression.
+
+        Every word must occur, as a prefix ('Strateg' finds 'Strategie',
+        'Strategien'), which stands in for the stemming FTS5 lacks. Quoting
+        each word keeps FTS5 syntax in the input from being interpreted.
+        """
+        terms = re.findall(r'\w+', (query or '').lower())
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, user_id: int, query: str, platform: Optional[str] = None,
+               page: int = 1, per_page: int = 10) -> Dict[str, Any]:
+        """
+        Search a user's posts, best matches first.
+
+        Args:
+            user_id: Owner of the posts
+            query: Search terms; on PostgreSQL web search syntax ("phrase", OR, -word)
+            platform: Optional platform filter
+            page: Page number
+            per_page: Page size
+
+        Returns:
+            Dictionary with the page's results (post, rank between 0 and 1,
+            snippet with highlighted matches), the pagination fields and the
+            search mode used
+        """
+        query = (query or '').strip()[:self.MAX_QUERY_LENGTH]
+        page = max(page, 1)
+        per_page = max(per_page, 1)
+
+        mode = db.engine.dialect.name if self.is_available() else 'like'
+        if mode == 'postgresql':
+            total, hits = self._search_postgresql(user_id, query, platform, page, per_page)
+        elif mode == 'sqlite':
+            total, hits = self._search_sqlite(user_id, query, platform, page, per_page)
+        else:
+            total, hits = self._search_like(user_id, query, platform, page, per_page)
+
+        posts = {post.id: post for post in Post.query.filter(Post.id.in_([hit['id'] for hit in hits]))} if hits else {}
+        results = [{'post': posts[hit['id']], 'rank': hit['rank'], 'snippet': hit['snippet']}
+                   for hit in hits if hit['id'] in posts]
+
+        pages = math.ceil(total / per_page) if total else 0
+        return {
+            'results': results,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1,
+            'mode': mode
+        }
+
+    def _search_postgresql(self, user_id: int, query: str, platform: Optional[str],
+                           page: int, per_page: int):
+        filters = "p.user_id = :user_id AND p.search_vector @@ q"
+        params = {'user_id': user_id, 'query': query, 'config': self.TEXT_SEARCH_CONFIG}
+        if platform:
+            filters += " AND p.platform = :platform"
+            params['platform'] = platform
+        source = f"FROM posts p, websearch_to_tsquery(CAST(:config AS regconfig), :query) q WHERE {filters}"
+
+        total = db.session.execute(text(f"SELECT count(*) {source}"), params).scalar()
+        if not total:
+            return 0, []
+
+        # Normalization 32 scales the rank to rank / (rank + 1)
+        rows = db.session.execute(text(f"""
+            SELECT p.id, ts_rank_cd(p.search_vector, q, 32) AS rank {source}
+            ORDER BY rank DESC, p.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """), {**params, 'limit': per_page, 'offset': (page - 1) * per_page}).all()
+        if not rows:
+            return total, []
+
+        # ts_headline parses the whole text, so it only runs for the rows of this page
+        snippets = dict(db.session.execute(text("""
+            SELECT p.id, ts_headline(CAST(:config AS regconfig), left(p.content, :content_chars), q, :options)
+            FROM posts p, websearch_to_tsquery(CAST(:config AS regconfig), :query) q
+            WHERE p.id IN :ids
+        """).bindparams(bindparam('ids', expanding=True)), {
+            'config': self.TEXT_SEARCH_CONFIG, 'query': query, 'ids': [row.id for row in rows],
+            'content_chars': self.SEARCH_CONTENT_CHARS,
+            'options': f'StartSel={self.HIGHLIGHT_START}, StopSel={self.HIGHLIGHT_STOP}, '
+                       f'MaxWords={self.SNIPPET_TOKENS}, MinWords={self.SNIPPET_TOKENS // 2}, '
+                       f'MaxFragments=2, FragmentDelimiter=" … "'
+        }).all())
+
+        return total, [{'id': row.id, 'rank': round(row.rank, 4), 'snippet': snippets.get(row.id)} for row in rows]
+
+    def _search_sqlite(self, user_id: int, query: str, platform: Optional[str],
+                       page: int, per_page: int):
+        match = self.build_fts5_query(query)
+        if not match:
+            return 0, []
+
+        filters = "posts_fts MATCH :match AND posts.user_id = :user_id"
+        params = {'match': match, 'user_id': user_id}
+        if platform:
+            filters += " AND posts.platform = :platform"
+            params['platform'] = platform
+        # CROSS JOIN keeps posts_fts as the outer table; otherwise SQLite may walk the user's posts
+        # through ix_posts_user_created and evaluate MATCH once per post
+        source = f"FROM posts_fts CROSS JOIN posts ON posts.id = posts_fts.rowid WHERE {filters}"
+
+        total = db.session.execute(text(f"SELECT count(*) {source}"), params).scalar()
+        if not total:
+            return 0, []
+
+        # bm25 is lower for better matches
+        weights = ', '.join(str(weight) for weight in self.FTS5_WEIGHTS)
+        rows = db.session.execute(text(f"""
+            SELECT posts.id, bm25(posts_fts, {weights}) AS score {source}
+            ORDER BY score, posts.created_at DESC
+            LIMIT :limit OFFSET :offset
+        """), {**params, 'limit': per_page, 'offset': (page - 1) * per_page}).all()
+        if not rows:
+            return total, []
+
+        # Column -1: snippet from whichever column matches best
+        snippets = dict(db.session.execute(text("""
+            SELECT rowid, snippet(posts_fts, -1, :start, :stop, '…', :tokens)
+            FROM posts_fts WHERE posts_fts MATCH :match AND rowid IN :ids
+        """).bindparams(bindparam('ids', expanding=True)), {
+            'match': match, 'ids': [row.id for row in rows], 'start': self.HIGHLIGHT_START,
+            'stop': self.HIGHLIGHT_STOP, 'tokens': self.SNIPPET_TOKENS
+        }).all())
+
+        return total, [{'id': row.id, 'rank': round(-row.score / (1 - row.score), 4), 'snippet': snippets.get(row.id)}
+                       for row in rows]
+
+    def _search_like(self, user_id: int, query: str, platform: Optional[str],
+                     page: int, per_page: int):
+        posts_query = db.session.query(Post.id).filter(Post.user_id == user_id)
+        if platform:
+            posts_query = posts_query.filter(Post.platform == platform)
+        if query:
+            posts_query = posts_query.filter(db.or_(
+                Post.title.ilike(f'%{query}%'),
+                Post.content.ilike(f'%{query}%'),
+                Post.post_theme.ilike(f'%{query}%')
+            ))
+
+        total = posts_query.count()
+        rows = posts_query.order_by(Post.created_at.desc()).limit(per_page).offset((page - 1) * per_page).all()
+        return total, [{'id': row.id, 'rank': None, 'snippet': None} for row in rows]
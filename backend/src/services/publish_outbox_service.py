@@ -0,0 +1,642 @@
+import json
+import random
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import and_, or_, func
+from typing import List, Dict, Any, Optional
+from src.models import db, Post, ScheduledPost, SocialAccount, PublishIntent, Publication
+from src.services.rate_limit_service import RateLimitService
+from src.services.social_media_service import STAGE_PRE_SEND
+
+logger = logging.getLogger(__name__)
+
+# Dispatcher counters since process start, exposed via the admin API
+_stats_lock = threading.Lock()
+_dispatch_stats = {
+    'claimed': 0,
+    'sent': 0,
+    'retried': 0,
+    'deferred': 0,
+    'dead': 0,
+    'lease_expired': 0,
+    'scheduled_retries': 0,  # Scheduled posts put back as 'retrying'
+    'scheduled_failed': 0  # Scheduled posts failed for good
+}
+
+class PublishOutboxService:
+    """
+    Service for the transactional publish outbox.
+
+    Callers write publish intents with enqueue() in the same transaction as
+    their Post/ScheduledPost change. The dispatcher claims due intents under
+    a lease, marks each attempt as dispatched before calling the platform and
+    records the outcome together with the Post/ScheduledPost status in one
+    commit per batch. Transient failures are retried with exponential backoff;
+    permanent failures and exhausted intents are dead-lettered. Rate-limited
+    intents are deferred without using up attempts (see RateLimitService).
+
+    An intent whose lease expires after its platform call started may or may
+    not have been published. It is dead-lettered instead of retried, so a
+    crash never leads to a double post. The same holds for failures without
+    an answer from the platform (timeouts, resets, exceptions) once the
+    request that creates the post was started: only failures the platform
+    answered with an error status, or that provably happened before that
+    request (result stage 'pre_send'), are retried.
+
+    When the intent of a scheduled post is dead-lettered, the failure's error
+    class (see classify_failure) decides per SCHEDULED_POST_RETRY_POLICY
+    whether the post goes back into the due queue as 'retrying' with a
+    longer backoff, or fails right away (revoked token, rejected content).
+    """
+
+    DEFAULT_BATCH_SIZE = 50
+    DEFAULT_MAX_ATTEMPTS = 5
+    DEFAULT_LEASE_SECONDS = 300
+    DEFAULT_RETRY_BASE_SECONDS = 30
+    DEFAULT_RETRY_MAX_SECONDS = 3600
+    DEFAULT_MAX_WORKERS = 4
+    # Error classes whose retries cannot succeed
+    PERMANENT_ERROR_CLASSES = ('auth', 'rejected', 'unknown_outcome')
+
+    def __init__(self):
+        config = current_app.config if has_app_context() else {}
+        self.batch_size = config.get('OUTBOX_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        self.max_attempts = config.get('OUTBOX_MAX_ATTEMPTS', self.DEFAULT_MAX_ATTEMPTS)
+        self.lease = timedelta(seconds=config.get('OUTBOX_LEASE_SECONDS', self.DEFAULT_LEASE_SECONDS))
+        self.retry_base_seconds = config.get('OUTBOX_RETRY_BASE_SECONDS', self.DEFAULT_RETRY_BASE_SECONDS)
+        self.retry_max_seconds = config.get('OUTBOX_RETRY_MAX_SECONDS', self.DEFAULT_RETRY_MAX_SECONDS)
+        self.max_workers = config.get('PUBLISH_MAX_WORKERS', self.DEFAULT_MAX_WORKERS)
+        self.scheduled_retry_policy = config.get('SCHEDULED_POST_RETRY_POLICY', {})
+        self.rate_limiter = RateLimitService()
+
+    # Writing intents
+    def enqueue(self, user_id: int, platform: str, content: str, image_url: Optional[str] = None,
+                post_id: Optional[int] = None, scheduled_post_id: Optional[int] = None,
+                idempotency_key: Optional[str] = None, media_asset: Optional[str] = None) -> PublishIntent:
+        """
+        Add a publish intent to the current transaction (the caller commits).
+
+        Args:
+            user_id: Owner of the content and the social account
+            platform: Target platform
+            content: Text to publish
+            image_url: Optional image URL or data URL
+            post_id: Post to mark as published on delivery
+            scheduled_post_id: ScheduledPost to mark as published/failed
+            idempotency_key: Key identifying this delivery; an existing intent
+                             with the same key is returned instead of a new one
+            media_asset: Platform media id of the image if it was uploaded ahead
+                         of time by the warm-up stage
+
+        Returns:
+            The new or existing PublishIntent
+        """
+        key = idempotency_key or f"publish:{uuid.uuid4().hex}"
+        existing = PublishIntent.query.filter_by(idempotency_key=key).first()
+        if existing:
+            return existing
+
+        intent = PublishIntent(
+            user_id=user_id,
+            post_id=post_id,
+            scheduled_post_id=scheduled_post_id,
+            platform=platform,
+            idempotency_key=key,
+            content=content,
+            image_url=image_url or None,
+            media_asset=media_asset,
+            status='pending',
+            attempts=0,
+            max_attempts=self.max_attempts,
+            next_attempt_at=datetime.utcnow()
+        )
+        db.session.add(intent)
+        db.session.add(Publication(
+            intent=intent,
+            user_id=user_id,
+            post_id=post_id,
+            scheduled_post_id=scheduled_post_id,
+            platform=platform,
+            status='pending',
+            attempts=0
+        ))
+        return intent
+
+    # Claiming
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(PublishIntent.status == 'pending', PublishIntent.next_attempt_at <= now),
+            # Lease of a claim that never reached the platform call
+            and_(PublishIntent.status == 'processing', PublishIntent.locked_until < now,
+                 PublishIntent.dispatched_at.is_(None))
+        )
+
+    def claim(self, intent_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> List[PublishIntent]:
+        """
+        Claim due intents under a lease.
+
+        The conditional UPDATE only takes rows that are still claimable, so
+        two dispatchers never claim the same intent. On PostgreSQL the
+        candidates are selected FOR UPDATE SKIP LOCKED, so concurrent
+        dispatchers claim disjoint batches; if another dispatcher took all
+        selected candidates anyway (SQLite), the selection is repeated.
+
+        Args:
+            intent_ids: Restrict claiming to these intents
+            limit: Maximum number of intents to claim
+
+        Returns:
+            Claimed intents, oldest due first
+        """
+        if intent_ids is not None and not intent_ids:
+            return []
+        now = datetime.utcnow()
+        self._expire_stale_leases(now)
+
+        claimed = []
+        for _ in range(3):
+            id_query = db.session.query(PublishIntent.id).filter(self._claimable(now))
+            if intent_ids is not None:
+                id_query = id_query.filter(PublishIntent.id.in_(intent_ids))
+            ids = [
+                row.id for row in id_query.order_by(PublishIntent.next_attempt_at)
+                .limit(limit or self.batch_size).with_for_update(skip_locked=True).all()
+            ]
+            if not ids:
+                db.session.commit()
+                break
+
+            lease_token = uuid.uuid4().hex
+            PublishIntent.query.filter(
+                PublishIntent.id.in_(ids),
+                self._claimable(now)
+            ).update({
+                'status': 'processing',
+                'locked_by': lease_token,
+                'locked_until': now + self.lease,
+                'updated_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+
+            claimed = PublishIntent.query.filter_by(locked_by=lease_token).order_by(PublishIntent.next_attempt_at).all()
+            if claimed:
+                break
+
+        _increment_stats(claimed=len(claimed))
+        return claimed
+
+    def _expire_stale_leases(self, now: datetime):
+        """Dead-letter intents whose dispatcher died after the platform call started."""
+        stale = PublishIntent.query.filter(
+            PublishIntent.status == 'processing',
+            PublishIntent.locked_until < now,
+            PublishIntent.dispatched_at.isnot(None)
+        ).all()
+        if not stale:
+            return
+
+        for intent in stale:
+            error = 'Lease expired after the platform call started; delivery outcome unknown'
+            intent.status = 'dead'
+            intent.last_error = error
+            intent.locked_by = None
+            intent.locked_until = None
+            self._mark_undeliverable(intent, error, 'unknown_outcome', now)
+            self._record_publication(intent)
+        db.session.commit()
+        _increment_stats(lease_expired=len(stale), dead=len(stale))
+        logger.warning(f"Dead-lettered {len(stale)} publish intents with expired leases")
+
+    # Dispatching
+    def dispatch_pending(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Claim and deliver one batch of due intents.
+
+        Returns:
+            Summary with claimed, sent, retrying and dead counts and the outcomes
+        """
+        outcomes = self.dispatch(self.claim(limit=limit))
+        return self.summarize(outcomes)
+
+    def dispatch_intents(self, intents: List[PublishIntent]) -> List[Dict[str, Any]]:
+        """
+        Deliver specific intents right away, e.g. for an interactive publish.
+
+        Intents that cannot be claimed (already sent, or in flight elsewhere)
+        are reported with their stored state, so replaying a request with the
+        same idempotency key does not publish again.
+
+        Returns:
+            One outcome per intent, in the given order
+        """
+        intent_ids = [intent.id for intent in intents]
+        outcomes = {outcome['intent_id']: outcome for outcome in self.dispatch(self.claim(intent_ids=intent_ids))}
+
+        ordered = []
+        for intent_id in intent_ids:
+            if intent_id not in outcomes:
+                outcomes[intent_id] = self.describe(db.session.get(PublishIntent, intent_id))
+            ordered.append(outcomes[intent_id])
+        return ordered
+
+    def dispatch(self, intents: List[PublishIntent]) -> List[Dict[str, Any]]:
+        """
+        Deliver claimed intents concurrently and record all outcomes in one commit.
+
+        Intents that get no rate-limit token are deferred to the time their
+        platform/account bucket has one; they keep their attempt budget.
+
+        Must be called inside an application context.
+        """
+        if not intents:
+            return []
+
+        from src.services.service_registry import get_social_media_service, get_async_publish_engine
+        social_service = get_social_media_service()
+
+        accounts = self._load_accounts(intents)
+        expired = [account for account in accounts.values() if account.is_token_expired()]
+        if expired:
+            for account in expired:
+                social_service._refresh_token(account)
+            accounts = self._load_accounts(intents)
+
+        def account_id(intent):
+            account = accounts.get((intent.user_id, intent.platform))
+            return account.id if account else None
+
+        # Take rate-limit tokens and record the attempt before any platform call (crash detection)
+        now = datetime.utcnow()
+        decisions = self.rate_limiter.acquire_batch(
+            [(intent.platform, account_id(intent)) for intent in intents], now
+        )
+        deferred_outcomes = []
+        to_send = []
+        for intent, retry_at in zip(intents, decisions):
+            if retry_at is not None:
+                self._defer(intent, retry_at)
+                outcome = self.describe(intent)
+                outcome['deferred'] = True
+                deferred_outcomes.append(outcome)
+                continue
+            intent.attempts = (intent.attempts or 0) + 1
+            intent.dispatched_at = now
+            to_send.append(intent)
+        db.session.commit()
+
+        if not to_send:
+            _increment_stats(deferred=len(deferred_outcomes))
+            return deferred_outcomes
+
+        accounts = self._load_accounts(to_send)
+        tasks = [
+            (intent.platform, accounts.get((intent.user_id, intent.platform)), intent.content, intent.image_url,
+             intent.media_asset)
+            for intent in to_send
+        ]
+        app = current_app._get_current_object()
+
+        def deliver(task):
+            platform, account, content, image_url, media_asset = task
+            if account is None or not account.is_active:
+                return {
+                    'success': False,
+                    'error': f'No active {platform.title()} account found',
+                    'permanent': True,
+                    'error_class': 'auth'
+                }
+            try:
+                # Worker threads get their own app context and database session
+                with app.app_context():
+                    return social_service.publish_with_account(platform, account, content, image_url, media_asset)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'error': f'Publishing exception for {platform}: {str(e)}',
+                    'exception': str(e)
+                }
+
+        engine = get_async_publish_engine()
+        if engine is not None:
+            # All platform calls of the batch in flight at once on the event loop
+            try:
+                results = engine.publish(tasks)
+            except Exception as e:
+                # Some posts of the batch may have gone out: no stage, so they are dead-lettered, not retried
+                logger.error(f"Async publishing failed: {e}")
+                results = [
+                    {'success': False, 'error': f'Publishing exception for {platform}: {str(e)}', 'exception': str(e)}
+                    for platform, _, _, _, _ in tasks
+                ]
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tasks)))) as executor:
+                results = list(executor.map(deliver, tasks))
+
+        finished_at = datetime.utcnow()
+        throttled = self.rate_limiter.record_results([
+            (intent.platform, account.id if account else None, result.get('status_code'), result.get('rate_limit'))
+            for intent, (_, account, _, _, _), result in zip(to_send, tasks, results)
+        ], finished_at)
+        publications = self._load_publications(to_send)
+        outcomes = [
+            self._apply_result(intent, result, finished_at, throttled.get(index), publications.get(intent.id))
+            for index, (intent, result) in enumerate(zip(to_send, results))
+        ]
+        db.session.commit()
+
+        sent = sum(1 for outcome in outcomes if outcome['status'] == 'sent')
+        deferred = len(throttled) + len(deferred_outcomes)
+        retried = sum(1 for outcome in outcomes if outcome['status'] == 'pending') - len(throttled)
+        _increment_stats(sent=sent, retried=retried, deferred=deferred, dead=len(outcomes) - sent - retried - len(throttled))
+        return outcomes + deferred_outcomes
+
+    def _defer(self, intent: PublishIntent, retry_at: datetime):
+        """Return a claimed intent to the queue without using up an attempt."""
+        intent.status = 'pending'
+        intent.next_attempt_at = retry_at
+        intent.locked_by = None
+        intent.locked_until = None
+        intent.dispatched_at = None
+
+    @staticmethod
+    def _load_accounts(intents: List[PublishIntent]) -> Dict[tuple, SocialAccount]:
+        """Load the active account of every (user, platform) pair of intents or scheduled posts in one query."""
+        user_ids = {intent.user_id for intent in intents}
+        platforms = {intent.platform for intent in intents}
+        accounts = SocialAccount.query.filter(
+            SocialAccount.user_id.in_(user_ids),
+            SocialAccount.platform.in_(platforms),
+            SocialAccount.is_active == True
+        ).all()
+        return {(account.user_id, account.platform): account for account in accounts}
+
+    def _load_publications(self, intents: List[PublishIntent]) -> Dict[int, Publication]:
+        """Load the publication records of the given intents in one query."""
+        publications = Publication.query.filter(
+            Publication.intent_id.in_([intent.id for intent in intents])
+        ).all()
+        return {publication.intent_id: publication for publication in publications}
+
+    def _apply_result(self, intent: PublishIntent, result: Dict[str, Any], now: datetime,
+                      throttled_until: Optional[datetime] = None,
+                      publication: Optional[Publication] = None) -> Dict[str, Any]:
+        """Update an intent, its publication record and its Post/ScheduledPost from a platform result."""
+        summary = {
+            key: result.get(key)
+            for key in ('message', 'post_id', 'has_image', 'media_asset', 'status_code', 'error', 'step')
+            if result.get(key) is not None
+        }
+        intent.result = json.dumps(summary, default=str)
+        intent.locked_by = None
+        intent.locked_until = None
+
+        if result.get('success'):
+            intent.status = 'sent'
+            intent.sent_at = now
+            intent.last_error = None
+            if result.get('post_id'):
+                intent.external_id = str(result['post_id'])[:255]
+            self._mark_delivered(intent)
+        else:
+            error = result.get('error') or f'Failed to publish to {intent.platform.title()}'
+            error_class = self.classify_failure(result)
+            intent.last_error = error
+            if error_class == 'unknown_outcome':
+                # The post may have been created: dispatched_at stays set and only a manual requeue sends it again
+                intent.last_error = f'{error} (delivery outcome unknown, not retried)'
+                intent.status = 'dead'
+                self._mark_undeliverable(intent, intent.last_error, error_class, now)
+            elif throttled_until is not None:
+                # Rate limited: wait for the platform's reset instead of failing
+                intent.dispatched_at = None
+                intent.attempts = max(0, intent.attempts - 1)
+                intent.status = 'pending'
+                intent.next_attempt_at = throttled_until
+            elif error_class not in self.PERMANENT_ERROR_CLASSES and intent.attempts < intent.max_attempts:
+                # The platform answered with an error or the request never went out: nothing was published
+                intent.dispatched_at = None
+                intent.status = 'pending'
+                intent.next_attempt_at = now + self.backoff(intent.attempts)
+                # The media uploaded ahead of time may be what failed (e.g. expired); retry with a fresh upload
+                intent.media_asset = None
+            else:
+                intent.dispatched_at = None
+                intent.status = 'dead'
+                self._mark_undeliverable(intent, error, error_class, now)
+
+        self._record_publication(intent, publication)
+        outcome = self.describe(intent)
+        outcome['result'] = result
+        outcome['deferred'] = throttled_until is not None
+        return outcome
+
+    def _record_publication(self, intent: PublishIntent, publication: Optional[Publication] = None):
+        """Mirror the delivery state of an intent in its publication record."""
+        if publication is None:
+            publication = intent.publication
+        if publication is None:
+            # Intent written before publications were recorded
+            publication = Publication(
+                intent=intent,
+                user_id=intent.user_id,
+                post_id=intent.post_id,
+                scheduled_post_id=intent.scheduled_post_id,
+                platform=intent.platform
+            )
+            db.session.add(publication)
+
+        publication.attempts = intent.attempts
+        if intent.status == 'sent':
+            publication.status = 'published'
+            publication.external_id = intent.external_id
+            publication.published_at = intent.sent_at
+            publication.error = None
+        elif intent.status == 'dead':
+            publication.status = 'failed'
+            publication.error = intent.last_error
+        else:
+            publication.status = 'pending'
+            publication.error = intent.last_error
+
+    def _mark_delivered(self, intent: PublishIntent):
+        if intent.post_id:
+            post = db.session.get(Post, intent.post_id)
+            if post:
+                post.mark_as_posted(intent.platform)
+        if intent.scheduled_post_id:
+            scheduled_post = db.session.get(ScheduledPost, intent.scheduled_post_id)
+            if scheduled_post:
+                scheduled_post.mark_as_published()
+
+    def _mark_undeliverable(self, intent: PublishIntent, error: str, error_class: str, now: datetime):
+        if intent.scheduled_post_id:
+            scheduled_post = db.session.get(ScheduledPost, intent.scheduled_post_id)
+            if scheduled_post:
+                self._retry_or_fail(scheduled_post, error, error_class, now)
+
+    def _retry_or_fail(self, scheduled_post: ScheduledPost, error: str, error_class: str, now: datetime):
+        """Schedule another attempt of a scheduled post if its error class allows one, else fail it."""
+        policy = self.scheduled_retry_policy.get(error_class) or {}
+        max_attempts = 1 if error_class in self.PERMANENT_ERROR_CLASSES else policy.get('max_attempts', 1)
+        if error_class not in self.PERMANENT_ERROR_CLASSES and scheduled_post.attempts < max_attempts:
+            retry_at = now + self.backoff(scheduled_post.attempts, policy.get('base_seconds'), policy.get('max_seconds'))
+            scheduled_post.mark_for_retry(error, error_class, retry_at)
+            _increment_stats(scheduled_retries=1)
+            logger.info(f"Scheduled post {scheduled_post.id} failed ({error_class}), "
+                        f"attempt {scheduled_post.attempts + 1}/{max_attempts} at {retry_at}")
+        else:
+            scheduled_post.mark_as_failed(error, error_class)
+            _increment_stats(scheduled_failed=1)
+
+    @staticmethod
+    def classify_failure(result: Dict[str, Any]) -> str:
+        """
+        Error class of a failed platform result.
+
+        Returns:
+            'auth' (no usable account or token), 'rejected' (the platform refused
+            the content or request), 'rate_limited', 'server_error' (5xx),
+            'network' (408, or failures before the request creating the post
+            was sent) or 'unknown_outcome' (no answer after it was started)
+        """
+        if result.get('error_class'):
+            return result['error_class']
+        status_code = result.get('status_code')
+        if isinstance(status_code, int):
+            if status_code in (401, 403):
+                return 'auth'
+            if status_code == 429:
+                return 'rate_limited'
+            if status_code == 408:
+                return 'network'
+            if 400 <= status_code < 500:
+                return 'rejected'
+            if status_code >= 500:
+                return 'server_error'
+        if result.get('permanent'):
+            return 'rejected'
+        return 'network' if result.get('stage') == STAGE_PRE_SEND else 'unknown_outcome'
+
+    @classmethod
+    def is_permanent_failure(cls, result: Dict[str, Any]) -> bool:
+        """Client errors other than timeouts and rate limits will not succeed on retry."""
+        return cls.classify_failure(result) in cls.PERMANENT_ERROR_CLASSES
+
+    def backoff(self, attempts: int, base_seconds: Optional[int] = None, max_seconds: Optional[int] = None) -> timedelta:
+        """Exponential backoff with jitter for the given number of attempts."""
+        base_seconds = base_seconds or self.retry_base_seconds
+        max_seconds = max_seconds or self.retry_max_seconds
+        delay = min(max_seconds, base_seconds * (2 ** max(0, attempts - 1)))
+        return timedelta(seconds=random.uniform(delay / 2, delay))
+
+    @staticmethod
+    def describe(intent: PublishIntent) -> Dict[str, Any]:
+        """Outcome dictionary for an intent's stored state."""
+        return {
+            'intent_id': intent.id,
+            'platform': intent.platform,
+            'post_id': intent.post_id,
+            'scheduled_post_id': intent.scheduled_post_id,
+            'status': intent.status,
+            'success': intent.status == 'sent',
+            'attempts': intent.attempts,
+            'external_id': intent.external_id,
+            'error': intent.last_error,
+            'next_attempt_at': intent.next_attempt_at.isoformat() if intent.status == 'pending' and intent.next_attempt_at else None,
+            'result': intent.get_result()
+        }
+
+    @staticmethod
+    def summarize(outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'claimed': len(outcomes),
+            'sent': sum(1 for outcome in outcomes if outcome['status'] == 'sent'),
+            'retrying': sum(1 for outcome in outcomes if outcome['status'] == 'pending' and not outcome.get('deferred')),
+            'deferred': sum(1 for outcome in outcomes if outcome.get('deferred')),
+            'dead': sum(1 for outcome in outcomes if outcome['status'] == 'dead'),
+            'outcomes': outcomes
+        }
+
+    # Dead letters
+    def requeue(self, intent_id: int) -> Optional[PublishIntent]:
+        """Put a dead-lettered intent back into the queue with a fresh attempt budget."""
+        intent = PublishIntent.query.filter_by(id=intent_id, status='dead').first()
+        if not intent:
+            return None
+        scheduled_post = db.session.get(ScheduledPost, intent.scheduled_post_id) if intent.scheduled_post_id else None
+        if scheduled_post and scheduled_post.status != 'failed':
+            # The post is being retried with a newer intent (or was cancelled); requeueing could publish it twice
+            return None
+        intent.status = 'pending'
+        intent.attempts = 0
+        intent.next_attempt_at = datetime.utcnow()
+        intent.dispatched_at = None
+        if scheduled_post:
+            scheduled_post.status = 'queued'
+            scheduled_post.error_message = None
+        self._record_publication(intent)
+        db.session.commit()
+        return intent
+
+    # Observability
+    def get_stats(self, window_minutes: int = 15) -> Dict[str, Any]:
+        """
+        Outbox depth, lag and throughput.
+
+        Returns:
+            Counts per status, age of the oldest due intent (lag), sent per
+            minute and average delivery time over the window, and the
+            dispatcher counters of this process
+        """
+        now = datetime.utcnow()
+        counts = dict(
+            db.session.query(PublishIntent.status, func.count(PublishIntent.id))
+            .group_by(PublishIntent.status).all()
+        )
+
+        oldest_due = db.session.query(func.min(PublishIntent.next_attempt_at)).filter(
+            PublishIntent.status == 'pending',
+            PublishIntent.next_attempt_at <= now
+        ).scalar()
+        due = PublishIntent.query.filter(
+            PublishIntent.status == 'pending',
+            PublishIntent.next_attempt_at <= now
+        ).count()
+        waiting_for_retry = PublishIntent.query.filter(
+            PublishIntent.status == 'pending',
+            PublishIntent.attempts > 0
+        ).count()
+
+        window_start = now - timedelta(minutes=window_minutes)
+        recent = db.session.query(PublishIntent.created_at, PublishIntent.sent_at).filter(
+            PublishIntent.status == 'sent',
+            PublishIntent.sent_at >= window_start
+        ).all()
+        delivery_seconds = [(sent_at - created_at).total_seconds() for created_at, sent_at in recent]
+
+        dispatcher = get_dispatch_counters()
+
+        return {
+            'by_status': {status: counts.get(status, 0) for status in ('pending', 'processing', 'sent', 'dead')},
+            'due': due,
+            'waiting_for_retry': waiting_for_retry,
+            'lag_seconds': round((now - oldest_due).total_seconds(), 1) if oldest_due else 0,
+            'window_minutes': window_minutes,
+            'sent_per_minute': round(len(recent) / window_minutes, 2),
+            'avg_delivery_seconds': round(sum(delivery_seconds) / len(delivery_seconds), 2) if delivery_seconds else None,
+            'dispatcher': dispatcher
+        }
+
+def get_dispatch_counters():
+    """Dispatcher counters of this process."""
+    with _stats_lock:
+        return dict(_dispatch_stats)
+
+def _increment_stats(**counts):
+    with _stats_lock:
+        for key, value in counts.items():
+            _dispatch_stats[key] += value
@@ -0,0 +1,118 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import current_app, has_app_context
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class PublishWarmupService:
+    """
+    Pre-publish warm-up stage for scheduled posts.
+
+    Scheduled posts due within the warm-up window are prepared ahead of
+    time: tokens that would expire before the post goes out are refreshed
+    and the image is uploaded to the platform (LinkedIn asset, unpublished
+    Facebook photo, Twitter media, Instagram container). The media id is
+    stored on the scheduled post and handed to its publish intent, so at
+    the scheduled time only the post itself is created.
+
+    Warm-up is best effort: if an upload fails, the post is published with
+    a regular upload at its scheduled time.
+    """
+
+    DEFAULT_LEAD_MINUTES = 15
+    DEFAULT_BATCH_SIZE = 50
+    DEFAULT_MAX_WORKERS = 4
+    TOKEN_MARGIN = timedelta(minutes=5)  # Tokens must stay valid this long after the scheduled time
+
+    def __init__(self, lead_minutes: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_workers: Optional[int] = None):
+        config = current_app.config if has_app_context() else {}
+        self.lead = timedelta(minutes=lead_minutes or config.get('PUBLISH_WARMUP_MINUTES', self.DEFAULT_LEAD_MINUTES))
+        self.batch_size = batch_size or config.get('PUBLISH_WARMUP_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+        self.max_workers = max_workers or config.get('PUBLISH_WARMUP_MAX_WORKERS', self.DEFAULT_MAX_WORKERS)
+
+    def warm_up_upcoming_posts(self) -> Dict[str, Any]:
+        """
+        Prepare scheduled posts that are due within the warm-up window.
+
+        Must be called inside an application context.
+
+        Returns:
+            Counts of prepared posts, uploaded images, failed uploads and
+            token refreshes, plus error messages
+        """
+        from src.models import db, ScheduledPost
+        from src.services.publish_outbox_service import PublishOutboxService
+        from src.services.service_registry import get_social_media_service
+
+        now = datetime.utcnow()
+        results = {'prepared': 0, 'uploaded': 0, 'failed': 0, 'token_refreshes': 0, 'errors': []}
+        posts = ScheduledPost.query.filter(
+            ScheduledPost.status == 'scheduled',
+            ScheduledPost.prepared_at.is_(None),
+            ScheduledPost.scheduled_time > now,
+            ScheduledPost.scheduled_time <= now + self.lead
+        ).order_by(ScheduledPost.scheduled_time).limit(self.batch_size).all()
+        if not posts:
+            return results
+
+        social_service = get_social_media_service()
+        accounts = PublishOutboxService._load_accounts(posts)
+
+        # Refresh tokens that would expire before the last of their posts goes out
+        publish_until = {}
+        for post in posts:
+            key = (post.user_id, post.platform)
+            publish_until[key] = max(publish_until.get(key, post.scheduled_time), post.scheduled_time)
+        for key, account in accounts.items():
+            if account.expires_at and account.expires_at <= publish_until[key] + self.TOKEN_MARGIN:
+                social_service._refresh_token(account, needed_until=publish_until[key] + self.TOKEN_MARGIN)
+                results['token_refreshes'] += 1
+
+        # Upload images concurrently; workers only see plain snapshots of the accounts
+        uploads = []
+        for post in posts:
+            account = accounts.get((post.user_id, post.platform))
+            if (post.generated_image_url and account is not None and account.is_active
+                    and post.platform in social_service.http_publish_platforms):
+                snapshot = SimpleNamespace(id=account.id, account_id=account.account_id,
+                                           access_token=account.access_token)
+                uploads.append((post, snapshot, post.platform, post.content, post.generated_image_url))
+
+        app = current_app._get_current_object()
+
+        def prepare(upload):
+            _, account, platform, content, image_url = upload
+            try:
+                with app.app_context():
+                    return social_service.prepare_media(platform, account, content, image_url)
+            except Exception as e:
+                return {'success': False, 'error': f'Media upload exception for {platform}: {str(e)}'}
+
+        if uploads:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(uploads)))) as executor:
+                upload_results = list(executor.map(prepare, uploads))
+        else:
+            upload_results = []
+
+        for (post, account, platform, _, _), result in zip(uploads, upload_results):
+            if result.get('success'):
+                post.media_asset = result['media_asset']
+                post.prepared_account_id = account.id
+                results['uploaded'] += 1
+            else:
+                results['failed'] += 1
+                results['errors'].append(f"Scheduled post {post.id} ({platform}): {result.get('error')}")
+
+        prepared_at = datetime.utcnow()
+        for post in posts:
+            post.prepared_at = prepared_at
+        results['prepared'] = len(posts)
+        db.session.commit()
+
+        logger.info(f"Warm-up prepared {results['prepared']} scheduled posts: {results['uploaded']} images uploaded, "
+                    f"{results['failed']} failed, {results['token_refreshes']} token refreshes")
+        return results
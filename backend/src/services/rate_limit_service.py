@@ -0,0 +1,310 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from flask import current_app, has_app_context
+from sqlalchemy.exc import IntegrityError
+from typing import List, Dict, Any, Optional, Tuple
+from src.models import db, RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+# Fallback limits if RATE_LIMITS is not configured: tokens per second and burst size
+DEFAULT_RATE_LIMITS = {
+    'linkedin': {'platform_rate': 2.0, 'platform_burst': 10, 'account_rate': 0.1, 'account_burst': 3},
+    'facebook': {'platform_rate': 5.0, 'platform_burst': 20, 'account_rate': 0.2, 'account_burst': 5},
+    'instagram': {'platform_rate': 1.0, 'platform_burst': 5, 'account_rate': 0.05, 'account_burst': 2},
+    'twitter': {'platform_rate': 1.0, 'platform_burst': 5, 'account_rate': 0.1, 'account_burst': 3}
+}
+
+DEFAULT_BLOCK_SECONDS = 60
+
+def parse_rate_limit_headers(headers) -> Dict[str, Any]:
+    """
+    Extract rate-limit information from platform response headers.
+
+    Understands Retry-After, the X-RateLimit-* / x-rate-limit-* families
+    (LinkedIn, Twitter) and Facebook's usage headers.
+
+    Returns:
+        Dictionary with any of retry_after (seconds), limit, remaining,
+        reset_in (seconds) and usage_percent
+    """
+    if not headers:
+        return {}
+
+    def header(*names):
+        for name in names:
+            value = headers.get(name)
+            if value not in (None, ''):
+                return value
+        return None
+
+    info = {}
+    now = datetime.utcnow()
+
+    retry_after = header('Retry-After', 'retry-after')
+    if retry_after is not None:
+        try:
+            info['retry_after'] = max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after).replace(tzinfo=None)
+                info['retry_after'] = max(0.0, (retry_at - now).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    for key, names in (('limit', ('X-RateLimit-Limit', 'x-rate-limit-limit')),
+                       ('remaining', ('X-RateLimit-Remaining', 'x-rate-limit-remaining'))):
+        value = header(*names)
+        if value is not None:
+            try:
+                info[key] = int(float(value))
+            except ValueError:
+                pass
+
+    reset = header('X-RateLimit-Reset', 'x-rate-limit-reset')
+    if reset is not None:
+        try:
+            reset = float(reset)
+            # Epoch timestamp (Twitter) or seconds until reset
+            info['reset_in'] = max(0.0, reset - now.timestamp()) if reset > 1e9 else reset
+        except ValueError:
+            pass
+
+    usage = header('x-app-usage', 'X-App-Usage', 'x-business-use-case-usage', 'X-Business-Use-Case-Usage')
+    if usage:
+        try:
+            usage_data = json.loads(usage)
+            # Business use case usage is keyed by business id with a list of entries
+            entries = [usage_data] if 'call_count' in usage_data else [
+                entry for value in usage_data.values() for entry in (value if isinstance(value, list) else [value])
+            ]
+            percents = [
+                float(entry.get(field, 0))
+                for entry in entries if isinstance(entry, dict)
+                for field in ('call_count', 'total_cputime', 'total_time')
+            ]
+            if percents:
+                info['usage_percent'] = max(percents)
+            blocked_minutes = max((float(entry.get('estimated_time_to_regain_access', 0))
+                                   for entry in entries if isinstance(entry, dict)), default=0)
+            if blocked_minutes:
+                info['retry_after'] = max(info.get('retry_after', 0), blocked_minutes * 60)
+        except (TypeError, ValueError, AttributeError):
+            pass
+
+    return info
+
+class RateLimitService:
+    """
+    Token-bucket rate limiting for publishing, shared across workers.
+
+    Every publish needs a token from its platform bucket and from its
+    account bucket. Buckets live in the database and are read with
+    SELECT ... FOR UPDATE (PostgreSQL), so all workers and processes drain
+    a wave at the same combined rate. Work that gets no token is deferred
+    to the time the bucket will have one. Refill rates are adjusted from the
+    rate-limit headers the platforms return: 429s block a bucket until the
+    platform's reset time and halve the platform rate, which then recovers
+    additively on successful calls.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        if limits is None and has_app_context():
+            limits = current_app.config.get('RATE_LIMITS')
+        self.limits = limits or DEFAULT_RATE_LIMITS
+
+    def _limits_for(self, platform: str) -> Dict[str, float]:
+        return self.limits.get(platform) or DEFAULT_RATE_LIMITS.get(platform) or DEFAULT_RATE_LIMITS['linkedin']
+
+    def _configured(self, bucket_key: str, platform: str) -> Tuple[float, float]:
+        """Configured (burst, rate) of a bucket."""
+        limits = self._limits_for(platform)
+        if bucket_key.startswith('platform:'):
+            return float(limits['platform_burst']), float(limits['platform_rate'])
+        return float(limits['account_burst']), float(limits['account_rate'])
+
+    @staticmethod
+    def bucket_keys(platform: str, account_id: Optional[int]) -> List[str]:
+        keys = [f'platform:{platform}']
+        if account_id is not None:
+            keys.append(f'account:{account_id}')
+        return keys
+
+    def _load_buckets(self, keys: Dict[str, str], now: datetime) -> Dict[str, RateLimitBucket]:
+        """Load (and lock) the buckets for the given key -> platform mapping, creating missing ones."""
+        query = RateLimitBucket.query.filter(RateLimitBucket.bucket_key.in_(list(keys)))
+        if db.engine.dialect.name == 'postgresql':
+            query = query.with_for_update()
+        buckets = {bucket.bucket_key: bucket for bucket in query.all()}
+
+        for key, platform in keys.items():
+            if key in buckets:
+                continue
+            capacity, rate = self._configured(key, platform)
+            bucket = RateLimitBucket(
+                bucket_key=key,
+                platform=platform,
+                capacity=capacity,
+                refill_rate=rate,
+                tokens=capacity,
+                throttled_count=0,
+                updated_at=now
+            )
+            try:
+                with db.session.begin_nested():
+                    db.session.add(bucket)
+            except IntegrityError:
+                # Created concurrently by another worker
+                bucket = RateLimitBucket.query.filter_by(bucket_key=key).first()
+            buckets[key] = bucket
+        return buckets
+
+    @staticmethod
+    def _refill(bucket: RateLimitBucket, now: datetime):
+        elapsed = max(0.0, (now - bucket.updated_at).total_seconds()) if bucket.updated_at else 0.0
+        bucket.tokens = min(bucket.capacity, bucket.tokens + elapsed * bucket.refill_rate)
+        bucket.updated_at = now
+
+    @staticmethod
+    def _available_at(bucket: RateLimitBucket, now: datetime, queued: int = 0) -> Optional[datetime]:
+        """
+        When the bucket can hand out a token, or None if it can right now.
+
+        queued is the number of requests of the current batch already deferred
+        on this bucket; each one is given the next refill slot, so a wave is
+        spread out at the refill rate instead of retrying all at once.
+        """
+        rate = bucket.refill_rate if bucket.refill_rate > 0 else 1e-3
+        if bucket.blocked_until and bucket.blocked_until > now:
+            return bucket.blocked_until + timedelta(seconds=queued / rate)
+        if bucket.tokens >= 1 and not queued:
+            return None
+        return now + timedelta(seconds=(1 + queued - min(bucket.tokens, 1)) / rate)
+
+    def acquire_batch(self, requests: List[Tuple[str, Optional[int]]],
+                      now: Optional[datetime] = None) -> List[Optional[datetime]]:
+        """
+        Take one token per (platform, account id) request, in order.
+
+        Changes are added to the current transaction; the caller commits.
+
+        Returns:
+            Per request None if granted, otherwise the time to retry at
+        """
+        if not requests:
+            return []
+        now = now or datetime.utcnow()
+
+        keys = {}
+        for platform, account_id in requests:
+            for key in self.bucket_keys(platform, account_id):
+                keys[key] = platform
+        buckets = self._load_buckets(keys, now)
+        for bucket in buckets.values():
+            self._refill(bucket, now)
+
+        decisions = []
+        queued = {}
+        for platform, account_id in requests:
+            request_keys = self.bucket_keys(platform, account_id)
+            waits = {key: self._available_at(buckets[key], now, queued.get(key, 0)) for key in request_keys}
+            waits = {key: wait for key, wait in waits.items() if wait is not None}
+            if waits:
+                # Only the exhausted buckets hand out their next slot
+                for key in waits:
+                    queued[key] = queued.get(key, 0) + 1
+                decisions.append(max(waits.values()))
+                continue
+            for key in request_keys:
+                buckets[key].tokens -= 1
+            decisions.append(None)
+        return decisions
+
+    def record_results(self, responses: List[Tuple[str, Optional[int], Optional[int], Dict[str, Any]]],
+                       now: Optional[datetime] = None) -> Dict[int, datetime]:
+        """
+        Learn from platform responses.
+
+        Changes are added to the current transaction; the caller commits.
+
+        Args:
+            responses: (platform, account id, HTTP status code, parsed rate-limit info) tuples
+
+        Returns:
+            For throttled responses, their index mapped to the time to retry at
+        """
+        if not responses:
+            return {}
+        now = now or datetime.utcnow()
+
+        keys = {}
+        for platform, account_id, _, _ in responses:
+            for key in self.bucket_keys(platform, account_id):
+                keys[key] = platform
+        buckets = self._load_buckets(keys, now)
+
+        retry_at = {}
+        slowed_down = set()
+        for index, (platform, account_id, status_code, info) in enumerate(responses):
+            info = info or {}
+            platform_bucket = buckets[f'platform:{platform}']
+            account_bucket = buckets.get(f'account:{account_id}') if account_id is not None else None
+            _, configured_rate = self._configured(platform_bucket.bucket_key, platform)
+
+            target = account_bucket or platform_bucket
+            if 'limit' in info:
+                target.reported_limit = info['limit']
+            if 'remaining' in info:
+                target.reported_remaining = info['remaining']
+            if 'reset_in' in info:
+                target.reported_reset_at = now + timedelta(seconds=info['reset_in'])
+
+            throttled = status_code == 429
+            quota_exhausted = info.get('remaining') is not None and info['remaining'] <= 0
+            app_saturated = info.get('usage_percent', 0) >= 100
+
+            if throttled or quota_exhausted or app_saturated:
+                wait = info.get('retry_after') or info.get('reset_in') or DEFAULT_BLOCK_SECONDS
+                until = now + timedelta(seconds=wait)
+                # App-wide usage limits block the whole platform, everything else the account
+                blocked = platform_bucket if app_saturated or account_bucket is None else account_bucket
+                blocked.blocked_until = max(blocked.blocked_until or now, until)
+                blocked.tokens = min(blocked.tokens, 0)
+                if throttled:
+                    blocked.throttled_count = (blocked.throttled_count or 0) + 1
+                    retry_at[index] = blocked.blocked_until
+                    if platform not in slowed_down:
+                        # Halve once per batch, not once per throttled call
+                        slowed_down.add(platform)
+                        platform_bucket.refill_rate = max(configured_rate * 0.1, platform_bucket.refill_rate * 0.5)
+                continue
+
+            if info.get('usage_percent', 0) >= 90:
+                # Approaching the app-wide limit: slow down before it is hit
+                if platform not in slowed_down:
+                    slowed_down.add(platform)
+                    platform_bucket.refill_rate = max(configured_rate * 0.1, platform_bucket.refill_rate * 0.5)
+            elif platform not in slowed_down and (status_code is None or status_code < 400):
+                platform_bucket.refill_rate = min(configured_rate, platform_bucket.refill_rate + configured_rate * 0.1)
+
+            if account_bucket is not None and info.get('remaining') and info.get('reset_in'):
+                # Spread the remaining quota over the rest of the window
+                _, account_rate = self._configured(account_bucket.bucket_key, platform)
+                account_bucket.refill_rate = min(account_rate, max(account_rate * 0.1, info['remaining'] / info['reset_in']))
+
+        if retry_at:
+            logger.warning(f"Rate limited on {len(retry_at)} publish calls; deferring them")
+        return retry_at
+
+    def get_buckets(self, platform: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Current bucket states, most recently throttled first."""
+        query = RateLimitBucket.query
+        if platform:
+            query = query.filter_by(platform=platform)
+        buckets = query.order_by(
+            RateLimitBucket.blocked_until.desc().nullslast(),
+            RateLimitBucket.updated_at.desc()
+        ).limit(limit).all()
+        return [bucket.to_dict() for bucket in buckets]
@@ -0,0 +1,410 @@
+import logging
+from datetime import datetime, timedelta
+import pytz
+from dateutil.rrule import rrulestr, DAILY
+from flask import current_app, has_app_context
+from sqlalchemy import insert, or_
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Any, List, Optional
+from src.services.background_scheduler import notify_scheduled_post
+
+logger = logging.getLogger(__name__)
+
+class RecurringScheduleService:
+    """
+    Service for recurring schedules (post series).
+
+    A series stores its recurrence rule once. Its occurrences are
+    materialized lazily: only those within the rolling window
+    (RECURRING_WINDOW_DAYS ahead of now) exist as ScheduledPost rows, which
+    are then published like any other scheduled post. The scheduler extends
+    the window of every active series once half of it has passed, so the
+    number of unpublished rows per series stays bounded however long the
+    series runs.
+
+    Editing the content of a series rewrites its unpublished occurrences in
+    one UPDATE; changing the rule, pausing or cancelling deletes them in one
+    DELETE and materializes again from now where needed. Occurrences that
+    were already attempted (queued, published, retried) are never touched.
+    """
+
+    DEFAULT_WINDOW_DAYS = 14
+    DEFAULT_MAX_OCCURRENCES = 100
+    DEFAULT_BATCH_SIZE = 100
+    CONTENT_FIELDS = {'title': 'title', 'content': 'content', 'image_url': 'generated_image_url', 'platform': 'platform'}
+
+    def __init__(self, window_days: Optional[int] = None, max_occurrences: Optional[int] = None,
+                 batch_size: Optional[int] = None):
+        config = current_app.config if has_app_context() else {}
+        self.window = timedelta(days=window_days or config.get('RECURRING_WINDOW_DAYS', self.DEFAULT_WINDOW_DAYS))
+        self.max_occurrences = max_occurrences or config.get('RECURRING_MAX_OCCURRENCES', self.DEFAULT_MAX_OCCURRENCES)
+        self.batch_size = batch_size or config.get('RECURRING_BATCH_SIZE', self.DEFAULT_BATCH_SIZE)
+
+    # Rules
+    @staticmethod
+    def parse_rule(rule_text: str, dtstart: datetime):
+        """
+        Parse an RRULE (e.g. 'FREQ=WEEKLY;BYDAY=TU' or 'RRULE:FREQ=MONTHLY;BYDAY=1MO;COUNT=12').
+
+        Rules recurring more often than daily are rejected, and UNTIL is a
+        wall-clock time like dtstart (no trailing 'Z').
+
+        Raises:
+            ValueError: If the rule is invalid
+        """
+        if not isinstance(rule_text, str):
+            raise ValueError('rrule must be a string')
+        rule_text = rule_text.strip()
+        if rule_text.upper().startswith('RRULE:'):
+            rule_text = rule_text[len('RRULE:'):]
+        if not rule_text or '\n' in rule_text or 'DTSTART' in rule_text.upper():
+            raise ValueError('rrule must be a single RRULE, without DTSTART')
+        try:
+            rule = rrulestr(rule_text, dtstart=dtstart)
+        except Exception as e:
+            raise ValueError(f'Invalid rrule: {str(e)}')
+        if rule._freq > DAILY:
+            raise ValueError('Rules may recur at most daily (FREQ=DAILY, WEEKLY, MONTHLY or YEARLY)')
+        return rule
+
+    @staticmethod
+    def _to_utc(local_time: datetime, timezone) -> datetime:
+        return timezone.localize(local_time).astimezone(pytz.UTC).replace(tzinfo=None)
+
+    @staticmethod
+    def _to_local(utc_time: datetime, timezone) -> datetime:
+        return pytz.UTC.localize(utc_time).astimezone(timezone).replace(tzinfo=None)
+
+    def occurrences(self, schedule, after: datetime, until: datetime, limit: Optional[int] = None) -> List[datetime]:
+        """
+        UTC times of the occurrences of a series in (after, until].
+
+        The rule is expanded in the series' timezone, so 'every Tuesday 09:00'
+        stays at 09:00 local time across daylight saving changes.
+        """
+        timezone = pytz.timezone(schedule.timezone)
+        rule = self.parse_rule(schedule.rrule, schedule.dtstart)
+        # A day of slack on both sides for the UTC offset; filtered exactly below
+        local_times = rule.between(self._to_local(after, timezone) - timedelta(days=1),
+                                   self._to_local(until, timezone) + timedelta(days=1), inc=True)
+        times = []
+        for local_time in local_times:
+            utc_time = self._to_utc(local_time, timezone)
+            if after < utc_time <= until:
+                times.append(utc_time)
+                if limit and len(times) >= limit:
+                    break
+        return times
+
+    # Materialization
+    def materialize(self, schedule, now: Optional[datetime] = None) -> List[tuple]:
+        """
+        Add the missing occurrences of a series up to the end of the window
+        to the current transaction (the caller commits).
+
+        Occurrences before now are never created, so a new or resumed series
+        starts with its next occurrence.
+
+        Returns:
+            (scheduled_post_id, scheduled_time) of the created rows
+        """
+        from src.models import db, ScheduledPost, RecurringSchedule
+
+        now = now or datetime.utcnow()
+        previous = schedule.materialized_until
+        start = max(previous, now) if previous else now
+        until = now + self.window
+        times = self.occurrences(schedule, start, until, limit=self.max_occurrences) if until > start else []
+        if len(times) == self.max_occurrences:
+            # Capped; continue after the last one next time
+            until = times[-1]
+
+        # Only one process extends a series at a time; the loser of a race leaves it alone
+        claimed = RecurringSchedule.query.filter(
+            RecurringSchedule.id == schedule.id,
+            RecurringSchedule.materialized_until.is_(None) if previous is None
+            else RecurringSchedule.materialized_until == previous
+        ).update({'materialized_until': max(until, previous or until)}, synchronize_session=False)
+        if not claimed:
+            return []
+
+        if times:
+            # Occurrences kept when the series was paused or edited (cancelled, attempted) keep their slot
+            existing = {row.scheduled_time for row in db.session.query(ScheduledPost.scheduled_time).filter(
+                ScheduledPost.recurring_schedule_id == schedule.id,
+                ScheduledPost.scheduled_time.in_(times)
+            )}
+            times = [scheduled_time for scheduled_time in times if scheduled_time not in existing]
+
+        created = []
+        if times:
+            rows = [{
+                'user_id': schedule.user_id,
+                'post_id': schedule.post_id,
+                'recurring_schedule_id': schedule.id,
+                'title': schedule.title,
+                'content': schedule.content,
+                'generated_image_url': schedule.generated_image_url,
+                'platform': schedule.platform,
+                'scheduled_time': scheduled_time,
+                'timezone': schedule.timezone,
+                'status': 'scheduled',
+                'attempts': 0,
+                'created_at': now,
+                'updated_at': now
+            } for scheduled_time in times]
+            created = [tuple(row) for row in db.session.execute(
+                insert(ScheduledPost).returning(ScheduledPost.id, ScheduledPost.scheduled_time), rows
+            ).all()]
+
+        schedule.materialized_until = max(until, previous or until)
+        schedule.occurrences_created = (schedule.occurrences_created or 0) + len(created)
+        timezone = pytz.timezone(schedule.timezone)
+        if self.parse_rule(schedule.rrule, schedule.dtstart).after(self._to_local(schedule.materialized_until, timezone)) is None:
+            schedule.status = 'finished'
+        return created
+
+    def materialize_due(self) -> Dict[str, int]:
+        """
+        Extend the window of active series once half of it has passed.
+
+        Called by the scheduler. Every series is committed on its own, so a
+        broken rule only affects its own series.
+
+        Returns:
+            Number of series extended and of scheduled posts created
+        """
+        from src.models import db, RecurringSchedule
+
+        now = datetime.utcnow()
+        series = RecurringSchedule.query.filter(
+            RecurringSchedule.status == 'active',
+            or_(RecurringSchedule.materialized_until.is_(None),
+                RecurringSchedule.materialized_until < now + self.window / 2)
+        ).order_by(RecurringSchedule.materialized_until).limit(self.batch_size).all()
+
+        results = {'series': 0, 'created': 0}
+        for schedule in series:
+            try:
+                created = self.materialize(schedule, now)
+                db.session.commit()
+            except (IntegrityError, ValueError) as e:
+                logger.error(f"Error materializing recurring schedule {schedule.id}: {e}")
+                db.session.rollback()
+                continue
+            results['series'] += 1
+            results['created'] += len(created)
+            for scheduled_post_id, scheduled_time in created:
+                notify_scheduled_post(scheduled_post_id, scheduled_time)
+
+        if results['created']:
+            logger.info(f"Materialized {results['created']} occurrences of {results['series']} recurring schedules")
+        return results
+
+    def _delete_unpublished(self, schedule) -> List[int]:
+        """Delete the occurrences of a series that were never attempted; returns their ids."""
+        from src.models import db, ScheduledPost
+
+        ids = [row.id for row in db.session.query(ScheduledPost.id).filter(
+            ScheduledPost.recurring_schedule_id == schedule.id,
+            ScheduledPost.status == 'scheduled',
+            ScheduledPost.attempts == 0
+        ).all()]
+        if ids:
+            ScheduledPost.query.filter(
+                ScheduledPost.id.in_(ids),
+                ScheduledPost.status == 'scheduled'
+            ).delete(synchronize_session=False)
+        schedule.materialized_until = None
+        return ids
+
+    # Series
+    def create_schedule(self, user_id: int, post_content: Dict[str, Any], platform: str, rule_text: str,
+                        dtstart: datetime, timezone: str = 'UTC', post_id: Optional[int] = None):
+        """
+        Create a series and materialize its first window.
+
+        Args:
+            user_id: Owner of the series
+            post_content: Dictionary with title, content and image_url
+            platform: Platform to publish to
+            rule_text: RRULE of the series
+            dtstart: First occurrence, wall-clock time in timezone
+            timezone: User's timezone (default: UTC)
+            post_id: Optional generated post the series was created from
+
+        Returns:
+            (RecurringSchedule, number of occurrences created)
+
+        Raises:
+            ValueError: If the platform, content, rule or timezone is invalid or the rule
+                has no future occurrence
+        """
+        from src.models import db, RecurringSchedule
+
+        self._validate_content(dict(post_content, platform=platform))
+        self._validate(rule_text, dtstart, timezone)
+        schedule = RecurringSchedule(
+            user_id=user_id,
+            post_id=post_id,
+            title=post_content.get('title', ''),
+            content=post_content.get('content', ''),
+            generated_image_url=post_content.get('image_url', ''),
+            platform=platform,
+            rrule=rule_text.strip(),
+            dtstart=dtstart,
+            timezone=timezone,
+            status='active',
+            occurrences_created=0
+        )
+        db.session.add(schedule)
+        db.session.flush()
+        created = self._materialize_and_commit(schedule)
+        for scheduled_post_id, scheduled_time in created:
+            notify_scheduled_post(scheduled_post_id, scheduled_time)
+
+        logger.info(f"Recurring schedule {schedule.id} created: {platform} {schedule.rrule} "
+                    f"from {dtstart} {timezone}, {len(created)} occurrences materialized")
+        return schedule, len(created)
+
+    def _materialize_and_commit(self, schedule) -> List[tuple]:
+        """Materialize the first window of a new or changed series and commit."""
+        from src.models import db
+
+        try:
+            created = self.materialize(schedule)
+            db.session.commit()
+        except IntegrityError as e:
+            # Another process materialized an occurrence of the series at the same time
+            db.session.rollback()
+            logger.error(f"Error materializing recurring schedule {schedule.id}: {e}")
+            raise ValueError('The series was changed concurrently, please try again')
+        return created
+
+    @staticmethod
+    def _validate_content(content: Dict[str, Any]):
+        from src.services.social_media_service import SocialMediaService
+
+        if 'platform' in content and content['platform'] not in SocialMediaService.SUPPORTED_PLATFORMS:
+            raise ValueError(f"platform must be one of {', '.join(SocialMediaService.SUPPORTED_PLATFORMS)}")
+        if 'content' in content and (not isinstance(content['content'], str) or not content['content'].strip()):
+            raise ValueError('content must be a non-empty string')
+        for field in ('title', 'image_url'):
+            if content.get(field) is not None and not isinstance(content[field], str):
+                raise ValueError(f'{field} must be a string')
+
+    def _validate(self, rule_text: str, dtstart: datetime, timezone: str):
+        if not isinstance(timezone, str):
+            raise ValueError('Invalid timezone')
+        try:
+            tz = pytz.timezone(timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            raise ValueError('Invalid timezone')
+        rule = self.parse_rule(rule_text, dtstart)
+        if rule.after(self._to_local(datetime.utcnow(), tz)) is None:
+            raise ValueError('The rule has no occurrence in the future')
+
+    def get_schedules(self, user_id: int, status: Optional[str] = None):
+        """Series of a user, newest first."""
+        from src.models import RecurringSchedule
+
+        query = RecurringSchedule.query.filter_by(user_id=user_id)
+        if status:
+            query = query.filter_by(status=status)
+        return query.order_by(RecurringSchedule.created_at.desc()).all()
+
+    def get_schedule(self, schedule_id: int, user_id: int):
+        from src.models import RecurringSchedule
+
+        return RecurringSchedule.query.filter_by(id=schedule_id, user_id=user_id).first()
+
+    def get_upcoming(self, schedule, limit: int = 20):
+        """Materialized occurrences of a series that have not gone out yet, earliest first."""
+        from src.models import ScheduledPost
+
+        return ScheduledPost.query.filter(
+            ScheduledPost.recurring_schedule_id == schedule.id,
+            ScheduledPost.status.in_(['scheduled', 'retrying'])
+        ).order_by(ScheduledPost.scheduled_time).limit(limit).all()
+
+    def update_schedule(self, schedule_id: int, user_id: int, changes: Dict[str, Any]):
+        """
+        Edit a whole series.
+
+        Content changes (title, content, image_url, platform) are applied to
+        all unpublished occurrences in one UPDATE. Changes of rrule, dtstart or
+        timezone replace the unpublished occurrences. status 'paused' removes
+        them, 'active' resumes the series from now.
+
+        Returns:
+            The updated RecurringSchedule, or None if not found
+
+        Raises:
+            ValueError: If the new platform, content, rule, timezone or status is invalid
+        """
+        from src.models import db, ScheduledPost
+
+        schedule = self.get_schedule(schedule_id, user_id)
+        if not schedule or schedule.status == 'cancelled':
+            return None
+
+        content = {column: changes[field] for field, column in self.CONTENT_FIELDS.items() if field in changes}
+        rule_changed = any(field in changes for field in ('rrule', 'dtstart', 'timezone'))
+        status = changes.get('status')
+        if status not in (None, 'active', 'paused'):
+            raise ValueError("status must be 'active' or 'paused'")
+        self._validate_content({field: changes[field] for field in self.CONTENT_FIELDS if field in changes})
+        if rule_changed:
+            self._validate(changes.get('rrule', schedule.rrule), changes.get('dtstart', schedule.dtstart),
+                           changes.get('timezone', schedule.timezone))
+
+        for column, value in content.items():
+            setattr(schedule, column, value)
+        if content:
+            ScheduledPost.query.filter(
+                ScheduledPost.recurring_schedule_id == schedule.id,
+                ScheduledPost.status == 'scheduled',
+                ScheduledPost.attempts == 0
+            ).update(dict(content, media_asset=None, prepared_account_id=None, prepared_at=None,
+                          updated_at=datetime.utcnow()), synchronize_session=False)
+
+        removed = []
+        if rule_changed or status is not None:
+            removed = self._delete_unpublished(schedule)
+            if rule_changed:
+                schedule.rrule = changes.get('rrule', schedule.rrule).strip()
+                schedule.dtstart = changes.get('dtstart', schedule.dtstart)
+                schedule.timezone = changes.get('timezone', schedule.timezone)
+            schedule.status = status or ('active' if schedule.status == 'finished' else schedule.status)
+
+        created = []
+        if schedule.status == 'active' and schedule.materialized_until is None:
+            db.session.flush()
+            created = self._materialize_and_commit(schedule)
+        else:
+            db.session.commit()
+
+        for scheduled_post_id in removed:
+            notify_scheduled_post(scheduled_post_id)
+        for scheduled_post_id, scheduled_time in created:
+            notify_scheduled_post(scheduled_post_id, scheduled_time)
+        logger.info(f"Recurring schedule {schedule.id} updated: {len(removed)} occurrences removed, "
+                    f"{len(created)} materialized")
+        return schedule
+
+    def cancel_schedule(self, schedule_id: int, user_id: int) -> bool:
+        """Cancel a series and delete its unpublished occurrences."""
+        from src.models import db
+
+        schedule = self.get_schedule(schedule_id, user_id)
+        if not schedule or schedule.status == 'cancelled':
+            return False
+
+        removed = self._delete_unpublished(schedule)
+        schedule.status = 'cancelled'
+        db.session.commit()
+        for scheduled_post_id in removed:
+            notify_scheduled_post(scheduled_post_id)
+
+        logger.info(f"Cancelled recurring schedule {schedule_id}, {len(removed)} occurrences removed")
+        return True
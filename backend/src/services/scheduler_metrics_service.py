@@ -0,0 +1,192 @@
+import logging
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class SchedulerMetricsService:
+    """
+    Timeliness and throughput of scheduled publishing.
+
+    Database figures (status counts, backlog, lag, throughput, retries and
+    failure rates per platform over a recent window) cover all scheduler
+    processes. The counters under 'process' only cover this process, which
+    is the scheduler worker's own if it runs separately.
+
+    Lag is publish time minus scheduled time, recorded per post when it is
+    published (ScheduledPost.publish_lag_seconds), so it includes retries.
+    """
+
+    DEFAULT_WINDOW_MINUTES = 60
+    DEFAULT_LAG_SLO_SECONDS = 60
+
+    def __init__(self, lag_slo_seconds: Optional[int] = None):
+        config = current_app.config if has_app_context() else {}
+        self.lag_slo_seconds = lag_slo_seconds or config.get('SCHEDULER_LAG_SLO_SECONDS', self.DEFAULT_LAG_SLO_SECONDS)
+
+    def get_metrics(self, window_minutes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Collect the scheduler metrics.
+
+        Must be called inside an application context.
+
+        Args:
+            window_minutes: Window for lag, throughput, retries and failure rates
+
+        Returns:
+            Status counts, backlog, lag percentiles, throughput, retries,
+            per-platform failure rates, process counters and SLO alerts
+        """
+        from src.models import db, ScheduledPost
+        from src.services.scheduler_service import SchedulerService, get_scheduler_counters
+        from src.services.publish_outbox_service import get_dispatch_counters
+
+        window_minutes = window_minutes or self.DEFAULT_WINDOW_MINUTES
+        now = datetime.utcnow()
+        window_start = now - timedelta(minutes=window_minutes)
+
+        counts = dict(
+            db.session.query(ScheduledPost.status, func.count(ScheduledPost.id))
+            .group_by(ScheduledPost.status).all()
+        )
+        backlog = SchedulerService().get_backlog()
+
+        lags = [row[0] for row in db.session.query(ScheduledPost.publish_lag_seconds).filter(
+            ScheduledPost.status == 'published',
+            ScheduledPost.updated_at >= window_start,
+            ScheduledPost.publish_lag_seconds.isnot(None)
+        ).all()]
+
+        # Posts that reached a final state within the window
+        finished = db.session.query(
+            ScheduledPost.platform, ScheduledPost.status,
+            func.count(ScheduledPost.id), func.sum(ScheduledPost.attempts - 1)
+        ).filter(
+            ScheduledPost.status.in_(['published', 'failed']),
+            ScheduledPost.updated_at >= window_start
+        ).group_by(ScheduledPost.platform, ScheduledPost.status).all()
+
+        platforms = {}
+        retry_attempts = 0
+        for platform, status, count, retries in finished:
+            entry = platforms.setdefault(platform, {'published': 0, 'failed': 0})
+            entry[status] = count
+            retry_attempts += max(0, retries or 0)
+        for entry in platforms.values():
+            total = entry['published'] + entry['failed']
+            entry['failure_rate'] = round(entry['failed'] / total, 4) if total else 0.0
+        published_after_retry = db.session.query(func.count(ScheduledPost.id)).filter(
+            ScheduledPost.status == 'published',
+            ScheduledPost.updated_at >= window_start,
+            ScheduledPost.attempts > 1
+        ).scalar()
+
+        published = sum(entry['published'] for entry in platforms.values())
+        failed = sum(entry['failed'] for entry in platforms.values())
+        db.session.commit()
+
+        lag = self._summarize_lags(lags)
+        metrics = {
+            'generated_at': now.isoformat(),
+            'window_minutes': window_minutes,
+            'lag_slo_seconds': self.lag_slo_seconds,
+            'by_status': {status: counts.get(status, 0) for status in ScheduledPost.STATUSES},
+            'backlog': backlog,
+            'lag': lag,
+            'throughput': {
+                'published_per_minute': round(published / window_minutes, 2),
+                'failed_per_minute': round(failed / window_minutes, 2)
+            },
+            'retries': {
+                'retrying': counts.get('retrying', 0),
+                'retry_attempts': retry_attempts,
+                'published_after_retry': published_after_retry
+            },
+            'platforms': platforms,
+            'process': {
+                'scheduler': get_scheduler_counters(),
+                'dispatcher': get_dispatch_counters()
+            }
+        }
+        metrics['alerts'] = self._alerts(metrics)
+        return metrics
+
+    def _summarize_lags(self, lags: List[float]) -> Dict[str, Any]:
+        if not lags:
+            return {'count': 0, 'avg_seconds': None, 'p50_seconds': None, 'p95_seconds': None,
+                    'p99_seconds': None, 'max_seconds': None, 'within_slo_ratio': None}
+        lags = sorted(lags)
+        return {
+            'count': len(lags),
+            'avg_seconds': round(sum(lags) / len(lags), 2),
+            'p50_seconds': round(_percentile(lags, 0.5), 2),
+            'p95_seconds': round(_percentile(lags, 0.95), 2),
+            'p99_seconds': round(_percentile(lags, 0.99), 2),
+            'max_seconds': round(lags[-1], 2),
+            'within_slo_ratio': round(sum(1 for lag in lags if lag <= self.lag_slo_seconds) / len(lags), 4)
+        }
+
+    def _alerts(self, metrics: Dict[str, Any]) -> List[str]:
+        alerts = []
+        p95 = metrics['lag']['p95_seconds']
+        if p95 is not None and p95 > self.lag_slo_seconds:
+            alerts.append(f"p95 publish lag {p95}s exceeds the {self.lag_slo_seconds}s SLO")
+        oldest_due = metrics['backlog']['oldest_due_seconds']
+        if oldest_due > self.lag_slo_seconds:
+            alerts.append(f"Oldest due post has waited {oldest_due}s, more than the {self.lag_slo_seconds}s SLO")
+        return alerts
+
+    @staticmethod
+    def to_prometheus(metrics: Dict[str, Any]) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def add(name, help_text, metric_type, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        add('scheduler_posts', 'Scheduled posts by status', 'gauge',
+            [({'status': status}, count) for status, count in metrics['by_status'].items()])
+        add('scheduler_due_posts', 'Due scheduled posts not yet handed to the outbox', 'gauge',
+            [({}, metrics['backlog']['scheduled_due'])])
+        add('scheduler_due_retries', 'Due scheduled posts waiting for another attempt', 'gauge',
+            [({}, metrics['backlog']['retrying_due'])])
+        add('scheduler_outbox_due_intents', 'Due publish intents in the outbox', 'gauge',
+            [({}, metrics['backlog']['outbox_due'])])
+        add('scheduler_oldest_due_seconds', 'Seconds the oldest due scheduled post has been claimable', 'gauge',
+            [({}, metrics['backlog']['oldest_due_seconds'])])
+        lag = metrics['lag']
+        add('scheduler_publish_lag_seconds', 'Publish lag of posts published within the window', 'summary',
+            [({'quantile': '0.5'}, lag['p50_seconds']), ({'quantile': '0.95'}, lag['p95_seconds']),
+             ({'quantile': '0.99'}, lag['p99_seconds'])])
+        lines.append(f"scheduler_publish_lag_seconds_count {lag['count']}")
+        add('scheduler_publish_lag_slo_seconds', 'Publish lag SLO', 'gauge', [({}, metrics['lag_slo_seconds'])])
+        add('scheduler_slo_breached', '1 if the publish lag or the backlog exceeds the SLO', 'gauge',
+            [({}, 1 if metrics['alerts'] else 0)])
+        add('scheduler_published_per_minute', 'Scheduled posts published per minute within the window', 'gauge',
+            [({}, metrics['throughput']['published_per_minute'])])
+        add('scheduler_failed_per_minute', 'Scheduled posts failed per minute within the window', 'gauge',
+            [({}, metrics['throughput']['failed_per_minute'])])
+        add('scheduler_retry_attempts', 'Retry attempts of posts finished within the window', 'gauge',
+            [({}, metrics['retries']['retry_attempts'])])
+        add('scheduler_platform_failure_ratio', 'Share of finished posts that failed within the window', 'gauge',
+            [({'platform': platform}, entry['failure_rate']) for platform, entry in metrics['platforms'].items()])
+        scheduler = metrics['process']['scheduler']
+        add('scheduler_runs_total', 'Scheduler runs of this process', 'counter', [({}, scheduler['runs'])])
+        add('scheduler_claimed_total', 'Scheduled posts claimed by this process', 'counter', [({}, scheduler['claimed'])])
+        add('scheduler_enqueued_total', 'Scheduled posts enqueued by this process', 'counter',
+            [({}, scheduler['enqueued'])])
+        dispatcher = metrics['process']['dispatcher']
+        add('scheduler_dispatched_total', 'Publish intents handled by this process, by outcome', 'counter',
+            [({'outcome': outcome}, dispatcher[outcome]) for outcome in ('sent', 'retried', 'deferred', 'dead')])
+        return '\n'.join(lines) + '\n'
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
@@ -1,16 +1,66 @@
 from datetime import datetime, timedelta
 import pytz
 import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from sqlalchemy import and_, or_, insert
+from src.services.background_scheduler import notify_scheduled_post
 
 logger = logging.getLogger(__name__)
 
+# Scheduler counters since process start, exposed via the metrics endpoints
+_stats_lock = threading.Lock()
+_scheduler_stats = {
+    'runs': 0,
+    'claimed': 0,
+    'enqueued': 0,
+    'enqueue_failed': 0,
+    'last_run_at': None,
+    'last_run_seconds': None
+}
+
+def get_scheduler_counters():
+    """Counters of this process's scheduler runs."""
+    with _stats_lock:
+        return dict(_scheduler_stats)
+
+def _increment_stats(**counts):
+    with _stats_lock:
+        for key, value in counts.items():
+            _scheduler_stats[key] += value
+
 class SchedulerService:
     """Service for managing scheduled posts."""
     
+    DEFAULT_CLAIM_BATCH_SIZE = 100
+    DEFAULT_LEASE_SECONDS = 120
+    DEFAULT_DISPATCH_CONCURRENCY = 2
+    DEFAULT_DRAIN_SECONDS = 20
+    DEFAULT_LAG_SLO_SECONDS = 60
+    DEFAULT_BULK_MAX_ITEMS = 500
+    BULK_INSERT_CHUNK = 200
+    
     def __init__(self):
         # Import here to avoid circular imports and app context issues
-        from src.services.social_media_service import SocialMediaService
-        self.social_media_service = SocialMediaService()
+        from src.services.service_registry import get_social_media_service
+        from src.services.publish_outbox_service import PublishOutboxService
+        from src.services.publish_warmup_service import PublishWarmupService
+        from src.services.recurring_schedule_service import RecurringScheduleService
+        self.social_media_service = get_social_media_service()
+        self.outbox_service = PublishOutboxService()
+        self.warmup_service = PublishWarmupService()
+        self.recurring_service = RecurringScheduleService()
+        
+        config = current_app.config if has_app_context() else {}
+        self.claim_batch_size = config.get('SCHEDULER_CLAIM_BATCH_SIZE', self.DEFAULT_CLAIM_BATCH_SIZE)
+        self.lease = timedelta(seconds=config.get('SCHEDULER_LEASE_SECONDS', self.DEFAULT_LEASE_SECONDS))
+        self.dispatch_concurrency = config.get('SCHEDULER_DISPATCH_CONCURRENCY', self.DEFAULT_DISPATCH_CONCURRENCY)
+        self.drain_seconds = config.get('SCHEDULER_DRAIN_SECONDS', self.DEFAULT_DRAIN_SECONDS)
+        self.lag_slo_seconds = config.get('SCHEDULER_LAG_SLO_SECONDS', self.DEFAULT_LAG_SLO_SECONDS)
+        self.bulk_max_items = config.get('SCHEDULER_BULK_MAX_ITEMS', self.DEFAULT_BULK_MAX_ITEMS)
     
     def schedule_post(self, user_id, post_content, platform, scheduled_time, timezone='UTC', post_id=None):
         """
@@ -53,6 +103,7 @@ class SchedulerService:
             
             db.session.add(scheduled_post)
             db.session.commit()
+            notify_scheduled_post(scheduled_post.id, scheduled_time)
             
             logger.info(f"Post scheduled successfully: ID {scheduled_post.id} for {platform} at {scheduled_time}")
             return scheduled_post
@@ -62,6 +113,161 @@ class SchedulerService:
             db.session.rollback()
             return None
     
+    def schedule_posts_bulk(self, user_id, items, default_timezone='UTC'):
+        """
+        Schedule many posts at once.
+        
+        All items are validated and converted to UTC in one pass (timezones
+        are resolved once per distinct name), then the valid ones are inserted
+        with batched statements in a single transaction. Invalid items are
+        reported and do not prevent the others from being scheduled.
+        
+        Args:
+            user_id: ID of the user scheduling the posts
+            items: List of dictionaries with platform, scheduled_date
+                ('YYYY-MM-DD'), scheduled_time ('HH:MM'), optional timezone
+                and either content (title, image_url optional) or the
+                post_id of one of the user's posts
+            default_timezone: Timezone of items that do not name one
+        
+        Returns:
+            Dictionary with per-item results in input order and counts
+        
+        Raises:
+            ValueError: If items is not a list or exceeds SCHEDULER_BULK_MAX_ITEMS
+        """
+        from src.models import db, Post, ScheduledPost
+        from src.services.social_media_service import SocialMediaService
+        
+        if not isinstance(items, list) or not items:
+            raise ValueError('items must be a non-empty list')
+        if len(items) > self.bulk_max_items:
+            raise ValueError(f'At most {self.bulk_max_items} items per request')
+        
+        now = datetime.utcnow()
+        timezones = {}
+        
+        def resolve_timezone(name):
+            if not isinstance(name, str):
+                return None
+            if name not in timezones:
+                try:
+                    timezones[name] = pytz.timezone(name)
+                except pytz.exceptions.UnknownTimeZoneError:
+                    timezones[name] = None
+            return timezones[name]
+        
+        def is_id(value):
+            return isinstance(value, int) and not isinstance(value, bool) and value > 0
+        
+        post_ids = {item['post_id'] for item in items if isinstance(item, dict) and is_id(item.get('post_id'))}
+        posts = {}
+        if post_ids:
+            posts = {post.id: post for post in Post.query.filter(
+                Post.id.in_(list(post_ids)),
+                Post.user_id == user_id
+            ).all()}
+        
+        results = [None] * len(items)
+        rows = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'index': index, 'success': False, 'error': 'Item must be an object'}
+                continue
+            missing = [field for field in ('platform', 'scheduled_date', 'scheduled_time') if not item.get(field)]
+            if not item.get('content') and not item.get('post_id'):
+                missing.append('content')
+            if missing:
+                results[index] = {'index': index, 'success': False,
+                                  'error': f"Missing required field: {', '.join(missing)}"}
+                continue
+            # Checked here, so one bad value is reported for its item instead of failing the whole insert
+            if item['platform'] not in SocialMediaService.SUPPORTED_PLATFORMS:
+                results[index] = {'index': index, 'success': False,
+                                  'error': f"platform must be one of {', '.join(SocialMediaService.SUPPORTED_PLATFORMS)}"}
+                continue
+            if item.get('post_id') and not is_id(item['post_id']):
+                results[index] = {'index': index, 'success': False, 'error': 'post_id must be an integer'}
+                continue
+            invalid = [field for field in ('content', 'title', 'image_url', 'timezone')
+                       if item.get(field) is not None and not isinstance(item[field], str)]
+            if invalid:
+                results[index] = {'index': index, 'success': False,
+                                  'error': f"Must be a string: {', '.join(invalid)}"}
+                continue
+            
+            timezone = item.get('timezone') or default_timezone
+            user_tz = resolve_timezone(timezone)
+            if user_tz is None:
+                results[index] = {'index': index, 'success': False, 'error': 'Invalid timezone'}
+                continue
+            try:
+                local_time = datetime.strptime(f"{item['scheduled_date']} {item['scheduled_time']}", '%Y-%m-%d %H:%M')
+            except (TypeError, ValueError) as e:
+                results[index] = {'index': index, 'success': False, 'error': f'Invalid date/time format: {str(e)}'}
+                continue
+            scheduled_time = user_tz.localize(local_time).astimezone(pytz.UTC).replace(tzinfo=None)
+            if scheduled_time <= now:
+                results[index] = {'index': index, 'success': False, 'error': 'Scheduled time must be in the future'}
+                continue
+            
+            post = None
+            if item.get('post_id'):
+                post = posts.get(item['post_id'])
+                if not post:
+                    results[index] = {'index': index, 'success': False, 'error': 'Post not found'}
+                    continue
+            
+            rows.append((index, {
+                'user_id': user_id,
+                'post_id': post.id if post else None,
+                'title': item.get('title', post.title if post else '') or '',
+                'content': item.get('content') or post.content,
+                'generated_image_url': item.get('image_url', post.generated_image_url if post else '') or '',
+                'platform': item['platform'],
+                'scheduled_time': scheduled_time,
+                'timezone': timezone,
+                'status': 'scheduled',
+                'attempts': 0,
+                'created_at': now,
+                'updated_at': now
+            }))
+        
+        try:
+            created = []
+            for start in range(0, len(rows), self.BULK_INSERT_CHUNK):
+                chunk = rows[start:start + self.BULK_INSERT_CHUNK]
+                inserted = db.session.execute(
+                    insert(ScheduledPost).returning(ScheduledPost.id, sort_by_parameter_order=True),
+                    [row for _, row in chunk]
+                ).all()
+                created.extend(zip(chunk, inserted))
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error bulk scheduling posts: {e}")
+            db.session.rollback()
+            for index, _ in rows:
+                results[index] = {'index': index, 'success': False, 'error': 'Failed to schedule post'}
+            created = []
+        
+        for (index, row), inserted in created:
+            notify_scheduled_post(inserted.id, row['scheduled_time'])
+            results[index] = {
+                'index': index,
+                'success': True,
+                'scheduled_post_id': inserted.id,
+                'platform': row['platform'],
+                'scheduled_time': row['scheduled_time'].isoformat(),
+                'timezone': row['timezone']
+            }
+        
+        logger.info(f"Bulk scheduled {len(created)} of {len(items)} posts for user {user_id}")
+        return {
+            'results': results,
+            'scheduled': len(created),
+            'failed': len(items) - len(created)
+        }
+    
     def get_scheduled_posts(self, user_id, status=None):
         """
         Get scheduled posts for a user.
@@ -109,9 +315,275 @@ class SchedulerService:
             logger.error(f"Error getting posts ready to publish: {e}")
             return []
     
+    def _claimable(self, now):
+        from src.models import ScheduledPost
+        return or_(
+            and_(ScheduledPost.status == 'scheduled', ScheduledPost.scheduled_time <= now),
+            # Retry of a failed attempt whose backoff has passed
+            and_(ScheduledPost.status == 'retrying', ScheduledPost.next_attempt_at <= now),
+            # Claim of a worker that died before enqueueing
+            and_(ScheduledPost.status == 'publishing', ScheduledPost.lease_expires_at < now)
+        )
+    
+    def claim_due_posts(self, limit=None):
+        """
+        Claim a batch of due scheduled posts under a lease.
+        
+        Claimed posts move to 'publishing' in one conditional UPDATE, which only
+        takes rows that are still claimable, so no post is claimed twice. On
+        PostgreSQL the candidates are selected FOR UPDATE SKIP LOCKED, so
+        concurrent workers claim disjoint batches instead of waiting on each
+        other; SQLite serializes writers and ignores the row lock.
+        
+        Args:
+            limit: Maximum number of posts to claim (default SCHEDULER_CLAIM_BATCH_SIZE)
+        
+        Returns:
+            Claimed ScheduledPost objects, earliest due first
+        """
+        from src.models import db, ScheduledPost
+        
+        now = datetime.utcnow()
+        ids = [
+            row.id for row in db.session.query(ScheduledPost.id)
+            .filter(self._claimable(now))
+            .order_by(ScheduledPost.scheduled_time)
+            .limit(limit or self.claim_batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        ]
+        if not ids:
+            db.session.commit()
+            return []
+        
+        lease_token = uuid.uuid4().hex
+        ScheduledPost.query.filter(
+            ScheduledPost.id.in_(ids),
+            self._claimable(now)
+        ).update({
+            'status': 'publishing',
+            'locked_by': lease_token,
+            'lease_expires_at': now + self.lease,
+            'updated_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        
+        claimed = ScheduledPost.query.filter_by(locked_by=lease_token).order_by(ScheduledPost.scheduled_time).all()
+        _increment_stats(claimed=len(claimed))
+        return claimed
+    
+    def enqueue_due_posts(self, keep_lease=None):
+        """
+        Move due scheduled posts into the publish outbox.
+        
+        Posts are claimed batch by batch (claim_due_posts), so several
+        scheduler workers can drain the due posts in parallel. Each batch's
+        publish intents and status change to 'queued' are written in one
+        transaction. The idempotency key is derived from the scheduled post
+        and its attempt, so each attempt is enqueued at most once, even if its
+        claim expired and it was claimed again. Media uploaded by the warm-up stage is handed on
+        if it belongs to the account the post is published with.
+        
+        If a batch cannot be written, its posts are enqueued one by one, so a
+        single bad post is marked as failed instead of holding up the others.
+        
+        Args:
+            keep_lease: Called before every batch to renew the scheduler lease;
+                no further batch is claimed once it returns False
+        
+        Returns:
+            Number of posts enqueued
+        """
+        from src.models import db
+        
+        enqueued = 0
+        while True:
+            if keep_lease is not None and not keep_lease():
+                break
+            due_posts = self.claim_due_posts()
+            if not due_posts:
+                break
+            
+            try:
+                prepared = [post for post in due_posts if post.media_asset]
+                accounts = self.outbox_service._load_accounts(prepared) if prepared else {}
+                for scheduled_post in due_posts:
+                    self._enqueue_claimed(scheduled_post, accounts)
+                db.session.commit()
+                enqueued += len(due_posts)
+                
+            except Exception as e:
+                logger.error(f"Error enqueueing scheduled posts as a batch, retrying one by one: {e}")
+                db.session.rollback()
+                enqueued += self._enqueue_one_by_one([post.id for post in due_posts])
+            
+            if len(due_posts) < self.claim_batch_size:
+                break
+        
+        _increment_stats(enqueued=enqueued)
+        return enqueued
+    
+    def _enqueue_claimed(self, scheduled_post, accounts):
+        """Add the publish intent of a claimed post to the current transaction and mark the post as queued."""
+        account = accounts.get((scheduled_post.user_id, scheduled_post.platform))
+        media_asset = scheduled_post.media_asset if (
+            account is not None and account.id == scheduled_post.prepared_account_id
+        ) else None
+        scheduled_post.attempts = (scheduled_post.attempts or 0) + 1
+        # Retries get a new intent; the first attempt keeps the key intents were always written with
+        idempotency_key = f"scheduled:{scheduled_post.id}"
+        if scheduled_post.attempts > 1:
+            idempotency_key += f":{scheduled_post.attempts}"
+        self.outbox_service.enqueue(
+            user_id=scheduled_post.user_id,
+            platform=scheduled_post.platform,
+            content=scheduled_post.content,
+            image_url=scheduled_post.generated_image_url,
+            post_id=scheduled_post.post_id,
+            scheduled_post_id=scheduled_post.id,
+            idempotency_key=idempotency_key,
+            media_asset=media_asset
+        )
+        scheduled_post.status = 'queued'
+        scheduled_post.locked_by = None
+        scheduled_post.lease_expires_at = None
+    
+    def _enqueue_one_by_one(self, scheduled_post_ids):
+        """
+        Enqueue claimed posts in a transaction each. A post that cannot be
+        enqueued is marked as failed; if even that fails (e.g. the database is
+        gone), it stays claimed and is claimed again once its lease expires.
+        
+        Returns:
+            Number of posts enqueued
+        """
+        from src.models import db, ScheduledPost
+        
+        enqueued = 0
+        for scheduled_post_id in scheduled_post_ids:
+            try:
+                scheduled_post = db.session.get(ScheduledPost, scheduled_post_id)
+                accounts = self.outbox_service._load_accounts([scheduled_post]) if scheduled_post.media_asset else {}
+                self._enqueue_claimed(scheduled_post, accounts)
+                db.session.commit()
+                enqueued += 1
+            except Exception as e:
+                logger.error(f"Error enqueueing scheduled post {scheduled_post_id}: {e}")
+                db.session.rollback()
+                _increment_stats(enqueue_failed=1)
+                try:
+                    ScheduledPost.query.filter_by(id=scheduled_post_id, status='publishing').update({
+                        'status': 'failed',
+                        'error_message': f'Could not be queued for publishing: {str(e)}',
+                        'locked_by': None,
+                        'lease_expires_at': None,
+                        'updated_at': datetime.utcnow()
+                    }, synchronize_session=False)
+                    db.session.commit()
+                except Exception as mark_error:
+                    logger.error(f"Error marking scheduled post {scheduled_post_id} as failed: {mark_error}")
+                    db.session.rollback()
+        return enqueued
+    
+    def drain_outbox(self, keep_lease=None):
+        """
+        Deliver due outbox intents batch by batch until none are due or the
+        drain budget (SCHEDULER_DRAIN_SECONDS) is used up.
+        
+        Up to SCHEDULER_DISPATCH_CONCURRENCY dispatchers run side by side, each
+        claiming its own batches earliest due first and committing once per
+        batch; claiming never hands out an intent twice. A backlog after an
+        outage thus drains several batches at a time instead of one per
+        scheduler run. A failing batch only stops its own dispatcher.
+        
+        Args:
+            keep_lease: Called before every batch to renew the scheduler lease;
+                the dispatchers stop once it returns False
+        
+        Returns:
+            Dispatch summary of all batches (see PublishOutboxService.summarize)
+            plus the number of batches
+        """
+        from src.models import db
+        from src.services.publish_outbox_service import PublishOutboxService
+        
+        app = current_app._get_current_object()
+        deadline = time.monotonic() + self.drain_seconds
+        
+        def drain(outbox_service):
+            outcomes = []
+            batches = 0
+            while True:
+                if keep_lease is not None and not keep_lease():
+                    logger.warning("Scheduler lease lost, stopping the outbox drain")
+                    break
+                try:
+                    summary = outbox_service.dispatch_pending()
+                except Exception as e:
+                    logger.error(f"Error dispatching publish intents: {e}")
+                    db.session.rollback()
+                    break
+                if not summary['claimed']:
+                    break
+                batches += 1
+                outcomes.extend(summary['outcomes'])
+                if summary['claimed'] < outbox_service.batch_size or time.monotonic() >= deadline:
+                    break
+            return outcomes, batches
+        
+        def drain_in_thread(_):
+            # Worker threads get their own app context and database session
+            with app.app_context():
+                return drain(PublishOutboxService())
+        
+        if self.dispatch_concurrency <= 1:
+            drained = [drain(self.outbox_service)]
+        else:
+            with ThreadPoolExecutor(max_workers=self.dispatch_concurrency) as executor:
+                drained = list(executor.map(drain_in_thread, range(self.dispatch_concurrency)))
+        
+        summary = PublishOutboxService.summarize([outcome for outcomes, _ in drained for outcome in outcomes])
+        summary['batches'] = sum(batches for _, batches in drained)
+        return summary
+    
+    def get_backlog(self):
+        """
+        Work that is due but not delivered yet.
+        
+        Returns:
+            Due scheduled posts not yet enqueued (of which retries), due outbox
+            intents and the age in seconds of the oldest due scheduled post
+        """
+        from sqlalchemy import case, func
+        from src.models import db, ScheduledPost, PublishIntent
+        
+        now = datetime.utcnow()
+        # A post waits since it became claimable: its retry time, the expiry of a dead worker's
+        # lease, else its scheduled time. Retries would otherwise count from the first attempt.
+        due_since = case(
+            (ScheduledPost.status == 'retrying', ScheduledPost.next_attempt_at),
+            (ScheduledPost.status == 'publishing', ScheduledPost.lease_expires_at),
+            else_=ScheduledPost.scheduled_time
+        )
+        scheduled_due, retrying_due, oldest_due = db.session.query(
+            func.count(ScheduledPost.id),
+            func.count(case((ScheduledPost.status == 'retrying', ScheduledPost.id))),
+            func.min(due_since)
+        ).filter(self._claimable(now)).one()
+        outbox_due = db.session.query(func.count(PublishIntent.id)).filter(
+            PublishIntent.status == 'pending',
+            PublishIntent.next_attempt_at <= now
+        ).scalar()
+        return {
+            'scheduled_due': scheduled_due,
+            'retrying_due': retrying_due,
+            'outbox_due': outbox_due,
+            'oldest_due_seconds': round((now - oldest_due).total_seconds(), 1) if oldest_due else 0
+        }
+    
     def publish_scheduled_post(self, scheduled_post):
         """
-        Publish a scheduled post.
+        Publish a scheduled post now through the outbox.
         
         Args:
             scheduled_post: ScheduledPost object to publish
@@ -119,46 +591,23 @@ class SchedulerService:
         Returns:
             Boolean indicating success
         """
-        try:
-            # Import here to avoid app context issues
-            from src.models import db
-            
-            logger.info(f"Publishing scheduled post {scheduled_post.id} to {scheduled_post.platform}")
-            
-            # Prepare post data for publishing
-            post_data = {
-                'content': scheduled_post.content,
-                'image_url': scheduled_post.generated_image_url
-            }
-            
-            # Publish to the specified platform
-            if scheduled_post.platform == 'linkedin':
-                success = self.social_media_service.publish_to_linkedin(
-                    user_id=scheduled_post.user_id,
-                    content=scheduled_post.content,
-                    image_url=scheduled_post.generated_image_url
-                )
-            else:
-                logger.error(f"Unsupported platform: {scheduled_post.platform}")
-                scheduled_post.mark_as_failed(f"Unsupported platform: {scheduled_post.platform}")
-                db.session.commit()
-                return False
-            
-            if success:
-                scheduled_post.mark_as_published()
-                logger.info(f"Successfully published scheduled post {scheduled_post.id}")
-            else:
-                scheduled_post.mark_as_failed("Publishing failed - check social media service logs")
-                logger.error(f"Failed to publish scheduled post {scheduled_post.id}")
-            
-            db.session.commit()
-            return success
-            
-        except Exception as e:
-            logger.error(f"Error publishing scheduled post {scheduled_post.id}: {e}")
-            scheduled_post.mark_as_failed(str(e))
-            db.session.commit()
-            return False
+        from src.models import db
+        
+        logger.info(f"Publishing scheduled post {scheduled_post.id} to {scheduled_post.platform}")
+        intent = self.outbox_service.enqueue(
+            user_id=scheduled_post.user_id,
+            platform=scheduled_post.platform,
+            content=scheduled_post.content,
+            image_url=scheduled_post.generated_image_url,
+            post_id=scheduled_post.post_id,
+            scheduled_post_id=scheduled_post.id,
+            idempotency_key=f"scheduled:{scheduled_post.id}"
+        )
+        scheduled_post.status = 'queued'
+        db.session.commit()
+        
+        outcome = self.outbox_service.dispatch_intents([intent])[0]
+        return outcome['success']
     
     def cancel_scheduled_post(self, scheduled_post_id, user_id):
         """
@@ -175,10 +624,10 @@ class SchedulerService:
             # Import here to avoid app context issues
             from src.models import db, ScheduledPost
             
-            scheduled_post = ScheduledPost.query.filter_by(
-                id=scheduled_post_id,
-                user_id=user_id,
-                status='scheduled'
+            scheduled_post = ScheduledPost.query.filter(
+                ScheduledPost.id == scheduled_post_id,
+                ScheduledPost.user_id == user_id,
+                ScheduledPost.status.in_(['scheduled', 'retrying'])
             ).first()
             
             if not scheduled_post:
@@ -187,6 +636,7 @@ class SchedulerService:
             
             scheduled_post.mark_as_cancelled()
             db.session.commit()
+            notify_scheduled_post(scheduled_post_id)
             
             logger.info(f"Cancelled scheduled post {scheduled_post_id}")
             return True
@@ -213,10 +663,10 @@ class SchedulerService:
             # Import here to avoid app context issues
             from src.models import db, ScheduledPost
             
-            scheduled_post = ScheduledPost.query.filter_by(
-                id=scheduled_post_id,
-                user_id=user_id,
-                status='scheduled'
+            scheduled_post = ScheduledPost.query.filter(
+                ScheduledPost.id == scheduled_post_id,
+                ScheduledPost.user_id == user_id,
+                ScheduledPost.status.in_(['scheduled', 'retrying'])
             ).first()
             
             if not scheduled_post:
@@ -232,9 +682,15 @@ class SchedulerService:
             
             scheduled_post.scheduled_time = new_scheduled_time
             scheduled_post.timezone = timezone
+            # A post waiting for a retry goes out at the new time instead
+            scheduled_post.status = 'scheduled'
+            scheduled_post.next_attempt_at = None
             scheduled_post.updated_at = datetime.utcnow()
+            # Uploaded media may expire before the new time; warm up again
+            scheduled_post.clear_preparation()
             
             db.session.commit()
+            notify_scheduled_post(scheduled_post_id, new_scheduled_time)
             
             logger.info(f"Rescheduled post {scheduled_post_id} to {new_scheduled_time}")
             return True
@@ -244,39 +700,91 @@ class SchedulerService:
             db.session.rollback()
             return False
     
-    def process_scheduled_posts(self):
+    def _warm_up(self):
+        """Run the warm-up stage; its failures never hold up publishing."""
+        from flask import current_app
+        
+        if not current_app.config.get('PUBLISH_WARMUP_ENABLED', True):
+            return {'prepared': 0}
+        try:
+            return self.warmup_service.warm_up_upcoming_posts()
+        except Exception as e:
+            from src.models import db
+            logger.error(f"Error warming up scheduled posts: {e}")
+            db.session.rollback()
+            return {'prepared': 0}
+    
+    def materialize_recurring(self):
+        """Extend the window of recurring schedules; a failure never holds up publishing."""
+        try:
+            return self.recurring_service.materialize_due()
+        except Exception as e:
+            from src.models import db
+            logger.error(f"Error materializing recurring schedules: {e}")
+            db.session.rollback()
+            return {'series': 0, 'created': 0}
+    
+    def process_scheduled_posts(self, keep_lease=None):
         """
         Process all posts that are ready to be published.
         This method should be called periodically by a background job.
         
+        Due posts are enqueued in the publish outbox, due outbox intents (new
+        publishes and retries) are delivered concurrently in batches (see
+        drain_outbox), then posts due within the warm-up window are prepared
+        (tokens, media uploads) and recurring schedules are extended.
+        
+        Args:
+            keep_lease: Renews the scheduler lease of the caller; checked
+                between batches, the run stops once it returns False
+        
         Returns:
-            Dictionary with processing results
+            Dictionary with processing results, the drain throughput and the
+            remaining backlog
         """
         try:
-            posts_to_publish = self.get_posts_ready_to_publish()
+            started = time.monotonic()
+            queued = self.enqueue_due_posts(keep_lease)
+            dispatch = self.drain_outbox(keep_lease)
+            duration = time.monotonic() - started
+            if keep_lease is None or keep_lease():
+                warmup = self._warm_up()
+                materialized = self.materialize_recurring()
+            else:
+                warmup, materialized = {'prepared': 0}, {'series': 0, 'created': 0}
             
             results = {
-                'total_processed': len(posts_to_publish),
-                'successful': 0,
-                'failed': 0,
-                'errors': []
+                'total_processed': dispatch['claimed'],
+                'queued': queued,
+                'warmed_up': warmup['prepared'],
+                'materialized': materialized['created'],
+                'successful': dispatch['sent'],
+                'failed': dispatch['dead'],
+                'retrying': dispatch['retrying'],
+                'deferred': dispatch['deferred'],
+                'batches': dispatch['batches'],
+                'duration_seconds': round(duration, 2),
+                'throughput_per_second': round(dispatch['sent'] / duration, 2) if duration > 0 else 0,
+                'backlog': self.get_backlog(),
+                'errors': [
+                    f"Failed to publish intent {outcome['intent_id']} ({outcome['platform']}): {outcome['error']}"
+                    for outcome in dispatch['outcomes'] if not outcome['success'] and not outcome.get('deferred')
+                ]
             }
             
-            for post in posts_to_publish:
-                try:
-                    if self.publish_scheduled_post(post):
-                        results['successful'] += 1
-                    else:
-                        results['failed'] += 1
-                        results['errors'].append(f"Failed to publish post {post.id}")
-                        
-                except Exception as e:
-                    results['failed'] += 1
-                    results['errors'].append(f"Error processing post {post.id}: {str(e)}")
-                    logger.error(f"Error processing scheduled post {post.id}: {e}")
+            backlog = results['backlog']
+            logger.info(f"Processed {results['total_processed']} scheduled posts in {results['batches']} batches: "
+                       f"{results['successful']} successful, {results['failed']} failed, "
+                       f"{results['retrying']} retrying ({results['throughput_per_second']}/s); "
+                       f"backlog {backlog['scheduled_due']} scheduled, {backlog['outbox_due']} in outbox")
+            if backlog['oldest_due_seconds'] > self.lag_slo_seconds:
+                logger.warning(f"Scheduler lag SLO exceeded: oldest due post waits {backlog['oldest_due_seconds']}s "
+                               f"(SLO {self.lag_slo_seconds}s)")
             
-            logger.info(f"Processed {results['total_processed']} scheduled posts: "
-                       f"{results['successful']} successful, {results['failed']} failed")
+            _increment_stats(runs=1)
+            with _stats_lock:
+                _scheduler_stats['last_run_at'] = datetime.utcnow().isoformat()
+                _scheduler_stats['last_run_seconds'] = results['duration_seconds']
             
             return results
             
@@ -288,4 +796,3 @@ class SchedulerService:
                 'failed': 0,
                 'errors': [str(e)]
             }
-
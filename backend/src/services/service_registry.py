@@ -0,0 +1,118 @@
+import threading
+import requests
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Long-lived, per-process HTTP sessions and service instances.
+# Everything is created lazily on first use, i.e. after gunicorn has forked its workers.
+_registry_lock = threading.Lock()
+_http_sessions = {}
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 3
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+def _config_value(key, default):
+    if has_app_context():
+        return current_app.config.get(key, default)
+    return default
+
+def create_http_session() -> TimeoutSession:
+    """
+    Create a session with a keep-alive connection pool, default timeouts and retries.
+
+    Connection errors are retried for every method. Read errors and 429/5xx
+    responses are only retried for GET, HEAD and OPTIONS: a POST that created
+    a post must not be sent twice, and a streamed PUT body cannot be replayed.
+    """
+    timeout = (
+        _config_value('HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+        _config_value('HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)
+    )
+    pool_size = _config_value('HTTP_POOL_SIZE', DEFAULT_POOL_SIZE)
+    retry = Retry(
+        total=_config_value('HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+    session = TimeoutSession(timeout)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_http_session(name: str) -> TimeoutSession:
+    """
+    Return the shared HTTP session for a platform ('linkedin', 'facebook', ...)
+    or purpose ('media' for image downloads).
+    """
+    session = _http_sessions.get(name)
+    if session is None:
+        with _registry_lock:
+            session = _http_sessions.get(name)
+            if session is None:
+                session = create_http_session()
+                _http_sessions[name] = session
+    return session
+
+def get_social_media_service():
+    """
+    Return the SocialMediaService of the current app.
+
+    The instance is created once per app and process and shared by routes,
+    the scheduler and background workers.
+    """
+    app = current_app._get_current_object()
+    service = app.extensions.get('social_media_service')
+    if service is None:
+        with _registry_lock:
+            service = app.extensions.get('social_media_service')
+            if service is None:
+                from src.services.social_media_service import SocialMediaService
+                service = SocialMediaService()
+                app.extensions['social_media_service'] = service
+    return service
+
+def get_async_publish_engine():
+    """
+    Return the AsyncPublishEngine of the current app, or None if aiohttp is
+    not installed or ASYNC_PUBLISHING_ENABLED is off.
+    """
+    from src.services.async_publish_service import AsyncPublishEngine, is_async_publishing_available
+    
+    app = current_app._get_current_object()
+    if not app.config.get('ASYNC_PUBLISHING_ENABLED', True) or not is_async_publishing_available():
+        return None
+    engine = app.extensions.get('async_publish_engine')
+    if engine is None:
+        social_service = get_social_media_service()
+        with _registry_lock:
+            engine = app.extensions.get('async_publish_engine')
+            if engine is None:
+                engine = AsyncPublishEngine(social_service)
+                app.extensions['async_publish_engine'] = engine
+    return engine
+
+def reset_service_registry():
+    """Close all shared HTTP sessions, e.g. after a fork or in tests."""
+    with _registry_lock:
+        for session in _http_sessions.values():
+            session.close()
+        _http_sessions.clear()
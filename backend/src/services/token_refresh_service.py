@@ -0,0 +1,324 @@
+import threading
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from typing import Dict, Any, Optional, List, Callable
+
+logger = logging.getLogger(__name__)
+
+# Name of the lease in scheduler_leases; only its holder refreshes tokens
+LEASE_NAME = 'token_refresh'
+
+# One refresh run per process at a time (background thread and admin API)
+_run_lock = threading.Lock()
+
+# Counters since process start, exposed via the admin API
+_stats_lock = threading.Lock()
+_refresh_stats = {
+    'runs': 0,
+    'refreshed': 0,
+    'failed': 0,
+    'deactivated': 0,
+    'expiring_soon': 0,
+    'last_run_at': None,
+    'last_run': None
+}
+
+class TokenRefreshService:
+    """
+    Service that renews OAuth tokens before they expire.
+
+    Active accounts whose token expires within the refresh window are loaded
+    in batches (keyset pagination by id). Refresh requests run in parallel
+    with a separate concurrency limit per platform; the new tokens of a
+    batch are written in one transaction. Accounts without the refresh token
+    their platform needs are skipped, and an account whose refresh failed or
+    returned no expiry is left alone for retry_minutes.
+
+    The limits are per run: callers must make sure only one run is in
+    progress across all processes (see TokenRefresher and refresh_now), or
+    a rotating refresh token (Twitter) is redeemed twice and the second
+    request fails with invalid_grant.
+    """
+
+    DEFAULT_WINDOW_MINUTES = 24 * 60
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_CONCURRENCY = 2
+    DEFAULT_RETRY_MINUTES = 60
+
+    def __init__(self, window_minutes: Optional[int] = None, batch_size: Optional[int] = None,
+                 platform_concurrency: Optional[Dict[str, int]] = None, retry_minutes: Optional[int] = None):
+        if has_app_context():
+            window_minutes = window_minutes or current_app.config.get('TOKEN_REFRESH_WINDOW_MINUTES')
+            batch_size = batch_size or current_app.config.get('TOKEN_REFRESH_BATCH_SIZE')
+            platform_concurrency = platform_concurrency or current_app.config.get('TOKEN_REFRESH_CONCURRENCY')
+            retry_minutes = retry_minutes or current_app.config.get('TOKEN_REFRESH_RETRY_MINUTES')
+        self.window = timedelta(minutes=window_minutes or self.DEFAULT_WINDOW_MINUTES)
+        self.batch_size = batch_size or self.DEFAULT_BATCH_SIZE
+        self.platform_concurrency = platform_concurrency or {}
+        self.retry_delay = timedelta(minutes=retry_minutes or self.DEFAULT_RETRY_MINUTES)
+
+    def _expiring_query(self, cutoff: datetime):
+        from src.models import SocialAccount
+        return SocialAccount.query.filter(
+            SocialAccount.is_active == True,
+            SocialAccount.expires_at.isnot(None),
+            SocialAccount.expires_at <= cutoff
+        )
+
+    def _refreshable_query(self, cutoff: datetime, now: datetime):
+        """Expiring accounts that can be refreshed now: not backing off, refresh token stored where one is needed."""
+        from sqlalchemy import or_
+        from src.models import SocialAccount
+        from src.services.social_media_service import SocialMediaService
+
+        return self._expiring_query(cutoff).filter(
+            or_(SocialAccount.next_refresh_at.is_(None), SocialAccount.next_refresh_at <= now),
+            or_(SocialAccount.platform.notin_(SocialMediaService.REFRESH_TOKEN_PLATFORMS),
+                SocialAccount.refresh_token.isnot(None))
+        )
+
+    def count_expiring(self) -> int:
+        """Count active accounts whose token expires within the refresh window."""
+        return self._expiring_query(datetime.utcnow() + self.window).count()
+
+    def refresh_expiring_accounts(self, keep_lease: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Refresh all tokens expiring within the window.
+
+        Must be called inside an application context.
+
+        Args:
+            keep_lease: Called before every batch to renew the lease the run
+                holds; the run stops when it returns False
+
+        Returns:
+            Counts of refreshed, failed and deactivated accounts for this run
+            and the number of accounts still about to expire
+        """
+        from src.models import db, SocialAccount
+        from src.services.service_registry import get_social_media_service
+
+        social_service = get_social_media_service()
+        now = datetime.utcnow()
+        cutoff = now + self.window
+        results = {'refreshed': 0, 'failed': 0, 'deactivated': 0, 'errors': []}
+
+        last_id = 0
+        while True:
+            if keep_lease is not None and not keep_lease():
+                logger.warning("Token refresh lease lost, stopping this run")
+                results['errors'].append('Lease lost, run stopped early')
+                break
+
+            # The rows stay locked until the batch is committed, so a publish-path refresh of
+            # the same account waits for the new token; accounts it is refreshing are skipped
+            batch = self._refreshable_query(cutoff, now).filter(
+                SocialAccount.id > last_id
+            ).order_by(SocialAccount.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            outcomes = self._refresh_batch(social_service, batch)
+
+            # Apply the whole batch in one transaction
+            retry_at = datetime.utcnow() + self.retry_delay
+            for account, tokens, error in outcomes:
+                if tokens:
+                    account.update_tokens(tokens['access_token'], tokens['refresh_token'], tokens['expires_at'])
+                    results['refreshed'] += 1
+                    if not tokens['expires_at']:
+                        # Expiry unknown, the account would be selected again on every run
+                        account.next_refresh_at = retry_at
+                    continue
+
+                results['failed'] += 1
+                results['errors'].append(f"{account.platform} account {account.id}: {error}")
+                if getattr(error, 'permanent', False) and account.is_token_expired():
+                    account.is_active = False
+                    results['deactivated'] += 1
+                else:
+                    account.next_refresh_at = retry_at
+
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error saving refreshed tokens: {e}")
+                results['errors'].append(f"Saving batch failed: {e}")
+
+            if len(batch) < self.batch_size:
+                break
+
+        results['expiring_soon'] = self.count_expiring()
+        _record_run(results)
+
+        if results['refreshed'] or results['failed']:
+            logger.info(f"Token refresh: {results['refreshed']} refreshed, {results['failed']} failed, "
+                        f"{results['deactivated']} deactivated, {results['expiring_soon']} expiring soon")
+        return results
+
+    def _refresh_batch(self, social_service, accounts: List) -> List:
+        """Refresh a batch of accounts with bounded concurrency per platform."""
+        by_platform = {}
+        for account in accounts:
+            by_platform.setdefault(account.platform, []).append(account)
+
+        def refresh(account):
+            try:
+                return account, social_service.refresh_access_token(account), None
+            except Exception as e:
+                return account, None, e
+
+        executors = []
+        futures = []
+        try:
+            for platform, platform_accounts in by_platform.items():
+                max_workers = self.platform_concurrency.get(platform, self.DEFAULT_CONCURRENCY)
+                executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(platform_accounts))))
+                executors.append(executor)
+                futures.extend(executor.submit(refresh, account) for account in platform_accounts)
+            return [future.result() for future in futures]
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+def _record_run(results: Dict[str, Any]):
+    with _stats_lock:
+        _refresh_stats['runs'] += 1
+        for key in ('refreshed', 'failed', 'deactivated'):
+            _refresh_stats[key] += results[key]
+        _refresh_stats['expiring_soon'] = results['expiring_soon']
+        _refresh_stats['last_run_at'] = datetime.utcnow().isoformat()
+        _refresh_stats['last_run'] = {key: value for key, value in results.items() if key != 'errors'}
+        _refresh_stats['last_run']['errors'] = results['errors'][:20]
+
+def get_token_refresh_stats() -> Dict[str, Any]:
+    """Return token refresh counters since process start."""
+    with _stats_lock:
+        return dict(_refresh_stats)
+
+class TokenRefresher:
+    """
+    Background thread that periodically refreshes expiring tokens.
+
+    Every web worker and scheduler worker may start one; only the holder of
+    the 'token_refresh' lease refreshes. The holder renews the lease before
+    every batch, the others stand by and take it over once it expired.
+    """
+
+    def __init__(self, app, check_interval=300, lease_seconds=600):
+        from src.services.leader_election_service import LeaderElection
+
+        self.app = app
+        self.check_interval = check_interval
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+
+        self.leader_election = LeaderElection(LEASE_NAME, lease_seconds=lease_seconds)
+        # Renew well before the lease runs out; standbys poll as often
+        self.leader_check_interval = min(check_interval, self.leader_election.lease.total_seconds() / 3)
+        self.is_leader = False
+
+    def start(self):
+        """Start the background token refresher."""
+        if self.running:
+            logger.warning("Token refresher is already running")
+            return
+
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        logger.info(f"Token refresher started with {self.check_interval}s interval")
+
+    def stop(self):
+        """Stop the background token refresher and release the lease."""
+        if not self.running:
+            return
+
+        self.running = False
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.is_leader:
+            try:
+                with self.app.app_context():
+                    self.leader_election.release()
+            except Exception as e:
+                logger.error(f"Could not release token refresh lease: {e}")
+            self.is_leader = False
+        logger.info("Token refresher stopped")
+
+    def _run(self):
+        """Main refresher loop."""
+        next_run = time.monotonic()
+        while self.running:
+            try:
+                with self.app.app_context():
+                    leader = self.leader_election.try_acquire()
+                    if leader != self.is_leader:
+                        logger.info(f"Token refresher {self.leader_election.holder} "
+                                    f"{'became leader' if leader else 'lost leadership, standing by'}")
+                    self.is_leader = leader
+                    if leader and time.monotonic() >= next_run:
+                        with _run_lock:
+                            TokenRefreshService().refresh_expiring_accounts(keep_lease=self.leader_election.try_acquire)
+                        next_run = time.monotonic() + self.check_interval
+            except Exception as e:
+                logger.error(f"Error in token refresher: {e}")
+            self._stop_event.wait(self.leader_check_interval)
+
+def refresh_now() -> Optional[Dict[str, Any]]:
+    """
+    Run one refresh right away under the 'token_refresh' lease, e.g. from the admin API.
+
+    Must be called inside an application context.
+
+    Returns:
+        The results of the run, or None if another process holds the lease
+    """
+    from src.services.leader_election_service import LeaderElection
+
+    # This process' refresher may hold the lease already; a separate holder would be locked out by it
+    own_refresher = _token_refresher is not None and _token_refresher.running
+    if own_refresher:
+        election = _token_refresher.leader_election
+    else:
+        election = LeaderElection(LEASE_NAME, lease_seconds=current_app.config.get('TOKEN_REFRESH_LEASE_SECONDS', 600))
+
+    if not election.try_acquire():
+        return None
+    try:
+        with _run_lock:
+            return TokenRefreshService().refresh_expiring_accounts(keep_lease=election.try_acquire)
+    finally:
+        if not own_refresher:
+            election.release()
+
+def get_token_refresh_lease() -> Optional[Dict[str, Any]]:
+    """Current holder of the token refresh lease, or None if no process ever held it."""
+    from src.services.leader_election_service import LeaderElection
+
+    return LeaderElection(LEASE_NAME).current()
+
+# Global refresher instance
+_token_refresher = None
+
+def start_token_refresher(app):
+    """Start the global token refresher for an app."""
+    global _token_refresher
+    if _token_refresher is None:
+        _token_refresher = TokenRefresher(app, check_interval=app.config.get('TOKEN_REFRESH_INTERVAL', 300),
+                                          lease_seconds=app.config.get('TOKEN_REFRESH_LEASE_SECONDS', 600))
+    _token_refresher.start()
+    return _token_refresher
+
+def stop_token_refresher():
+    """Stop the global token refresher."""
+    if _token_refresher is not None:
+        _token_refresher.stop()
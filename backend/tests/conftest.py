@@ -0,0 +1,48 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# The app module creates an app on import; make that one a testing app too
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+from src.models import db, User, SocialAccount
+from src.services.service_registry import reset_service_registry
+
+@pytest.fixture
+def app():
+    """Testing app with a fresh in-memory database at the migration head."""
+    app = create_app('testing')
+    reset_service_registry()
+    with app.app_context():
+        yield app
+        db.session.remove()
+    reset_service_registry()
+
+@pytest.fixture
+def user(app):
+    user = User(username='tester', email='tester@example.com', password_hash='x', created_at=datetime.utcnow())
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def linkedin_account(user):
+    account = SocialAccount(user_id=user.id, platform='linkedin', account_id='person-1',
+                            access_token='token', is_active=True)
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+@pytest.fixture
+def standins():
+    """Local platform stand-ins (platform_standins.py) without latency or failures."""
+    from platform_standins import start_standin_server
+
+    server, url = start_standin_server(behaviour={'latency_ms': 0, 'jitter_ms': 0})
+    yield url
+    server.shutdown()
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from src.services.background_scheduler import DueTimeQueue
+
+NOW = datetime(2026, 1, 1, 12, 0)
+
+def test_fires_in_due_time_order():
+    queue = DueTimeQueue()
+    queue.set(1, NOW + timedelta(minutes=10))
+    queue.set(2, NOW + timedelta(minutes=5))
+
+    assert queue.next_fire_time() == NOW + timedelta(minutes=5)
+    assert queue.pop_due(NOW) == 0
+    assert queue.pop_due(NOW + timedelta(minutes=5)) == 1
+    assert queue.next_fire_time() == NOW + timedelta(minutes=10)
+    assert queue.pop_due(NOW + timedelta(minutes=10)) == 1
+    assert len(queue) == 0 and queue.next_fire_time() is None
+
+def test_reschedule_drops_the_old_due_time():
+    queue = DueTimeQueue()
+    queue.set(1, NOW + timedelta(minutes=5))
+    queue.set(1, NOW + timedelta(minutes=30))
+
+    assert len(queue) == 1
+    assert queue.next_fire_time() == NOW + timedelta(minutes=30)
+    assert queue.pop_due(NOW + timedelta(minutes=10)) == 0
+    assert queue.pop_due(NOW + timedelta(minutes=30)) == 1
+
+def test_discarded_post_does_not_fire():
+    queue = DueTimeQueue()
+    queue.set(1, NOW)
+    queue.set(2, NOW + timedelta(minutes=1))
+    queue.discard(1)
+
+    assert queue.next_fire_time() == NOW + timedelta(minutes=1)
+    assert queue.pop_due(NOW + timedelta(hours=1)) == 1
+    assert len(queue) == 0
+
+def test_warmup_fires_early_and_keeps_the_post():
+    queue = DueTimeQueue()
+    queue.set(1, NOW + timedelta(minutes=10), warmup_lead=timedelta(minutes=2))
+
+    assert queue.next_fire_time() == NOW + timedelta(minutes=8)
+    assert queue.pop_due(NOW + timedelta(minutes=8)) == 1
+    assert len(queue) == 1
+    assert queue.next_fire_time() == NOW + timedelta(minutes=10)
+    assert queue.pop_due(NOW + timedelta(minutes=10)) == 1
+    assert len(queue) == 0
+
+def test_run_stops_claiming_once_the_lease_is_lost(user):
+    from src.models import db, ScheduledPost, PublishIntent
+    from src.services.scheduler_service import SchedulerService
+
+    db.session.add(ScheduledPost(user_id=user.id, content='Due', platform='linkedin',
+                                 scheduled_time=datetime.utcnow() - timedelta(seconds=5), status='scheduled'))
+    db.session.commit()
+
+    results = SchedulerService().process_scheduled_posts(keep_lease=lambda: False)
+
+    assert results['queued'] == 0 and results['total_processed'] == 0
+    assert ScheduledPost.query.one().status == 'scheduled'
+    assert PublishIntent.query.count() == 0
+
+def test_scheduler_renews_its_lease_between_batches(app):
+    from src.services.background_scheduler import BackgroundScheduler
+    from src.services.leader_election_service import LeaderElection
+
+    scheduler = BackgroundScheduler(app, leader_lease_seconds=60)
+    assert scheduler._keep_lease()
+    first_expiry = LeaderElection('scheduler').current()['expires_at']
+
+    # Once the check is due, the next batch renews the lease instead of waiting for the loop
+    scheduler._next_leader_check = datetime.utcnow() - timedelta(seconds=1)
+    assert scheduler._keep_lease()
+    assert LeaderElection('scheduler').current()['expires_at'] > first_expiry
+
+    # Another process took the lease over: the run stops
+    lease = LeaderElection('scheduler', holder='other')
+    scheduler.leader_election.release()
+    assert lease.try_acquire()
+    scheduler._next_leader_check = datetime.utcnow() - timedelta(seconds=1)
+    assert not scheduler._keep_lease()
+
+def test_sync_applies_changes_from_other_processes(app, user):
+    from src.models import db, ScheduledPost
+    from src.services.background_scheduler import BackgroundScheduler
+
+    post = ScheduledPost(user_id=user.id, content='Due soon', platform='linkedin',
+                         scheduled_time=datetime.utcnow() + timedelta(minutes=5), status='scheduled')
+    db.session.add(post)
+    db.session.commit()
+    scheduler = BackgroundScheduler(app)
+    scheduler._reconcile(datetime.utcnow())
+    assert len(scheduler.queue) == 1
+
+    post.mark_as_cancelled()
+    db.session.commit()
+    scheduler._sync(datetime.utcnow())
+
+    assert len(scheduler.queue) == 0
@@ -0,0 +1,19 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.models import db, Post
+
+@pytest.mark.parametrize('body', [
+    {'post_ids': [1], 'platforms': 'linkedin'},
+    {'post_ids': [1], 'platforms': [{'name': 'linkedin'}]},
+    {'post_ids': [1], 'platforms': [['linkedin']]},
+    {'post_group_id': ['group-1']},
+])
+def test_bulk_publish_rejects_malformed_input(app, user, body):
+    db.session.add(Post(user_id=user.id, content='Hello world', platform='linkedin'))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+    response = app.test_client().post('/api/social-accounts/publish/bulk', json=body, headers=headers)
+
+    assert response.status_code == 400
@@ -0,0 +1,58 @@
+import pytest
+
+from src.models import db, PlannerIdea, User
+from src.services.idea_library_service import IdeaLibraryService
+
+IDEAS = [
+    {'id': 'idea_00000001', 'title': 'Fünf Fehler beim Onboarding', 'hook': 'Warum neue Kunden abspringen'},
+    {'id': 'idea_00000002', 'title': 'Preisstrategie für SaaS', 'hook': 'Wie Staffelpreise Umsatz bringen'},
+    {'id': 'idea_00000003', 'title': 'Kundenstimmen richtig nutzen', 'hook': 'Social Proof auf LinkedIn'},
+]
+
+@pytest.fixture
+def ideas(user):
+    IdeaLibraryService().register_ideas(user.id, IDEAS, source_mode='idea', source='test')
+    db.session.commit()
+
+def search(user, query):
+    return [idea.idea_key for idea in IdeaLibraryService().search_ideas(user.id, query=query).items]
+
+def test_search_uses_the_index(app):
+    assert IdeaLibraryService()._search_index_exists()
+
+@pytest.mark.parametrize('query, expected', [
+    ('onboarding', ['idea_00000001']),
+    ('Preis', ['idea_00000002']),
+    ('kunden', ['idea_00000003', 'idea_00000001']),
+    ('kunden linkedin', ['idea_00000003']),
+    ('strategie', []),
+    ('!!!', ['idea_00000003', 'idea_00000002', 'idea_00000001']),
+])
+def test_search_matches_word_prefixes(user, ideas, query, expected):
+    assert sorted(search(user, query)) == sorted(expected)
+
+def test_index_follows_changes(user, ideas):
+    idea = PlannerIdea.query.filter_by(idea_key='idea_00000002').one()
+    idea.search_text = IdeaLibraryService.normalize_text('Rabattaktionen planen')
+    db.session.commit()
+    assert search(user, 'rabatt') == ['idea_00000002']
+    assert search(user, 'preisstrategie') == []
+
+    IdeaLibraryService().delete_idea(user.id, idea.id)
+    assert search(user, 'rabatt') == []
+
+def test_taken_key_gets_a_new_one_instead_of_failing_the_batch(user, ideas):
+    other = User(username='other', email='other@example.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    batch = [
+        {'id': 'idea_00000001', 'title': 'Newsletter in drei Schritten', 'hook': 'Von der Liste zum Abo'},
+        {'id': 'idea_00000009', 'title': 'Webinare als Leadquelle', 'hook': 'Vom Zuschauer zum Kunden'},
+    ]
+
+    results = IdeaLibraryService().register_ideas(other.id, batch, source_mode='idea', source='test')
+
+    assert results[1]['id'] == 'idea_00000009'
+    assert results[0]['id'].startswith('idea_') and len(results[0]['id']) == 37
+    assert PlannerIdea.query.filter_by(user_id=other.id).count() == 2
+    assert PlannerIdea.query.filter_by(idea_key='idea_00000001').one().user_id == user.id
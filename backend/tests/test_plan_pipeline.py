@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from src.models import db, PipelineJob, ScheduledPost
+from src.services.plan_pipeline_service import PlanPipelineService, get_pipeline_job, update_pipeline_job
+
+class FakeOpenAIService:
+    def _analyze_website(self, url):
+        return ''
+
+    def generate_social_media_post(self, post_theme, platform, **kwargs):
+        if 'Fehler' in post_theme:
+            raise RuntimeError('generation failed')
+        return f'{post_theme} auf {platform}'
+
+def test_run_records_progress_in_the_database(app, user, monkeypatch):
+    monkeypatch.setattr('src.services.openai_service.OpenAIService', FakeOpenAIService)
+    user_id = user.id
+    day = datetime.utcnow().date() + timedelta(days=1)
+    plan = [({'title': title}, datetime.combine(day, datetime.min.time()) + timedelta(hours=9 + index))
+            for index, title in enumerate(['Onboarding', 'Fehler', 'Preise'])]
+    update_pipeline_job('job-1', user_id=user_id, status='queued', total=6)
+
+    PlanPipelineService(batch_size=2).run('job-1', user_id, plan, ['linkedin', 'twitter'], 'UTC')
+    # Another worker process polls the status
+    db.session.remove()
+
+    job = get_pipeline_job('job-1')
+    assert job['status'] == 'completed' and job['user_id'] == user_id
+    assert (job['generated'], job['scheduled'], job['failed']) == (4, 4, 2)
+    assert len(job['errors']) == 2
+    assert sorted(job['scheduled_post_ids']) == sorted(post.id for post in ScheduledPost.query.all())
+
+def test_job_without_progress_is_reported_as_interrupted(app, user):
+    update_pipeline_job('job-2', user_id=user.id, status='processing', total=4)
+    assert get_pipeline_job('job-2')['status'] == 'processing'
+
+    PipelineJob.query.update({'updated_at': datetime.utcnow() - timedelta(hours=1)})
+    db.session.commit()
+
+    job = get_pipeline_job('job-2')
+    assert job['status'] == 'error' and job['error'] == 'Pipeline job was interrupted'
+    assert get_pipeline_job('missing') is None
@@ -0,0 +1,168 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+from sqlalchemy import text
+
+from src.models import db, Post, PublishIntent, ScheduledPost
+from src.services.publish_outbox_service import PublishOutboxService
+
+def enqueue(user, platform='linkedin', **kwargs):
+    service = PublishOutboxService()
+    intent = service.enqueue(user.id, platform, 'Hello world', **kwargs)
+    db.session.commit()
+    return intent
+
+def start_attempt(intent):
+    """State of an intent right before its platform call, as dispatch() leaves it."""
+    intent.status = 'processing'
+    intent.locked_by = 'test'
+    intent.locked_until = datetime.utcnow() + timedelta(minutes=5)
+    intent.attempts += 1
+    intent.dispatched_at = datetime.utcnow()
+    db.session.commit()
+
+@pytest.mark.parametrize('result, expected', [
+    ({'status_code': 401}, 'auth'),
+    ({'status_code': 429}, 'rate_limited'),
+    ({'status_code': 408}, 'network'),
+    ({'status_code': 422}, 'rejected'),
+    ({'status_code': 503}, 'server_error'),
+    ({'error': 'Image upload failed', 'stage': 'pre_send'}, 'network'),
+    ({'error': 'Read timed out', 'exception': 'Read timed out', 'stage': 'create'}, 'unknown_outcome'),
+    ({'error': 'Publishing exception', 'exception': 'boom'}, 'unknown_outcome'),
+    ({'error': 'Instagram posts require a publicly reachable image URL', 'permanent': True}, 'rejected'),
+    ({'error': 'No active account', 'error_class': 'auth'}, 'auth'),
+])
+def test_classify_failure(result, expected):
+    assert PublishOutboxService.classify_failure(result) == expected
+
+def test_failure_before_send_is_retried(user):
+    intent = enqueue(user)
+    start_attempt(intent)
+
+    outcome = PublishOutboxService()._apply_result(
+        intent, {'success': False, 'error': 'Image upload failed', 'stage': 'pre_send'}, datetime.utcnow())
+
+    assert outcome['status'] == 'pending'
+    assert intent.dispatched_at is None
+    assert intent.next_attempt_at > datetime.utcnow()
+
+def test_timeout_after_create_started_is_not_retried(user):
+    scheduled_post = ScheduledPost(user_id=user.id, content='Hello world', platform='linkedin',
+                                   scheduled_time=datetime.utcnow(), status='publishing', attempts=1)
+    db.session.add(scheduled_post)
+    db.session.commit()
+    intent = enqueue(user, scheduled_post_id=scheduled_post.id)
+    start_attempt(intent)
+
+    outcome = PublishOutboxService()._apply_result(intent, {
+        'success': False, 'error': 'LinkedIn posting exception: Read timed out',
+        'exception': 'Read timed out', 'stage': 'create'
+    }, datetime.utcnow())
+    db.session.commit()
+
+    assert outcome['status'] == 'dead'
+    assert intent.dispatched_at is not None
+    assert intent.publication.status == 'failed'
+    assert scheduled_post.status == 'failed'
+    assert scheduled_post.error_class == 'unknown_outcome'
+
+def test_server_error_is_retried_and_client_error_dead_lettered(user):
+    service = PublishOutboxService()
+    retried, rejected = enqueue(user), enqueue(user)
+    start_attempt(retried)
+    start_attempt(rejected)
+
+    assert service._apply_result(retried, {'success': False, 'status_code': 503}, datetime.utcnow())['status'] == 'pending'
+    assert service._apply_result(rejected, {'success': False, 'status_code': 422}, datetime.utcnow())['status'] == 'dead'
+    assert rejected.dispatched_at is None
+
+def test_deleting_a_published_post_keeps_its_intents(user):
+    # SQLite only enforces foreign keys when asked to, PostgreSQL always does
+    db.session.execute(text('PRAGMA foreign_keys=ON'))
+    post = Post(user_id=user.id, content='Hello world')
+    scheduled_post = ScheduledPost(user_id=user.id, content='Hello world', platform='linkedin',
+                                   scheduled_time=datetime.utcnow(), status='published')
+    db.session.add_all([post, scheduled_post])
+    db.session.commit()
+    intent = enqueue(user, post_id=post.id, scheduled_post_id=scheduled_post.id)
+
+    db.session.delete(post)
+    db.session.delete(scheduled_post)
+    db.session.commit()
+
+    db.session.refresh(intent)
+    assert intent.post_id is None and intent.scheduled_post_id is None
+    assert intent.publication.post_id is None
+
+def test_claim_takes_each_intent_once(user):
+    service = PublishOutboxService()
+    intents = [enqueue(user) for _ in range(5)]
+
+    first = service.claim(limit=3)
+    second = service.claim(limit=3)
+
+    assert len(first) == 3 and len(second) == 2
+    assert {intent.id for intent in first}.isdisjoint(intent.id for intent in second)
+    assert {intent.id for intent in first + second} == {intent.id for intent in intents}
+    assert service.claim() == []
+
+def test_expired_claim_before_dispatch_is_reclaimed(user):
+    service = PublishOutboxService()
+    intent = enqueue(user)
+    service.claim()
+    intent.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert [claimed.id for claimed in service.claim()] == [intent.id]
+
+def test_expired_lease_after_dispatch_is_dead_lettered(user):
+    service = PublishOutboxService()
+    intent = enqueue(user)
+    start_attempt(intent)
+    intent.locked_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    assert service.claim() == []
+    assert intent.status == 'dead'
+    assert 'outcome unknown' in intent.last_error
+
+@pytest.mark.parametrize('async_publishing', [False, True])
+def test_read_timeout_after_post_does_not_resend(app, user, linkedin_account, standins, async_publishing):
+    app.config.update(PLATFORM_STANDIN_URL=standins, HTTP_READ_TIMEOUT=0.5, HTTP_MAX_RETRIES=0,
+                      ASYNC_PUBLISHING_ENABLED=async_publishing)
+    # The stand-in receives the post but answers after the client gave up
+    requests.post(f'{standins}/_standin/config', json={'platforms': {'linkedin': {'latency_ms': 1500}}})
+    service = PublishOutboxService()
+    intent = enqueue(user)
+
+    outcome = service.dispatch_pending()['outcomes'][0]
+    assert outcome['status'] == 'dead'
+
+    # Even once any backoff would have passed, the intent is not sent again
+    PublishIntent.query.update({'next_attempt_at': datetime.utcnow() - timedelta(hours=1)})
+    db.session.commit()
+    assert service.dispatch_pending()['claimed'] == 0
+    assert db.session.get(PublishIntent, intent.id).dispatched_at is not None
+
+    # The stand-in counts a post once its delayed answer is written
+    deadline = time.monotonic() + 5
+    while not requests.get(f'{standins}/_standin/stats').json()['posts'] and time.monotonic() < deadline:
+        time.sleep(0.1)
+    stats = requests.get(f'{standins}/_standin/stats').json()
+    assert stats['posts'] == {'linkedin': 1}
+    assert stats['requests'] == {'POST /linkedin/v2/ugcPosts 201': 1}
+
+@pytest.mark.parametrize('async_publishing', [False, True])
+def test_refused_connection_is_retried(app, user, linkedin_account, async_publishing):
+    # Nothing listens on port 9 (discard) here, so the connection is refused before anything is sent
+    app.config.update(PLATFORM_STANDIN_URL='http://127.0.0.1:9', HTTP_MAX_RETRIES=0,
+                      ASYNC_PUBLISHING_ENABLED=async_publishing)
+    enqueue(user)
+
+    outcome = PublishOutboxService().dispatch_pending()['outcomes'][0]
+
+    assert outcome['status'] == 'pending'
+    assert PublishIntent.query.one().dispatched_at is None
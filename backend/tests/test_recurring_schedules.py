@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models import db, ScheduledPost
+from src.services.recurring_schedule_service import RecurringScheduleService
+
+def create_daily_series(user):
+    start = (datetime.utcnow() + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+    schedule, created = RecurringScheduleService(window_days=5).create_schedule(
+        user.id, {'title': 'Tip', 'content': 'Tip of the day'}, 'linkedin', 'FREQ=DAILY', start)
+    return schedule, created
+
+def occurrences(schedule):
+    return ScheduledPost.query.filter_by(recurring_schedule_id=schedule.id).order_by(ScheduledPost.scheduled_time).all()
+
+def test_resume_keeps_cancelled_occurrences(user):
+    service = RecurringScheduleService(window_days=5)
+    schedule, created = create_daily_series(user)
+    cancelled = occurrences(schedule)[1]
+    cancelled.mark_as_cancelled()
+    db.session.commit()
+
+    service.update_schedule(schedule.id, user.id, {'status': 'paused'})
+    service.update_schedule(schedule.id, user.id, {'status': 'active'})
+
+    posts = occurrences(schedule)
+    assert len(posts) == created
+    assert [post.status for post in posts].count('cancelled') == 1
+    assert db.session.get(ScheduledPost, cancelled.id).status == 'cancelled'
+
+@pytest.mark.parametrize('changes', [
+    {'rrule': None},
+    {'rrule': 7},
+    {'timezone': 1},
+    {'platform': 'myspace'},
+    {'platform': 'x' * 50},
+    {'content': None},
+    {'title': ['Tip']},
+])
+def test_update_rejects_invalid_changes(user, changes):
+    schedule, _ = create_daily_series(user)
+
+    with pytest.raises(ValueError):
+        RecurringScheduleService(window_days=5).update_schedule(schedule.id, user.id, changes)
+
+def test_create_rejects_unsupported_platform(user):
+    with pytest.raises(ValueError):
+        RecurringScheduleService().create_schedule(user.id, {'content': 'Tip'}, 'myspace', 'FREQ=WEEKLY',
+                                                   datetime.utcnow() + timedelta(days=1))
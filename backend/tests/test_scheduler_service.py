@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from src.models import db, ScheduledPost
+from src.services.scheduler_service import SchedulerService
+
+TOMORROW = (datetime.utcnow() + timedelta(days=1)).strftime('%Y-%m-%d')
+
+def item(**overrides):
+    return dict({'platform': 'linkedin', 'scheduled_date': TOMORROW, 'scheduled_time': '09:00',
+                 'content': 'Hello world'}, **overrides)
+
+def test_bulk_reports_invalid_items_and_schedules_the_rest(user):
+    items = [
+        item(),
+        item(platform='x' * 50),
+        item(platform='myspace'),
+        item(content=None, post_id=[1, 2]),
+        item(content=None, post_id={'id': 1}),
+        item(content=None, post_id='1'),
+        item(content=['Hello']),
+        item(timezone=['Europe/Berlin']),
+        item(scheduled_time='10:00'),
+    ]
+
+    result = SchedulerService().schedule_posts_bulk(user.id, items)
+
+    assert [entry['success'] for entry in result['results']] == [True] + [False] * 7 + [True]
+    assert result['scheduled'] == 2 and result['failed'] == 7
+    assert ScheduledPost.query.count() == 2
+
+def test_bulk_rejects_invalid_default_timezone(user):
+    result = SchedulerService().schedule_posts_bulk(user.id, [item()], default_timezone=['UTC'])
+
+    assert result['results'][0] == {'index': 0, 'success': False, 'error': 'Invalid timezone'}
+
+def test_backlog_age_counts_from_when_each_post_became_due(user):
+    now = datetime.utcnow()
+    posts = [
+        # First attempted an hour ago, retry due since 5 seconds
+        ScheduledPost(user_id=user.id, content='Retry', platform='linkedin', scheduled_time=now - timedelta(hours=1),
+                      status='retrying', attempts=1, next_attempt_at=now - timedelta(seconds=5)),
+        # Claimed by a worker that died; claimable again since its lease expired 10 seconds ago
+        ScheduledPost(user_id=user.id, content='Orphaned', platform='linkedin', scheduled_time=now - timedelta(hours=2),
+                      status='publishing', attempts=1, lease_expires_at=now - timedelta(seconds=10)),
+        ScheduledPost(user_id=user.id, content='Due', platform='linkedin', scheduled_time=now - timedelta(seconds=20),
+                      status='scheduled', attempts=0),
+    ]
+    db.session.add_all(posts)
+    db.session.commit()
+
+    backlog = SchedulerService().get_backlog()
+
+    assert backlog['scheduled_due'] == 3
+    assert backlog['retrying_due'] == 1
+    assert 20 <= backlog['oldest_due_seconds'] < 30
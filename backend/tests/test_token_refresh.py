@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from src.models import db, SocialAccount, User
+from src.services.leader_election_service import LeaderElection
+from src.services.token_refresh_service import LEASE_NAME, TokenRefreshService, refresh_now
+
+class RecordingSocialService:
+    def __init__(self):
+        self.refreshed = []
+
+    def refresh_access_token(self, account):
+        self.refreshed.append(account.id)
+        return {'access_token': 'new', 'refresh_token': 'rotated', 'expires_at': datetime.utcnow() + timedelta(days=60)}
+
+def add_expiring_accounts(count):
+    for index in range(count):
+        user = User(username=f'user-{index}', email=f'user-{index}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(SocialAccount(user_id=user.id, platform='twitter', account_id=f'account-{index}',
+                                     access_token='old', refresh_token='old', is_active=True,
+                                     expires_at=datetime.utcnow() + timedelta(hours=1)))
+    db.session.commit()
+
+def test_refresh_now_is_refused_while_another_process_holds_the_lease(app, monkeypatch):
+    service = RecordingSocialService()
+    monkeypatch.setattr('src.services.service_registry.get_social_media_service', lambda: service)
+    add_expiring_accounts(2)
+    other_process = LeaderElection(LEASE_NAME, lease_seconds=600, holder='other')
+    assert other_process.try_acquire()
+
+    assert refresh_now() is None
+    assert service.refreshed == []
+
+    other_process.release()
+    assert refresh_now()['refreshed'] == 2
+    # The lease is given back after the run
+    assert LeaderElection(LEASE_NAME, holder='other').try_acquire()
+
+def test_run_stops_when_the_lease_is_lost(app, monkeypatch):
+    service = RecordingSocialService()
+    monkeypatch.setattr('src.services.service_registry.get_social_media_service', lambda: service)
+    add_expiring_accounts(3)
+    renewals = iter([True, False])
+
+    results = TokenRefreshService(batch_size=2).refresh_expiring_accounts(keep_lease=lambda: next(renewals))
+
+    assert results['refreshed'] == 2
+    assert len(service.refreshed) == 2
+    assert results['expiring_soon'] == 1
+
+class FailingSocialService(RecordingSocialService):
+    def refresh_access_token(self, account):
+        self.refreshed.append(account.id)
+        if account.platform == 'linkedin':
+            raise RuntimeError('Service unavailable')
+        # Refreshed, but the platform did not say when the new token expires
+        return {'access_token': 'new', 'refresh_token': None, 'expires_at': None}
+
+def test_accounts_that_cannot_be_refreshed_are_not_retried_every_run(app, monkeypatch):
+    service = FailingSocialService()
+    monkeypatch.setattr('src.services.service_registry.get_social_media_service', lambda: service)
+    soon = datetime.utcnow() + timedelta(hours=1)
+    accounts = {}
+    for platform, refresh_token in [('twitter', None), ('facebook', None), ('linkedin', 'refresh')]:
+        user = User(username=platform, email=f'{platform}@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        accounts[platform] = SocialAccount(user_id=user.id, platform=platform, access_token='old',
+                                           refresh_token=refresh_token, is_active=True, expires_at=soon)
+        db.session.add(accounts[platform])
+    db.session.commit()
+
+    results = TokenRefreshService().refresh_expiring_accounts()
+
+    # Twitter has no refresh token to redeem; Facebook exchanges its access token instead
+    assert sorted(service.refreshed) == sorted([accounts['facebook'].id, accounts['linkedin'].id])
+    assert results['refreshed'] == 1 and results['failed'] == 1
+    assert accounts['facebook'].access_token == 'new' and accounts['facebook'].next_refresh_at > datetime.utcnow()
+    assert accounts['linkedin'].is_active and accounts['linkedin'].next_refresh_at > datetime.utcnow()
+
+    # The next run backs off from both
+    service.refreshed.clear()
+    TokenRefreshService().refresh_expiring_accounts()
+    assert service.refreshed == []
+
+    # Once the backoff has passed they are tried again
+    SocialAccount.query.update({'next_refresh_at': datetime.utcnow() - timedelta(seconds=1)})
+    db.session.commit()
+    TokenRefreshService().refresh_expiring_accounts()
+    assert len(service.refreshed) == 2
+
+def test_publish_path_uses_a_token_renewed_meanwhile(app, linkedin_account, monkeypatch):
+    from src.services.social_media_service import SocialMediaService
+
+    linkedin_account.expires_at = datetime.utcnow() - timedelta(minutes=1)
+    db.session.commit()
+    service = SocialMediaService()
+    recorder = RecordingSocialService()
+    monkeypatch.setattr(service, 'refresh_access_token', recorder.refresh_access_token)
+    # The background refresher renews the token after the publisher loaded the account
+    SocialAccount.query.filter_by(id=linkedin_account.id).update(
+        {'access_token': 'renewed', 'expires_at': datetime.utcnow() + timedelta(days=60)}, synchronize_session=False)
+
+    service._refresh_token(linkedin_account)
+
+    assert recorder.refreshed == []
+    assert linkedin_account.access_token == 'renewed'
@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { generatePlannerIdeas } from '../services/plannerApi';
+import { streamPlannerIdeas } from '../services/plannerApi';
 
 const Planner = () => {
   // State management
@@ -97,10 +97,11 @@ const Planner = () => {
         payload.idea = idea.trim();
       }
 
-      const result = await generatePlannerIdeas(payload);
-      
-      setIdeas(result.ideas || []);
-      setWarnings(result.warnings || []);
+      // Show ideas as soon as they arrive from the stream
+      const result = await streamPlannerIdeas(payload, {
+        onIdea: (newIdea) => setIdeas(prev => [...prev, newIdea]),
+        onWarning: (warning) => setWarnings(prev => [...prev, warning])
+      });
 
       if (result.ideas && result.ideas.length === 0) {
         setError('Keine Ideen generiert. Bitte versuchen Sie es erneut.');
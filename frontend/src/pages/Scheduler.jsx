@@ -110,6 +110,7 @@ const Scheduler = () => {
   const getStatusBadge = (status) => {
     const statusConfig = {
       scheduled: { color: 'bg-blue-100 text-blue-800', text: 'Geplant' },
+      retrying: { color: 'bg-yellow-100 text-yellow-800', text: 'Neuer Versuch geplant' },
       published: { color: 'bg-green-100 text-green-800', text: 'Veröffentlicht' },
       failed: { color: 'bg-red-100 text-red-800', text: 'Fehlgeschlagen' },
       cancelled: { color: 'bg-gray-100 text-gray-800', text: 'Storniert' }
@@ -361,7 +362,7 @@ const Scheduler = () => {
                   <div className="ml-4 flex flex-col items-end gap-2">
                     {getStatusBadge(post.status)}
                     
-                    {post.status === 'scheduled' && (
+                    {(post.status === 'scheduled' || post.status === 'retrying') && (
                       <button
                         onClick={() => handleCancelPost(post.id)}
                         className="text-red-600 hover:text-red-800 text-sm font-medium"
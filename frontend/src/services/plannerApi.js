@@ -4,6 +4,24 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
 
+/**
+ * Build request headers, adding the JWT when the user is logged in so
+ * generated ideas are stored in the user's idea library.
+ * @param {Object} [extra] - Additional headers
+ * @returns {Object} Request headers
+ */
+const getHeaders = (extra = {}) => {
+  const headers = {
+    'Content-Type': 'application/json',
+    ...extra,
+  };
+  const token = localStorage.getItem('token');
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`;
+  }
+  return headers;
+};
+
 /**
  * Generate content ideas from URLs or custom idea
  * @param {Object} payload - Request payload
@@ -13,15 +31,14 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
  * @param {number} [payload.limit=10] - Number of ideas to generate
  * @param {string} [payload.persona] - Target persona
  * @param {string[]} [payload.channels] - Target channels ["LI","FB","IG","X"]
+ * @param {string} [payload.duplicates="flag"] - "flag" or "filter" ideas already in the library
  * @returns {Promise<Object>} Response with ideas array and optional warnings
  */
 export async function generatePlannerIdeas(payload) {
   try {
     const response = await fetch(`${API_BASE_URL}/api/planner/ideas`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers: getHeaders(),
       body: JSON.stringify(payload)
     });
 
@@ -37,6 +54,139 @@ export async function generatePlannerIdeas(payload) {
   }
 }
 
+/**
+ * Stream content ideas from URLs or custom idea via Server-Sent Events.
+ * Ideas are passed to onIdea as soon as the backend has parsed them.
+ * @param {Object} payload - Request payload (same as generatePlannerIdeas)
+ * @param {Object} handlers - Event callbacks
+ * @param {Function} [handlers.onIdea] - Called with each idea object
+ * @param {Function} [handlers.onWarning] - Called with each warning message
+ * @returns {Promise<Object>} Response with all streamed ideas and warnings
+ */
+export async function streamPlannerIdeas(payload, { onIdea, onWarning } = {}) {
+  const ideas = [];
+  const warnings = [];
+
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/planner/ideas/stream`, {
+      method: 'POST',
+      headers: getHeaders({ 'Accept': 'text/event-stream' }),
+      body: JSON.stringify(payload)
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    const handleEvent = (rawEvent) => {
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data += line.slice(5).trim();
+        }
+      }
+      if (!data) return;
+
+      const parsed = JSON.parse(data);
+      if (event === 'idea') {
+        ideas.push(parsed);
+        onIdea?.(parsed);
+      } else if (event === 'warning') {
+        warnings.push(parsed.message);
+        onWarning?.(parsed.message);
+      } else if (event === 'error') {
+        throw new Error(parsed.error);
+      }
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      let separator = buffer.indexOf('\n\n');
+      while (separator !== -1) {
+        handleEvent(buffer.slice(0, separator));
+        buffer = buffer.slice(separator + 2);
+        separator = buffer.indexOf('\n\n');
+      }
+    }
+
+    if (buffer.trim()) {
+      handleEvent(buffer);
+    }
+
+    return { ideas, warnings };
+  } catch (error) {
+    console.error('Planner Stream Error:', error);
+    throw new Error(`Planner API Fehler: ${error.message}`);
+  }
+}
+
+/**
+ * Browse and search the user's idea library
+ * @param {Object} [params] - Query parameters
+ * @param {string} [params.q] - Search terms
+ * @param {string} [params.funnel] - Funnel stage filter
+ * @param {string} [params.channel] - Channel filter
+ * @param {number} [params.page] - Page number
+ * @param {number} [params.per_page] - Page size
+ * @returns {Promise<Object>} Response with ideas and pagination
+ */
+export async function getIdeaLibrary(params = {}) {
+  try {
+    const query = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value !== undefined && value !== '')
+    ).toString();
+    const response = await fetch(`${API_BASE_URL}/api/planner/library${query ? `?${query}` : ''}`, {
+      method: 'GET',
+      headers: getHeaders()
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Idea Library Error:', error);
+    throw new Error(`Ideen-Bibliothek Fehler: ${error.message}`);
+  }
+}
+
+/**
+ * Find stored ideas similar to a topic
+ * @param {string} text - Topic, title or hook
+ * @returns {Promise<Object>} Response with similar ideas
+ */
+export async function findSimilarIdeas(text) {
+  try {
+    const response = await fetch(`${API_BASE_URL}/api/planner/library/similar?text=${encodeURIComponent(text)}`, {
+      method: 'GET',
+      headers: getHeaders()
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      throw new Error(errorData.error || `HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Idea Library Error:', error);
+    throw new Error(`Ideen-Bibliothek Fehler: ${error.message}`);
+  }
+}
+
 /**
  * Health check for planner service
  * @returns {Promise<Object>} Health status
@@ -117,25 +117,5 @@ export const schedulerApi = {
       throw error;
     }
   },
-
-  // Manually trigger processing of scheduled posts (for testing)
-  processScheduledPosts: async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/api/scheduler/process`, {
-        method: 'POST',
-        headers: getAuthHeaders(),
-      });
-
-      if (!response.ok) {
-        const errorData = await response.json();
-        throw new Error(errorData.error || 'Failed to process scheduled posts');
-      }
-
-      return await response.json();
-    } catch (error) {
-      console.error('Error processing scheduled posts:', error);
-      throw error;
-    }
-  },
 };
 